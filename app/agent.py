@@ -1,99 +1,545 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-from typing import Any, Dict, List
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Sequence
 
 from pydantic import ValidationError
 
-import os
-
-from github import Github
-
+from .cache import get_triage_cache, triage_cache_key
+from .classifier import Prediction, get_local_classifier, issue_text
+from .clients import get_client_registry
 from .config import get_settings
-from .llm.chatgpt import ChatGPTLLM
-from .llm.mock import MockLLM
+from .github_client import GitHubClient
+from .llm.base import BaseLLM
+from .llm.router import served_by_last_resort
+from .llm.usage import LLMUsage, current_usage, timed_llm_call, track_usage
 from .logging_utils import get_logger
-from .prompt_builder import build_prompts
+from .metrics import (
+    LLM_CALL_SECONDS,
+    LLM_CALLS,
+    LLM_CALLS_AVOIDED,
+    LLM_CACHED_PROMPT_RATIO,
+    LLM_COST_USD,
+    LLM_ERRORS,
+    LLM_FALLBACKS,
+    LLM_PREFIX_CACHE_SAVINGS_USD,
+    LLM_PREFIX_CACHE_SECONDS,
+    LLM_REQUEST_TOKENS,
+    LLM_TOKENS,
+    LOCAL_CLASSIFIER_DECISIONS,
+    LOCAL_CLASSIFIER_SECONDS,
+    NEAR_DUPLICATE_INDEX_SIZE,
+    NEAR_DUPLICATE_LOOKUP_SECONDS,
+    PROMPT_COMPACTIONS,
+    PROMPT_INPUT_TOKENS,
+    TRIAGE_PRIORITY,
+    VAGUE_GUARD_OVERRIDES,
+)
+from .prompt_builder import build_user_prompt, prompt_template_fingerprint
 from .schemas import TriageResult
-from .triage_criteria import load_triage_criteria
+from .similarity import NearDuplicateIndex, Signature, get_near_duplicate_index, minhash_signature
+from .storms import StormUpdate, get_storm_aggregator
+from .policy import CRITICAL_RULE, DEFAULT_MIN_WORDS
+from .token_budget import compact_text, count_tokens
+from .tracing import set_span_attributes, span
+from .triage_criteria import RULE_C, RULE_D, CriteriaSnapshot, current_criteria
 
 logger = get_logger(__name__)
 
+# A compacted body keeps at least this many tokens even when the criteria alone fill the budget.
+MIN_BODY_TOKENS = 256
+
+NEAR_DUPLICATE_RULE = "Near-duplicate of"
+LOCAL_CLASSIFIER_RULE = "Local classifier:"
+FALLBACK_RULE = "Fallback:InvalidLLMOutput"
+COMMENT_MARKER_PREFIX = "<!-- issue-triager:"
+
+# Which stage produced the current context's latest triage result (rules, cache, llm, fallback, ...).
+_decided_by: ContextVar[str] = ContextVar("triage_decided_by", default="llm")
+
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class _TriagePlan:
+    """Everything needed to finish a triage once the LLM has answered."""
+
+    title: str
+    body: str | None
+    min_words: int
+    system_prompt: str
+    user_prompt: str
+    llm_client: BaseLLM
+    cache_key: str | None
+    near_duplicate: "_NearDuplicateSlot | None" = None
+
+
+@dataclass
+class _NearDuplicateSlot:
+    """Where a fresh LLM result goes in the near-duplicate index."""
+
+    signature: Signature
+    scope: tuple[str, ...]
+    origin: str
+
+
+def triage_issue(
+    title: str, body: str | None, repo: str | None, url: str | None, local_prediction: Prediction | None = None
+) -> TriageResult:
+    """Triage one issue. `local_prediction` is a precomputed local classifier score (batch scoring)."""
+    with span("triage", repo=repo) as triage_span:
+        plan = _prepare_triage(title, body, repo, url, local_prediction)
+        if isinstance(plan, TriageResult):
+            result = plan
+        else:
+            with _observe_llm_call(plan.llm_client):
+                raw_output = plan.llm_client.generate(plan.system_prompt, plan.user_prompt)
+            result = _complete_triage(plan, raw_output)
+        triage_span.set_attributes(priority=result.priority)
+        return result
+
+
+async def triage_issue_async(
+    title: str, body: str | None, repo: str | None, url: str | None, local_prediction: Prediction | None = None
+) -> TriageResult:
+    """Async variant of `triage_issue` that keeps the event loop free during the LLM call."""
+    with span("triage", repo=repo) as triage_span:
+        plan = _prepare_triage(title, body, repo, url, local_prediction)
+        if isinstance(plan, TriageResult):
+            result = plan
+        else:
+            async with _llm_slot():
+                with _observe_llm_call(plan.llm_client):
+                    raw_output = await plan.llm_client.agenerate(plan.system_prompt, plan.user_prompt)
+            result = _complete_triage(plan, raw_output)
+        triage_span.set_attributes(priority=result.priority)
+        return result
+
+
+def decided_by() -> str:
+    """Which stage decided the latest `triage_issue` call made in this context."""
+    return _decided_by.get()
+
+
+def _mark_decided(stage: str) -> None:
+    _decided_by.set(stage)
+    set_span_attributes(decided_by=stage)
+
+
+def _prepare_triage(
+    title: str, body: str | None, repo: str | None, url: str | None, local_prediction: Prediction | None = None
+) -> TriageResult | _TriagePlan:
+    """Run the cheap pre-LLM stages; returns a final result when one of them is decisive."""
+    # One snapshot per request: a criteria reload mid-request cannot mix versions.
+    criteria = current_criteria()
+    set_span_attributes(criteria_version=criteria.version)
+    if get_settings().RULES_FIRST_ENABLED:
+        with span("rules") as rules_span:
+            decided = _decide_with_rules(criteria, title, body)
+            rules_span.set_attributes(decided=decided is not None)
+        if decided is not None:
+            TRIAGE_PRIORITY.inc(priority=decided.priority)
+            _mark_decided("rules")
+            return decided
+
+    llm_client = _select_llm_client()
+    with span("cache_lookup") as cache_span:
+        cache_key, cached = _cache_lookup(llm_client, criteria, title, body)
+        cache_span.set_attributes(hit=cached is not None)
+    if cached is not None:
+        LLM_CALLS_AVOIDED.inc(reason="cache")
+        _mark_decided("cache")
+        return _finalize_triage(cached, title, body, criteria.matchers.min_words)
+
+    near_duplicate = None
+    index = get_near_duplicate_index()
+    if index is not None:
+        with span("near_duplicate_lookup") as lookup_span:
+            started = time.perf_counter()
+            result, near_duplicate = _near_duplicate_lookup(index, criteria, title, body, repo, url)
+            NEAR_DUPLICATE_LOOKUP_SECONDS.observe(time.perf_counter() - started)
+            lookup_span.set_attributes(hit=result is not None)
+        if result is not None:
+            LLM_CALLS_AVOIDED.inc(reason="near_duplicate")
+            TRIAGE_PRIORITY.inc(priority=result.priority)
+            _mark_decided("near_duplicate")
+            return result
+
+    decided = _local_classifier_decision(criteria, title, body, local_prediction)
+    if decided is not None:
+        LLM_CALLS_AVOIDED.inc(reason="local_classifier")
+        TRIAGE_PRIORITY.inc(priority=decided.priority)
+        _mark_decided("local_classifier")
+        return decided
+
+    # Token counting and compaction are only paid for requests that actually reach the LLM.
+    with span("build_prompts"):
+        user_prompt = _build_budgeted_user_prompt(criteria, llm_client, title, body, repo, url)
+    LLM_CALLS.inc()
+    return _TriagePlan(
+        title,
+        body,
+        criteria.matchers.min_words,
+        criteria.system_prompt,
+        user_prompt,
+        llm_client,
+        cache_key,
+        near_duplicate,
+    )
+
+
+def _complete_triage(plan: _TriagePlan, raw_output: str) -> TriageResult:
+    if not raw_output.strip():
+        LLM_ERRORS.inc(**_llm_labels(plan.llm_client))
+    # A last-resort answer must not be served from the cache once the preferred backend recovers.
+    last_resort = served_by_last_resort()
+    cache_key = None if last_resort else plan.cache_key
+    result = _finalize_triage(raw_output, plan.title, plan.body, plan.min_words, cache_key)
+    _mark_decided("fallback" if _is_fallback(result) else "llm")
+    slot = plan.near_duplicate
+    index = get_near_duplicate_index()
+    if slot is not None and index is not None and not last_resort and not _is_fallback(result):
+        index.add(slot.signature, slot.scope, result, slot.origin)
+        NEAR_DUPLICATE_INDEX_SIZE.set(len(index))
+    return result
+
 
-def triage_issue(title: str, body: str | None, repo: str | None, url: str | None) -> TriageResult:
+def _near_duplicate_lookup(
+    index: NearDuplicateIndex,
+    criteria: CriteriaSnapshot,
+    title: str,
+    body: str | None,
+    repo: str | None,
+    url: str | None,
+) -> tuple[TriageResult | None, _NearDuplicateSlot | None]:
+    """Reuse a recent near-identical issue's result, or return where this issue's result should go."""
+    signature = minhash_signature(f"{title}\n{body or ''}")
+    if signature is None:
+        return None, None
+    scope = (repo or "", criteria.version)
+    match = index.lookup(signature, scope)
+    if match is None:
+        return None, _NearDuplicateSlot(signature, scope, url or title)
+    logger.info("Near-duplicate of %s (similarity %.2f); reusing its triage.", match.origin, match.similarity)
+    rule = f"{NEAR_DUPLICATE_RULE} {match.origin} (similarity {match.similarity:.2f})"
+    result = match.result.model_copy(update={"matched_rules": [*match.result.matched_rules, rule]})
+    return _apply_vague_guard(result, title, body, criteria.matchers.min_words), None
+
+
+def _local_classifier_decision(
+    criteria: CriteriaSnapshot, title: str, body: str | None, prediction: Prediction | None
+) -> TriageResult | None:
+    """Answer from the local classifier when it is confident enough, otherwise defer to the LLM."""
+    if prediction is None:
+        classifier = get_local_classifier()
+        if classifier is None or _classifier_is_stale(classifier.criteria_version, criteria):
+            return None
+        with span("local_classifier"):
+            started = time.perf_counter()
+            prediction = classifier.predict([issue_text(title, body)])[0]
+            LOCAL_CLASSIFIER_SECONDS.observe(time.perf_counter() - started)
+    elif _classifier_is_stale(prediction.criteria_version, criteria):
+        return None
+    threshold = get_settings().LOCAL_CLASSIFIER_THRESHOLD
+    set_span_attributes(local_confidence=prediction.confidence)
+    if prediction.confidence < threshold:
+        LOCAL_CLASSIFIER_DECISIONS.inc(outcome="deferred")
+        return None
+    LOCAL_CLASSIFIER_DECISIONS.inc(outcome="answered")
+    logger.info("Local classifier answered %s (confidence %.2f).", prediction.priority, prediction.confidence)
+    result = TriageResult(
+        priority=prediction.priority,
+        notify_on_call=prediction.priority == "HIGH",
+        labels=[f"priority:{prediction.priority.lower()}"],
+        reasoning=(
+            f"Closely matches previously triaged issues (nearest: {prediction.neighbour}, "
+            f"similarity {prediction.similarity:.2f})."
+        ),
+        confidence=prediction.confidence,
+        matched_rules=[f"{LOCAL_CLASSIFIER_RULE} nearest labelled issue {prediction.neighbour}"],
+    )
+    return _apply_vague_guard(result, title, body, criteria.matchers.min_words)
+
+
+def _classifier_is_stale(model_version: str | None, criteria: CriteriaSnapshot) -> bool:
+    # Labels given under other criteria say nothing about this version's priorities.
+    if model_version == criteria.version:
+        return False
+    LOCAL_CLASSIFIER_DECISIONS.inc(outcome="stale")
+    logger.debug("Local classifier was trained for criteria %s, not %s; deferring.", model_version, criteria.version)
+    return True
+
+
+def _decide_with_rules(criteria: CriteriaSnapshot, title: str, body: str | None) -> TriageResult | None:
+    """Apply the mandatory criteria rules that need no judgment (Rule D, then Rule C)."""
+    content = f"{title or ''} {body or ''}"
+    min_words = criteria.matchers.min_words
+    if len(content.split(maxsplit=min_words)) < min_words:
+        LLM_CALLS_AVOIDED.inc(reason="rule_d")
+        logger.info("Rule D decided triage without an LLM call.")
+        return _insufficient_information_result(confidence=0.2, matched_rules=[RULE_D])
+
+    components = criteria.matchers.critical_components.matched_keywords(content, CRITICAL_RULE)
+    if components:
+        LLM_CALLS_AVOIDED.inc(reason="rule_c")
+        logger.info("Rule C decided triage without an LLM call: %s", ", ".join(components))
+        return TriageResult(
+            priority="HIGH",
+            notify_on_call=True,
+            labels=["priority:high"],
+            reasoning=(
+                f"Mentions critical infrastructure ({', '.join(components)}); "
+                "marked HIGH automatically for manual verification."
+            ),
+            confidence=0.95,
+            matched_rules=[RULE_C],
+        )
+    return None
+
+
+def _build_budgeted_user_prompt(
+    criteria: CriteriaSnapshot, llm_client: BaseLLM, title: str, body: str | None, repo: str | None, url: str | None
+) -> str:
+    """Build the user prompt, compacting the issue body when the request would exceed LLM_INPUT_TOKEN_BUDGET."""
+    budget = get_settings().LLM_INPUT_TOKEN_BUDGET
+    if budget <= 0:
+        return build_user_prompt(title, body, repo, url)
+    model = getattr(llm_client, "model", None)
+    fixed_tokens = _system_prompt_tokens(criteria.system_prompt, model)
+    fixed_tokens += count_tokens(build_user_prompt(title, "", repo, url), model)
+    body_tokens = count_tokens(body or "", model)
+    if fixed_tokens + body_tokens > budget:
+        body_budget = max(MIN_BODY_TOKENS, budget - fixed_tokens)
+        compacted = compact_text(body or "", body_budget, criteria.matchers.relevant, model)
+        PROMPT_COMPACTIONS.inc()
+        logger.info("Compacted issue body from %s to %s tokens to fit the input budget.", body_tokens, compacted.tokens)
+        set_span_attributes(body_tokens=body_tokens, compacted_body_tokens=compacted.tokens)
+        body, body_tokens = compacted.text, compacted.tokens
+    PROMPT_INPUT_TOKENS.observe(fixed_tokens + body_tokens)
+    return build_user_prompt(title, body, repo, url)
+
+
+@lru_cache(maxsize=8)
+def _system_prompt_tokens(system_prompt: str, model: str | None) -> int:
+    # One system prompt per criteria version, so it is counted once per version and model.
+    return count_tokens(system_prompt, model)
+
+
+def _llm_labels(llm_client: BaseLLM) -> Dict[str, str]:
+    backend = getattr(llm_client, "backend", llm_client)
+    return {"backend": backend.__class__.__name__, "model": str(getattr(llm_client, "model", "") or "none")}
+
+
+@contextmanager
+def _observe_llm_call(llm_client: BaseLLM) -> Iterator[None]:
+    labels = _llm_labels(llm_client)
+    started = time.perf_counter()
+    # Usage of this one call is tracked separately for metrics, then added to the caller's usage.
+    outer, usage = current_usage(), LLMUsage()
+    try:
+        with span("llm", **labels) as llm_span, track_usage(usage), timed_llm_call():
+            try:
+                yield
+            except Exception:
+                LLM_ERRORS.inc(**labels)
+                raise
+            finally:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - started, **labels)
+                llm_span.set_attributes(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    cached_tokens=usage.cached_tokens,
+                )
+    finally:
+        _record_token_usage(usage, labels)
+        if outer is not None:
+            outer.add(usage)
+
+
+def _record_token_usage(usage: LLMUsage, labels: Dict[str, str]) -> None:
+    if not usage.total_tokens:
+        return  # backends without usage reporting (MockLLM)
+    LLM_TOKENS.inc(usage.prompt_tokens, kind="prompt", **labels)
+    LLM_TOKENS.inc(usage.completion_tokens, kind="completion", **labels)
+    if usage.cached_tokens:
+        LLM_TOKENS.inc(usage.cached_tokens, kind="cached", **labels)
+    LLM_REQUEST_TOKENS.observe(usage.prompt_tokens, kind="prompt")
+    LLM_REQUEST_TOKENS.observe(usage.completion_tokens, kind="completion")
+    LLM_REQUEST_TOKENS.observe(usage.cached_tokens, kind="cached")
+
+    # Prefix reuse: how much of the prompt was cached, what it did to latency, and what it saved.
+    LLM_CACHED_PROMPT_RATIO.observe(usage.cached_ratio, **labels)
+    LLM_PREFIX_CACHE_SECONDS.observe(usage.seconds, prefix_cache="hit" if usage.cached_tokens else "miss")
     settings = get_settings()
-    criteria_text = load_triage_criteria()
-    system_prompt, user_prompt = build_prompts(criteria_text, title, body, repo, url)
+    prices = (settings.LLM_PRICE_INPUT_PER_MTOK, settings.LLM_PRICE_OUTPUT_PER_MTOK)
+    cost = usage.cost(*prices, settings.LLM_PRICE_CACHED_INPUT_PER_MTOK)
+    if cost:
+        LLM_COST_USD.inc(cost, **labels)
+        LLM_PREFIX_CACHE_SAVINGS_USD.inc(max(0.0, usage.cost(*prices) - cost), **labels)
 
-    use_mock = settings.APP_ENV.lower() == "test" or os.getenv("FORCE_MOCK_LLM")
-    llm_client = MockLLM() if use_mock or not settings.OPENAI_API_KEY else ChatGPTLLM()
-    logger.info("Using LLM client: %s", llm_client.__class__.__name__)
-    raw_output = llm_client.generate(system_prompt, user_prompt)
 
-    triage = _parse_llm_output(raw_output, title, body)
-    triage = _apply_vague_guard(triage, title, body)
+def _select_llm_client() -> BaseLLM:
+    llm_client = get_client_registry().llm()
+    logger.info("Using LLM client: %s", llm_client.__class__.__name__)
+    return llm_client
+
+
+def _cache_lookup(
+    llm_client: BaseLLM, criteria: CriteriaSnapshot, title: str, body: str | None
+) -> tuple[str | None, str | None]:
+    cache = get_triage_cache()
+    if cache is None:
+        return None, None
+    model = getattr(llm_client, "model", llm_client.__class__.__name__)
+    key = triage_cache_key(title, body, criteria.version, model, _prompt_template_id())
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info("Triage cache hit; skipping LLM call.")
+    return key, cached
+
+
+def _finalize_triage(
+    raw_output: str, title: str, body: str | None, min_words: int, cache_key: str | None = None
+) -> TriageResult:
+    with span("parse_llm_output"):
+        triage = _parse_llm_output(raw_output, title, body)
+    cache = get_triage_cache()
+    if cache_key and cache is not None and not _is_fallback(triage):
+        cache.set(cache_key, raw_output)
+    triage = _apply_vague_guard(triage, title, body, min_words)
+    TRIAGE_PRIORITY.inc(priority=triage.priority)
     return triage
 
 
+@lru_cache(maxsize=1)
+def _prompt_template_id() -> str:
+    return prompt_template_fingerprint()
+
+
+def _llm_slot() -> asyncio.Semaphore:
+    """Return the per-event-loop semaphore capping in-flight LLM calls at LLM_MAX_CONCURRENCY."""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, get_settings().LLM_MAX_CONCURRENCY))
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
+
 async def execute_actions(
     result: TriageResult,
     repo_full_name: str,
     issue_number: int,
     issue_url: str,
+    installation_id: int | None = None,
+    components: Sequence[str] = (),
 ) -> Dict[str, Any]:
+    """Label and comment on the issue; on-call notifications are aggregated per incident storm.
+
+    `components` are the critical components the issue mentions (see `issue_components`); they key the
+    storm together with the first matched rule; issues naming none are never aggregated. The storm is
+    only updated once the GitHub writes have succeeded, so a failed attempt that is retried still opens
+    the storm and pages.
+    """
     settings = get_settings()
     comment_body = _build_comment_body(result, issue_url)
     label = f"priority:{result.priority.lower()}"
 
     if settings.DRY_RUN:
         logger.info("DRY_RUN enabled; skipping GitHub API calls.")
+        storm = _record_storm(result, repo_full_name, issue_number, issue_url, components)
+        aggregated = storm is not None and not storm.notify
         return {
             "mode": "dry_run",
             "planned": [
                 {"action": "add_label", "label": label, "issue": issue_number, "repo": repo_full_name},
                 {"action": "comment", "body": comment_body},
             ],
-            "notification": "on" if result.notify_on_call else "off",
+            "notification": "aggregated" if aggregated else "on" if result.notify_on_call else "off",
+            **_storm_fields(storm),
         }
 
     if not settings.GITHUB_TOKEN:
         raise ValueError("GITHUB_TOKEN is required when DRY_RUN is False")
 
-    gh = Github(login_or_token=settings.GITHUB_TOKEN, base_url=settings.GITHUB_API_BASE)
-    issue = gh.get_repo(repo_full_name).get_issue(number=issue_number)
-
-    # PyGithub add_to_labels may return None; treat as fire-and-forget and echo the intended label.
-    try:
-        issue.add_to_labels(label)
-    except Exception as exc:  # pragma: no cover - external API path
-        logger.error("Failed to add label via GitHub API: %s", exc)
-        raise
+    gh = get_client_registry().github(settings.GITHUB_API_BASE, settings.GITHUB_TOKEN)
+    # Label and comment are independent writes on the issue; issue them concurrently. Both run to the
+    # end even if one fails, and the comment is skipped when an earlier attempt already posted it.
+    with span("github_actions", repo=repo_full_name, issue_number=issue_number):
+        label_outcome, comment_outcome = await asyncio.gather(
+            gh.add_labels(repo_full_name, issue_number, [label], installation_id),
+            _post_comment_once(gh, repo_full_name, issue_number, comment_body, installation_id),
+            return_exceptions=True,
+        )
+    outcomes = (("label", label_outcome), ("comment", comment_outcome))
+    failures = [(write, outcome) for write, outcome in outcomes if isinstance(outcome, BaseException)]
+    for write, exc in failures:
+        logger.error("Failed to apply triage %s via GitHub API: %s", write, exc)
+    if failures:
+        raise failures[0][1]
+    comment_obj = comment_outcome
     label_resp = {"label": label}
-
-    try:
-        comment_obj = issue.create_comment(comment_body)
-        comment_resp = {"id": comment_obj.id, "url": comment_obj.html_url}
-    except Exception as exc:  # pragma: no cover - external API path
-        logger.error("Failed to create comment via GitHub API: %s", exc)
-        raise
-
-    if result.notify_on_call:
+    comment_resp = {"id": comment_obj.get("id"), "url": comment_obj.get("html_url")}
+    storm = _record_storm(result, repo_full_name, issue_number, issue_url, components)
+    aggregated = storm is not None and not storm.notify
+
+    if aggregated:
+        # The consolidated view (running count and latest issues) is GET /storms.
+        logger.info(
+            "Storm update for on-call: %s#%s joined %s, now %d issues (see /storms).",
+            repo_full_name,
+            issue_number,
+            storm.storm_id,
+            storm.count,
+        )
+    elif result.notify_on_call:
         logger.info("Action required for %s#%s: would notify on-call.", repo_full_name, issue_number)
 
     return {
         "mode": "live",
         "applied_label": label_resp,
         "comment": comment_resp,
-        "notification": "sent" if result.notify_on_call else "skipped",
+        "notification": "aggregated" if aggregated else "sent" if result.notify_on_call else "skipped",
+        **_storm_fields(storm),
     }
 
 
+def issue_components(title: str, body: str | None) -> List[str]:
+    """Critical components from the current criteria that the issue mentions."""
+    content = f"{title or ''} {body or ''}"
+    return current_criteria().matchers.critical_components.matched_keywords(content, CRITICAL_RULE)
+
+
+def _record_storm(
+    result: TriageResult, repo: str, issue_number: int, issue_url: str, components: Sequence[str]
+) -> StormUpdate | None:
+    aggregator = get_storm_aggregator()
+    # Only a named critical component ties issues to one incident; anything else pages on its own.
+    if aggregator is None or not result.notify_on_call or not components:
+        return None
+    rules = [rule for rule in result.matched_rules if not rule.startswith(NEAR_DUPLICATE_RULE)]
+    return aggregator.record(rules[0] if rules else "unspecified", components[0], issue_url or f"{repo}#{issue_number}")
+
+
+def _storm_fields(storm: StormUpdate | None) -> Dict[str, Any]:
+    return {"storm": {"id": storm.storm_id, "count": storm.count}} if storm is not None else {}
+
+
 def _parse_llm_output(raw_output: str, title: str, body: str | None) -> TriageResult:
     cleaned = _strip_code_fences(raw_output)
     try:
         data = json.loads(cleaned)
     except Exception:
         logger.error("Failed to parse LLM output as JSON: %s", raw_output)
+        LLM_FALLBACKS.inc(reason="invalid_json")
         return _fallback_result()
 
     normalized = _normalize_triage_dict(data)
@@ -101,6 +547,7 @@ def _parse_llm_output(raw_output: str, title: str, body: str | None) -> TriageRe
         return TriageResult.model_validate(normalized)
     except ValidationError as exc:
         logger.error("LLM output failed validation: %s", exc)
+        LLM_FALLBACKS.inc(reason="invalid_schema")
         return _fallback_result()
 
 
@@ -146,25 +593,31 @@ def _normalize_triage_dict(data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _apply_vague_guard(result: TriageResult, title: str, body: str | None) -> TriageResult:
+def _apply_vague_guard(
+    result: TriageResult, title: str, body: str | None, min_words: int = DEFAULT_MIN_WORDS
+) -> TriageResult:
     content = f"{title or ''} {body or ''}".strip()
-    word_count = len(content.split())
-    if word_count < 10 or not content:
-        label = "priority:low"
+    word_count = len(content.split(maxsplit=min_words))
+    if word_count < min_words or not content:
+        VAGUE_GUARD_OVERRIDES.inc()
         matched = list(result.matched_rules)
-        if "Rule D: Insufficient Information" not in matched:
-            matched.append("Rule D: Insufficient Information")
-        return TriageResult(
-            priority="LOW",
-            notify_on_call=False,
-            labels=[label],
-            reasoning="Issue too vague to triage confidently; requesting more details.",
-            confidence=min(result.confidence, 0.2),
-            matched_rules=matched,
-        )
+        if RULE_D not in matched:
+            matched.append(RULE_D)
+        return _insufficient_information_result(confidence=min(result.confidence, 0.2), matched_rules=matched)
     return result
 
 
+def _insufficient_information_result(confidence: float, matched_rules: List[str]) -> TriageResult:
+    return TriageResult(
+        priority="LOW",
+        notify_on_call=False,
+        labels=["priority:low"],
+        reasoning="Issue too vague to triage confidently; requesting more details.",
+        confidence=confidence,
+        matched_rules=matched_rules,
+    )
+
+
 def _fallback_result() -> TriageResult:
     return TriageResult(
         priority="LOW",
@@ -172,13 +625,17 @@ def _fallback_result() -> TriageResult:
         labels=["priority:low"],
         reasoning="LLM output invalid; requesting more information.",
         confidence=0.0,
-        matched_rules=["Fallback:InvalidLLMOutput"],
+        matched_rules=[FALLBACK_RULE],
     )
 
 
+def _is_fallback(result: TriageResult) -> bool:
+    return FALLBACK_RULE in result.matched_rules
+
+
 def _build_comment_body(result: TriageResult, issue_url: str) -> str:
     matched_rules = ", ".join(result.matched_rules) if result.matched_rules else "None"
-    return (
+    body = (
         "Automated triage result:\n"
         f"- Priority: {result.priority}\n"
         f"- Confidence: {result.confidence}\n"
@@ -186,3 +643,20 @@ def _build_comment_body(result: TriageResult, issue_url: str) -> str:
         f"- Matched rules: {matched_rules}\n"
         f"- Issue: {issue_url}"
     )
+    # Hidden marker naming this exact comment, so a retried attempt can tell it was already posted.
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+    return f"{body}\n\n{COMMENT_MARKER_PREFIX}{digest} -->"
+
+
+def _comment_marker(comment_body: str) -> str:
+    return comment_body[comment_body.rindex(COMMENT_MARKER_PREFIX):]
+
+
+async def _post_comment_once(
+    gh: GitHubClient, repo: str, issue_number: int, comment_body: str, installation_id: int | None
+) -> Dict[str, Any]:
+    existing = await gh.find_comment(repo, issue_number, _comment_marker(comment_body))
+    if existing is not None:
+        logger.info("%s#%s already carries this triage comment; not posting it again.", repo, issue_number)
+        return existing
+    return await gh.create_comment(repo, issue_number, comment_body, installation_id)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from .agent import decided_by, execute_actions, issue_components, triage_issue, triage_issue_async
+from .classifier import Prediction, get_local_classifier, issue_text
+from .clients import close_client_registry, get_client_registry
+from .config import get_settings
+from .history import record_triage, reset_history_writer
+from .logging_utils import get_logger
+from .schemas import TriageResult
+
+logger = get_logger(__name__)
+
+BACKLOG_MODES = ("async", "process")
+
+# Progress is logged once every this many finished issues.
+_PROGRESS_EVERY = 500
+
+# Issues scored together by the local classifier: one matrix product per batch instead of per issue.
+CLASSIFIER_BATCH = 256
+
+
+@dataclass
+class BacklogIssue:
+    key: str
+    repo: str | None
+    number: int | None
+    title: str
+    body: str
+    url: str | None
+
+
+def read_jsonl_issues(path: Path) -> Iterable[BacklogIssue]:
+    """Stream issues from a JSONL file without loading it into memory."""
+    with path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                yield issue_from_record(json.loads(line), f"line:{line_no}")
+
+
+def issue_from_record(record: Dict[str, Any], fallback_key: str) -> BacklogIssue:
+    repo = record.get("repo")
+    number = record.get("number", record.get("issue_number"))
+    if record.get("id") is not None:
+        key = str(record["id"])
+    elif repo and number is not None:
+        key = f"{repo}#{number}"
+    else:
+        key = fallback_key
+    return BacklogIssue(
+        key=key,
+        repo=repo,
+        number=number,
+        title=record.get("title") or "",
+        body=record.get("body") or record.get("description") or "",
+        url=record.get("url") or record.get("html_url"),
+    )
+
+
+async def github_issues(repo: str) -> AsyncIterator[BacklogIssue]:
+    settings = get_settings()
+    if not settings.GITHUB_TOKEN:
+        raise ValueError("GITHUB_TOKEN is required to list issues from GitHub")
+    gh = get_client_registry().github(settings.GITHUB_API_BASE, settings.GITHUB_TOKEN)
+    async for issue in gh.list_issues(repo):
+        yield BacklogIssue(
+            key=f"{repo}#{issue['number']}",
+            repo=repo,
+            number=issue["number"],
+            title=issue.get("title") or "",
+            body=issue.get("body") or "",
+            url=issue.get("html_url"),
+        )
+
+
+def completed_keys(output: Path) -> Set[str]:
+    """Keys already triaged successfully by an earlier run; the output file is the checkpoint."""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+    with output.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash
+            if record.get("ok"):
+                done.add(record["key"])
+    return done
+
+
+class BacklogRunner:
+    """Triages a stream of issues with bounded concurrency and appends one JSONL record per issue.
+
+    A record is written and flushed as soon as its issue finishes, so after a crash a rerun skips
+    everything already recorded as `ok` and retries the failures.
+    """
+
+    def __init__(self, output: Path, workers: int, mode: str = "async", apply: bool = False):
+        if mode not in BACKLOG_MODES:
+            raise ValueError(f"mode must be one of {BACKLOG_MODES}, got {mode!r}")
+        self.output = output
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.apply = apply
+        self.stats = {"triaged": 0, "skipped": 0, "failed": 0}
+
+    async def run(self, issues: AsyncIterator[BacklogIssue]) -> Dict[str, int]:
+        done = completed_keys(self.output)
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        pool: Optional[Executor] = None
+        if self.mode == "process":
+            pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        # Process workers load their own model; in async mode the whole batch is scored up front.
+        classifier = get_local_classifier() if pool is None else None
+        slots = asyncio.Semaphore(self.workers)
+        tasks: Set[asyncio.Task] = set()
+        started = time.monotonic()
+        try:
+            with self.output.open("a+", encoding="utf-8") as out:
+                _terminate_torn_line(out)
+                async for batch in self._pending(issues, done, CLASSIFIER_BATCH if classifier else 1):
+                    predictions: List[Optional[Prediction]] = [None] * len(batch)
+                    if classifier is not None:
+                        predictions = list(classifier.predict([issue_text(i.title, i.body) for i in batch]))
+                    for issue, prediction in zip(batch, predictions):
+                        await slots.acquire()
+                        task = asyncio.create_task(self._process(issue, prediction, pool, out, slots, started))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                if tasks:
+                    await asyncio.gather(*tasks)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.stats
+
+    async def _pending(
+        self, issues: AsyncIterator[BacklogIssue], done: Set[str], size: int
+    ) -> AsyncIterator[List[BacklogIssue]]:
+        batch: List[BacklogIssue] = []
+        async for issue in issues:
+            if issue.key in done:
+                self.stats["skipped"] += 1
+                continue
+            done.add(issue.key)
+            batch.append(issue)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _process(
+        self,
+        issue: BacklogIssue,
+        prediction: Optional[Prediction],
+        pool: Optional[Executor],
+        out: TextIO,
+        slots: asyncio.Semaphore,
+        started: float,
+    ) -> None:
+        try:
+            record = await self._triage_record(issue, prediction, pool)
+            self.stats["triaged"] += 1
+        except Exception as exc:
+            logger.error("Backlog triage failed for %s: %s", issue.key, exc)
+            record = {"key": issue.key, "ok": False, "error": str(exc)}
+            self.stats["failed"] += 1
+        finally:
+            slots.release()
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+        finished = self.stats["triaged"] + self.stats["failed"]
+        if finished % _PROGRESS_EVERY == 0:
+            elapsed = time.monotonic() - started
+            logger.info("Backlog progress: %s issues in %.1fs (%.1f/s).", finished, elapsed, finished / elapsed)
+
+    async def _triage_record(
+        self, issue: BacklogIssue, prediction: Optional[Prediction], pool: Optional[Executor]
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        if pool is None:
+            result = await triage_issue_async(issue.title, issue.body, issue.repo, issue.url, prediction)
+            stage = decided_by()
+        else:
+            loop = asyncio.get_running_loop()
+            dumped, stage = await loop.run_in_executor(
+                pool, _triage_in_process, issue.title, issue.body, issue.repo, issue.url
+            )
+            result = TriageResult(**dumped)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        record: Dict[str, Any] = {
+            "key": issue.key,
+            "ok": True,
+            "repo": issue.repo,
+            "issue_number": issue.number,
+            "url": issue.url,
+            "triage": result.model_dump(),
+        }
+        if self.apply:
+            if not issue.repo or issue.number is None:
+                raise ValueError("--apply needs repo and issue number for every issue")
+            components = issue_components(issue.title, issue.body) if result.notify_on_call else []
+            record["actions"] = await execute_actions(
+                result, issue.repo, issue.number, issue.url or "", components=components
+            )
+        notification = record["actions"].get("notification") if self.apply else None
+        record_triage(result, issue.repo, issue.number, issue.url, stage, latency_ms, notification, source="backlog")
+        return record
+
+
+def _triage_in_process(title: str, body: str, repo: str | None, url: str | None) -> Tuple[Dict[str, Any], str]:
+    return triage_issue(title, body, repo, url).model_dump(), decided_by()
+
+
+def _terminate_torn_line(out: TextIO) -> None:
+    out.seek(0, 2)
+    if out.tell() == 0:
+        return
+    out.seek(out.tell() - 1)
+    if out.read(1) != "\n":
+        out.write("\n")
+
+
+async def _aiter(items: Iterable[BacklogIssue]) -> AsyncIterator[BacklogIssue]:
+    for item in items:
+        yield item
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, int]:
+    runner = BacklogRunner(args.output, workers=args.workers, mode=args.mode, apply=args.apply)
+    issues = github_issues(args.github_repo) if args.github_repo else _aiter(read_jsonl_issues(args.input))
+    try:
+        return await runner.run(issues)
+    finally:
+        await close_client_registry()
+        await asyncio.to_thread(reset_history_writer)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="triage-backlog",
+        description="Triage an existing issue backlog in parallel, writing one JSONL record per issue.",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", type=Path, help="JSONL file with one issue per line (title, body, repo, number, url).")
+    source.add_argument("--github-repo", help="owner/name; lists open issues through the GitHub API.")
+    parser.add_argument("--output", type=Path, required=True, help="JSONL results; also the resume checkpoint.")
+    parser.add_argument("--workers", type=int, default=8, help="Issues triaged concurrently (default: 8).")
+    parser.add_argument("--mode", choices=BACKLOG_MODES, default="async", help="async tasks or a process pool.")
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Apply labels and comments via execute_actions (honours DRY_RUN; paced by GITHUB_WRITES_PER_MINUTE).",
+    )
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(_run(args))
+    print(json.dumps(stats))
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import get_settings
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Expired rows in the SQLite tier are purged once every this many writes.
+_PURGE_EVERY_WRITES = 256
+
+
+def triage_cache_key(title: str, body: str | None, criteria_version: str, model: str, prompt_template: str) -> str:
+    """Hash the normalized issue text together with everything that shapes the LLM answer.
+
+    `criteria_version` is the content hash of TRIAGE_CRITERIA.md, so any edit invalidates old entries.
+    """
+    parts = [_normalize(title), _normalize(body), criteria_version, model, prompt_template]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _normalize(text: str | None) -> str:
+    return " ".join((text or "").split())
+
+
+class TriageCache:
+    """Bounded in-memory LRU of raw LLM outputs with TTL, optionally backed by SQLite."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS triage_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM triage_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO triage_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._writes += 1
+                if self._writes % _PURGE_EVERY_WRITES == 0:
+                    self._conn.execute("DELETE FROM triage_cache WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache: Optional[TriageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_triage_cache() -> Optional[TriageCache]:
+    """Return the process-wide cache, or None when TRIAGE_CACHE_ENABLED is off."""
+    global _cache
+    settings = get_settings()
+    if not settings.TRIAGE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TriageCache(
+                max_entries=settings.TRIAGE_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.TRIAGE_CACHE_TTL_SECONDS,
+                db_path=settings.TRIAGE_CACHE_DB_PATH,
+            )
+        return _cache
+
+
+def reset_triage_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
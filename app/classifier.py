@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import get_settings
+from .logging_utils import get_logger
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+logger = get_logger(__name__)
+
+MODEL_FORMAT = 1
+DEFAULT_FEATURES = 1 << 12
+DEFAULT_NEIGHBOURS = 5
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+
+# Same word definition as the near-duplicate index: numbers and punctuation only separate words.
+_WORD = re.compile(r"[a-z]{2,}")
+
+
+def _hashed_terms(text: str, features: int) -> Counter:
+    """Feature-hashed counts of the text's words and word pairs."""
+    words = _WORD.findall(text.lower())
+    terms = Counter(zlib.crc32(word.encode()) & (features - 1) for word in words)
+    terms.update(zlib.crc32(f"{a} {b}".encode()) & (features - 1) for a, b in zip(words, words[1:]))
+    return terms
+
+
+def issue_text(title: str, body: Optional[str]) -> str:
+    # The title is repeated so its words weigh more than the same words deep in a pasted log.
+    return f"{title}\n{title}\n{body or ''}"
+
+
+@dataclass(frozen=True)
+class Prediction:
+    priority: str
+    confidence: float
+    neighbour: str
+    similarity: float
+    votes: Dict[str, float]
+    criteria_version: Optional[str] = None
+
+
+class LocalClassifier:
+    """Nearest-neighbour and centroid scoring over hashed TF-IDF vectors of labelled issues.
+
+    The arrays are memory-mapped, so loading is instant and worker processes share the pages. Example
+    vectors are stored feature-major, so scoring reads only the rows of the terms the queries contain. A
+    prediction's confidence is the similarity-weighted vote share of the winning priority among the
+    `neighbours` closest examples, scaled by the closest example's cosine similarity, and halved when
+    the class centroids disagree with the vote. `criteria_version` is the criteria the labels were
+    given under; the agent ignores the model once the criteria change.
+    """
+
+    def __init__(
+        self,
+        idf: Any,
+        example_terms: Any,
+        example_labels: Any,
+        centroids: Any,
+        labels: Sequence[str],
+        example_ids: Sequence[str],
+        neighbours: int = DEFAULT_NEIGHBOURS,
+        criteria_version: Optional[str] = None,
+    ):
+        self.idf = idf
+        self.example_terms = example_terms  # (features, examples)
+        self.example_labels = example_labels
+        self.centroids = centroids
+        self.labels = list(labels)
+        self.example_ids = list(example_ids)
+        self.neighbours = max(1, min(neighbours, len(self.example_ids)))
+        self.features = int(idf.shape[0])
+        self.criteria_version = criteria_version
+
+    @classmethod
+    def load(cls, model_dir: Path) -> "LocalClassifier":
+        meta = json.loads((model_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != MODEL_FORMAT:
+            raise ValueError(f"{model_dir}: unsupported classifier model format {meta.get('format')!r}")
+
+        def array(name: str) -> Any:
+            return np.load(model_dir / f"{name}.npy", mmap_mode="r")
+
+        return cls(
+            idf=array("idf"),
+            example_terms=array("example_terms"),
+            example_labels=array("example_labels"),
+            centroids=array("centroids"),
+            labels=meta["labels"],
+            example_ids=meta["example_ids"],
+            neighbours=meta.get("neighbours", DEFAULT_NEIGHBOURS),
+            criteria_version=meta.get("criteria_version"),
+        )
+
+    def vectorize(self, texts: Sequence[str]) -> Any:
+        """L2-normalised TF-IDF rows, one per text."""
+        return _tfidf_matrix([_hashed_terms(text, self.features) for text in texts], self.idf)
+
+    def predict(self, texts: Sequence[str]) -> List[Prediction]:
+        """Score a batch with two matrix products: against every example and against the centroids."""
+        if not texts:
+            return []
+        queries = self.vectorize(texts)
+        terms = np.flatnonzero(queries.any(axis=0))
+        similarities = queries[:, terms] @ self.example_terms[terms]
+        centroid_votes = (queries @ self.centroids.T).argmax(axis=1)
+        k = self.neighbours
+        nearest = np.argpartition(-similarities, k - 1, axis=1)[:, :k] if k < similarities.shape[1] else None
+        predictions = []
+        for row in range(len(texts)):
+            candidates = nearest[row] if nearest is not None else np.arange(similarities.shape[1])
+            weights = np.maximum(similarities[row, candidates], 0.0)
+            votes = np.bincount(self.example_labels[candidates], weights=weights, minlength=len(self.labels))
+            winner = int(votes.argmax())
+            best = int(candidates[similarities[row, candidates].argmax()])
+            top_similarity = float(similarities[row, best])
+            share = float(votes[winner] / votes.sum()) if votes.sum() > 0 else 0.0
+            confidence = share * max(top_similarity, 0.0)
+            if int(centroid_votes[row]) != winner:
+                confidence /= 2
+            predictions.append(
+                Prediction(
+                    priority=self.labels[winner],
+                    confidence=round(confidence, 4),
+                    neighbour=self.example_ids[best],
+                    similarity=round(top_similarity, 4),
+                    votes={label: round(float(vote), 4) for label, vote in zip(self.labels, votes)},
+                    criteria_version=self.criteria_version,
+                )
+            )
+        return predictions
+
+
+def train(
+    examples: Iterable[Tuple[str, str, str]],
+    model_dir: Path,
+    features: int = DEFAULT_FEATURES,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+    criteria_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fit IDF weights, example vectors and class centroids from (id, text, priority) rows and save them.
+
+    `criteria_version` records which TRIAGE_CRITERIA.md version the priorities follow.
+    """
+    if features & (features - 1):
+        raise ValueError("features must be a power of two")
+    ids: List[str] = []
+    rows: List[Counter] = []
+    priorities: List[str] = []
+    for example_id, text, priority in examples:
+        ids.append(example_id)
+        rows.append(_hashed_terms(text, features))
+        priorities.append(priority.upper())
+    if not ids:
+        raise ValueError("no labelled examples to train on")
+
+    document_frequency = np.zeros(features, dtype=np.float64)
+    for terms in rows:
+        document_frequency[list(terms.keys())] += 1
+    idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    labels = [label for label in PRIORITIES if label in priorities] + sorted(set(priorities) - set(PRIORITIES))
+    vectors = _tfidf_matrix(rows, idf)
+    example_labels = np.array([labels.index(priority) for priority in priorities], dtype=np.int64)
+    centroids = np.stack([vectors[example_labels == index].mean(axis=0) for index in range(len(labels))])
+    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    np.save(model_dir / "idf.npy", idf)
+    np.save(model_dir / "example_terms.npy", np.ascontiguousarray(vectors.T))
+    np.save(model_dir / "example_labels.npy", example_labels)
+    np.save(model_dir / "centroids.npy", centroids.astype(np.float32))
+    meta = {
+        "format": MODEL_FORMAT,
+        "criteria_version": criteria_version,
+        "features": features,
+        "neighbours": max(1, min(neighbours, len(ids))),
+        "labels": labels,
+        "example_ids": ids,
+        "class_counts": {label: priorities.count(label) for label in labels},
+    }
+    (model_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+def _tfidf_matrix(rows: Sequence[Counter], idf: Any) -> Any:
+    matrix = np.zeros((len(rows), idf.shape[0]), dtype=np.float32)
+    for row, terms in enumerate(rows):
+        if not terms:
+            continue
+        columns = np.fromiter(terms.keys(), dtype=np.int64, count=len(terms))
+        counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+        matrix[row, columns] = (1.0 + np.log(counts)) * idf[columns]  # sublinear term frequency
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+_classifier: Optional[LocalClassifier] = None
+_classifier_key: Optional[str] = None
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """Return the memory-mapped model from LOCAL_CLASSIFIER_MODEL_DIR, or None when it is off or unusable."""
+    global _classifier, _classifier_key
+    model_dir = get_settings().LOCAL_CLASSIFIER_MODEL_DIR
+    if not model_dir:
+        return None
+    with _classifier_lock:
+        if _classifier_key != model_dir:
+            _classifier, _classifier_key = _load(Path(model_dir)), model_dir
+        return _classifier
+
+
+def _load(model_dir: Path) -> Optional[LocalClassifier]:
+    if np is None:
+        logger.warning("numpy is not installed; the local classifier tier is disabled.")
+        return None
+    try:
+        classifier = LocalClassifier.load(model_dir)
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("Local classifier model in %s is unusable (%s); the tier is disabled.", model_dir, exc)
+        return None
+    logger.info("Loaded local classifier from %s (%d examples).", model_dir, len(classifier.example_ids))
+    return classifier
+
+
+def reset_local_classifier() -> None:
+    global _classifier, _classifier_key
+    with _classifier_lock:
+        _classifier, _classifier_key = None, None
+
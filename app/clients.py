@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from .config import Settings, get_settings
+from .github_client import GitHubClient
+from .github_ratelimit import GitHubWriteScheduler
+from .llm.base import BaseLLM
+from .llm.batching import BatchingLLM
+from .llm.chatgpt import ChatGPTLLM
+from .llm.mock import MockLLM
+from .llm.router import BackendSpec, CircuitBreaker, LLMRouter, RouteBackend, parse_backend_specs
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClientRegistry:
+    """Process-wide holder of pooled LLM and GitHub clients, reused across requests."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._mock = MockLLM()
+        self._chatgpt: Dict[Tuple[str, str, int], ChatGPTLLM] = {}
+        self._routers: Dict[Tuple, LLMRouter] = {}
+        self._batching: Dict[Tuple[int, float, int, str], BatchingLLM] = {}
+        self._github: Dict[Tuple[str, str], GitHubClient] = {}
+        self._github_scheduler: Optional[GitHubWriteScheduler] = None
+
+    def llm(self) -> BaseLLM:
+        settings = get_settings()
+        backend = self._backend(settings)
+        if not settings.LLM_BATCH_ENABLED:
+            return backend
+        key = (id(backend), settings.LLM_BATCH_WINDOW_MS, settings.LLM_BATCH_MAX_SIZE, settings.LLM_BATCH_MODE)
+        with self._lock:
+            batching = self._batching.get(key)
+            if batching is None:
+                batching = BatchingLLM(
+                    backend,
+                    window_ms=settings.LLM_BATCH_WINDOW_MS,
+                    max_batch_size=settings.LLM_BATCH_MAX_SIZE,
+                    mode=settings.LLM_BATCH_MODE,
+                )
+                self._batching[key] = batching
+            return batching
+
+    def _backend(self, settings: Settings) -> BaseLLM:
+        use_mock = settings.APP_ENV.lower() == "test" or os.getenv("FORCE_MOCK_LLM")
+        if use_mock or not settings.OPENAI_API_KEY:
+            return self._mock
+        if settings.LLM_ROUTER_ENABLED:
+            return self._router(settings)
+        key = (settings.OPENAI_API_KEY, settings.OPENAI_MODEL, settings.LLM_TIMEOUT_SECONDS)
+        with self._lock:
+            client = self._chatgpt.get(key)
+            if client is None:
+                client = _build_chatgpt(settings)
+                self._chatgpt[key] = client
+            return client
+
+    def _router(self, settings: Settings) -> LLMRouter:
+        key = (
+            settings.OPENAI_API_KEY,
+            settings.OPENAI_MODEL,
+            settings.LLM_TIMEOUT_SECONDS,
+            settings.LLM_ROUTER_BACKENDS,
+            settings.LLM_BREAKER_FAILURES,
+            settings.LLM_BREAKER_RESET_SECONDS,
+            settings.LLM_HEDGE_ENABLED,
+            settings.LLM_HEDGE_QUANTILE,
+        )
+        with self._lock:
+            router = self._routers.get(key)
+            if router is None:
+                router = _build_router(settings, self._mock)
+                self._routers[key] = router
+            return router
+
+    def github(self, base_url: str, token: str) -> GitHubClient:
+        key = (base_url, token)
+        with self._lock:
+            client = self._github.get(key)
+            if client is None:
+                settings = get_settings()
+                if self._github_scheduler is None:
+                    self._github_scheduler = _build_github_scheduler(settings)
+                client = _build_github(base_url, token, settings, self._github_scheduler)
+                self._github[key] = client
+            return client
+
+    async def aclose(self) -> None:
+        with self._lock:
+            llm_clients = list(self._chatgpt.values()) + list(self._routers.values())
+            self._routers.clear()
+            github_clients = list(self._github.values())
+            self._chatgpt.clear()
+            self._batching.clear()
+            self._github.clear()
+        for client in llm_clients:
+            await client.aclose()
+        for gh in github_clients:
+            await gh.aclose()
+
+
+def _build_chatgpt(settings: Settings, spec: Optional[BackendSpec] = None) -> ChatGPTLLM:
+    spec = spec or BackendSpec(settings.OPENAI_MODEL, None, float(settings.LLM_TIMEOUT_SECONDS))
+    timeout = spec.timeout_seconds
+    limits = httpx.Limits(
+        max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_POOL_KEEPALIVE_SECONDS,
+    )
+    logger.info("Creating pooled ChatGPT client for %s.", spec.name)
+    return ChatGPTLLM(
+        model=spec.model,
+        timeout_seconds=timeout,
+        base_url=spec.base_url,
+        http_client=httpx.Client(limits=limits, timeout=timeout),
+        async_http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+    )
+
+
+def _build_router(settings: Settings, mock: MockLLM) -> LLMRouter:
+    default_timeout = float(settings.LLM_TIMEOUT_SECONDS)
+    specs = parse_backend_specs(settings.LLM_ROUTER_BACKENDS, settings.OPENAI_MODEL, default_timeout)
+
+    def breaker() -> CircuitBreaker:
+        return CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+
+    backends = [
+        RouteBackend(spec.name, _build_chatgpt(settings, spec), spec.timeout_seconds, breaker()) for spec in specs
+    ]
+    backends.append(RouteBackend("mock", mock, default_timeout, breaker(), last_resort=True))
+    logger.info("LLM router over %s.", " -> ".join(backend.name for backend in backends))
+    return LLMRouter(backends, hedge=settings.LLM_HEDGE_ENABLED, hedge_quantile=settings.LLM_HEDGE_QUANTILE)
+
+
+def _build_github(base_url: str, token: str, settings: Settings, scheduler: GitHubWriteScheduler) -> GitHubClient:
+    limits = httpx.Limits(
+        max_connections=settings.GITHUB_POOL_SIZE,
+        max_keepalive_connections=settings.GITHUB_POOL_SIZE,
+    )
+    http_client = httpx.AsyncClient(limits=limits, timeout=settings.GITHUB_TIMEOUT_SECONDS)
+    return GitHubClient(base_url, token, http_client, scheduler)
+
+
+def _build_github_scheduler(settings: Settings) -> GitHubWriteScheduler:
+    # Shared by every GitHub client so an installation's budget is counted across tokens.
+    return GitHubWriteScheduler(
+        rate_per_minute=settings.GITHUB_WRITES_PER_MINUTE,
+        burst=settings.GITHUB_WRITE_BURST,
+        max_retries=settings.GITHUB_MAX_RETRIES,
+        backoff_seconds=settings.GITHUB_RETRY_BACKOFF_SECONDS,
+        backoff_max_seconds=settings.GITHUB_RETRY_BACKOFF_MAX_SECONDS,
+    )
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
+
+
+async def close_client_registry() -> None:
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        await registry.aclose()
@@ -22,14 +22,106 @@ class Settings(BaseSettings):
     WEBHOOK_SECRET: Optional[str] = None
     ALLOWED_ACTIONS: str = "opened"
     ALLOWED_EVENT: str = "issues"
+    # Larger bodies are rejected with 413; GitHub caps issue bodies at 65536 characters.
+    WEBHOOK_MAX_BODY_BYTES: int = 1_048_576
 
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o-mini"
     LLM_TIMEOUT_SECONDS: int = 20
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_POOL_MAX_CONNECTIONS: int = 100
+    LLM_POOL_MAX_KEEPALIVE: int = 20
+    LLM_POOL_KEEPALIVE_SECONDS: float = 30.0
+    # Ordered failover across OpenAI-compatible backends, with MockLLM as the last resort.
+    LLM_ROUTER_ENABLED: bool = False
+    # Comma-separated "model|base_url|timeout_seconds" entries (base_url and timeout optional);
+    # empty means OPENAI_MODEL on the default endpoint.
+    LLM_ROUTER_BACKENDS: str = ""
+    LLM_BREAKER_FAILURES: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_BATCH_ENABLED: bool = False
+    LLM_BATCH_MODE: str = "prompt"
+    LLM_BATCH_WINDOW_MS: float = 50.0
+    LLM_BATCH_MAX_SIZE: int = 8
+    # Max input tokens (system + user prompt) per LLM call; larger issue bodies are compacted. 0 disables.
+    LLM_INPUT_TOKEN_BUDGET: int = 16000
+    # Send a prompt_cache_key derived from the system prompt so requests share the provider's prefix cache.
+    LLM_PROMPT_CACHE_KEY_ENABLED: bool = True
+    # USD per million tokens, used for cost reporting only. Cached input defaults to the input price.
+    LLM_PRICE_INPUT_PER_MTOK: float = 0.0
+    LLM_PRICE_CACHED_INPUT_PER_MTOK: Optional[float] = None
+    LLM_PRICE_OUTPUT_PER_MTOK: float = 0.0
+
+    CRITERIA_PATH: Optional[str] = None
+    CRITERIA_RELOAD_INTERVAL_SECONDS: float = 2.0
+
+    RULES_FIRST_ENABLED: bool = True
+
+    TRIAGE_CACHE_ENABLED: bool = True
+    TRIAGE_CACHE_MAX_ENTRIES: int = 2048
+    TRIAGE_CACHE_TTL_SECONDS: int = 86400
+    TRIAGE_CACHE_DB_PATH: Optional[str] = None
+
+    # Reuse the result of a recently triaged, nearly identical issue (MinHash similarity) instead of an LLM call.
+    NEAR_DUPLICATE_ENABLED: bool = False
+    NEAR_DUPLICATE_THRESHOLD: float = 0.7
+    NEAR_DUPLICATE_MAX_ENTRIES: int = 20000
+    NEAR_DUPLICATE_WINDOW_SECONDS: int = 21600
+
+    # Local classifier tier (needs numpy): a model trained by scripts/train_classifier.py answers without
+    # the LLM when its confidence reaches LOCAL_CLASSIFIER_THRESHOLD. Unset to disable.
+    LOCAL_CLASSIFIER_MODEL_DIR: Optional[str] = None
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.85
+
+    # Page on-call once per incident storm: notify-worthy results naming the same critical component (and
+    # rule) within STORM_WINDOW_SECONDS of each other are aggregated into the first one's notification.
+    STORM_AGGREGATION_ENABLED: bool = True
+    STORM_WINDOW_SECONDS: int = 900
+    STORM_MAX_ACTIVE: int = 256
+    STORM_MAX_ISSUES: int = 50
 
     DRY_RUN: bool = True
     GITHUB_TOKEN: Optional[str] = None
     GITHUB_API_BASE: str = "https://api.github.com"
+    GITHUB_POOL_SIZE: int = 10
+    GITHUB_TIMEOUT_SECONDS: float = 10.0
+    # GitHub's secondary limits allow ~80 content-creating requests per minute.
+    GITHUB_WRITES_PER_MINUTE: float = 80.0
+    GITHUB_WRITE_BURST: int = 10
+    GITHUB_MAX_RETRIES: int = 4
+    GITHUB_RETRY_BACKOFF_SECONDS: float = 1.0
+    GITHUB_RETRY_BACKOFF_MAX_SECONDS: float = 60.0
+
+    DEDUP_ENABLED: bool = True
+    DEDUP_WINDOW_SECONDS: int = 3600
+    DEDUP_MAX_ENTRIES: int = 10000
+    DEDUP_DB_PATH: Optional[str] = None
+    DEDUP_PENDING_TIMEOUT_SECONDS: int = 120
+
+    # Append-only triage history (SQLite, WAL) behind GET /stats; unset to disable.
+    HISTORY_DB_PATH: Optional[str] = None
+    HISTORY_BATCH_SIZE: int = 500
+    HISTORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    HISTORY_QUEUE_MAX: int = 10000
+
+    WEBHOOK_ASYNC_MODE: bool = False
+    JOB_QUEUE_PATH: str = "var/jobs.sqlite3"
+    JOB_WORKERS: int = 4
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 2.0
+    JOB_BACKOFF_MAX_SECONDS: float = 300.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 300.0
+
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # none | stdout | file | otel (OpenTelemetry API; falls back to stdout when not installed)
+    TRACING_EXPORTER: str = "none"
+    TRACING_FILE_PATH: str = "var/traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0
 
     @property
     def allowed_actions(self) -> set[str]:
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .config import get_settings
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+Response = Dict[str, Any]
+
+
+class DeliveryStore:
+    """Remembers webhook responses per X-GitHub-Delivery ID for a bounded window.
+
+    The in-memory tier serves replays inside one process; the optional SQLite tier shares completed
+    responses and in-progress claims between workers.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        max_entries: int,
+        db_path: Optional[str] = None,
+        pending_timeout_seconds: float = 120.0,
+    ):
+        self.window_seconds = window_seconds
+        self.max_entries = max(1, max_entries)
+        self.pending_timeout_seconds = pending_timeout_seconds
+        self._lock = threading.Lock()
+        self._responses: "OrderedDict[str, Tuple[Response, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                " delivery_id TEXT PRIMARY KEY, response TEXT, stored_at REAL NOT NULL)"
+            )
+
+    def lookup(self, delivery_id: str) -> Optional[Response]:
+        now = time.time()
+        with self._lock:
+            entry = self._responses.get(delivery_id)
+            if entry is not None:
+                if now - entry[1] < self.window_seconds:
+                    return entry[0]
+                del self._responses[delivery_id]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, stored_at FROM deliveries WHERE delivery_id = ? AND response IS NOT NULL",
+                    (delivery_id,),
+                ).fetchone()
+                if row is not None and now - row[1] < self.window_seconds:
+                    response = json.loads(row[0])
+                    self._remember(delivery_id, response, row[1])
+                    return response
+        return None
+
+    def claim(self, delivery_id: str) -> bool:
+        """Mark a delivery as in progress; False means another worker is already handling it."""
+        if self._conn is None:
+            return True
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM deliveries WHERE delivery_id = ? AND response IS NULL AND stored_at < ?",
+                (delivery_id, now - self.pending_timeout_seconds),
+            )
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO deliveries (delivery_id, response, stored_at) VALUES (?, NULL, ?)",
+                (delivery_id, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, delivery_id: str) -> None:
+        """Drop an in-progress claim after a failure so a redelivery can try again."""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM deliveries WHERE delivery_id = ? AND response IS NULL", (delivery_id,))
+
+    def store(self, delivery_id: str, response: Response) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(delivery_id, response, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO deliveries (delivery_id, response, stored_at) VALUES (?, ?, ?)",
+                    (delivery_id, json.dumps(response), now),
+                )
+                self._conn.execute(
+                    "DELETE FROM deliveries WHERE response IS NOT NULL AND stored_at < ?", (now - self.window_seconds,)
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, delivery_id: str, response: Response, stored_at: float) -> None:
+        self._responses[delivery_id] = (response, stored_at)
+        self._responses.move_to_end(delivery_id)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+
+class InFlightCoalescer:
+    """Runs one coroutine per key set; concurrent callers sharing any key await the same result."""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, keys: Iterable[str], factory: Callable[[], Awaitable[Response]]) -> Tuple[Response, bool]:
+        """Return (response, coalesced) where coalesced is True if another caller did the work."""
+        keys = list(keys)
+        for key in keys:
+            future = self._in_flight.get(key)
+            if future is not None:
+                logger.info("Coalescing request into in-flight triage for %s.", key)
+                return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._in_flight[key] = future
+        try:
+            response = await factory()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when no one else was waiting on it.
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response, False
+        finally:
+            for key in keys:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+
+_store: Optional[DeliveryStore] = None
+_coalescer = InFlightCoalescer()
+_store_lock = threading.Lock()
+
+
+def get_delivery_store() -> Optional[DeliveryStore]:
+    """Return the process-wide delivery store, or None when DEDUP_ENABLED is off."""
+    global _store
+    settings = get_settings()
+    if not settings.DEDUP_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = DeliveryStore(
+                window_seconds=settings.DEDUP_WINDOW_SECONDS,
+                max_entries=settings.DEDUP_MAX_ENTRIES,
+                db_path=settings.DEDUP_DB_PATH,
+                pending_timeout_seconds=settings.DEDUP_PENDING_TIMEOUT_SECONDS,
+            )
+        return _store
+
+
+def get_coalescer() -> InFlightCoalescer:
+    return _coalescer
+
+
+def reset_delivery_store() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .agent import triage_issue_async
+from .llm.usage import LLMUsage, track_usage
+
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+
+_CHUNK_SIZE = 1 << 16
+
+
+def iter_dataset(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream cases from a `.jsonl` file or a JSON array without holding the whole file in memory."""
+    if path.suffix == ".jsonl":
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    yield from _iter_json_array(path)
+
+
+def _iter_json_array(path: Path) -> Iterator[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as f:
+        buffer, pos, started, eof = "", 0, False, False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path} must hold a JSON array of cases or be a .jsonl file")
+                    started, pos = True, pos + 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                if buffer[pos] != "{":
+                    raise ValueError(f"{path}: dataset items must be JSON objects")
+                try:
+                    case, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield case
+                    continue
+            elif eof:
+                if started:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                return
+            chunk = f.read(_CHUNK_SIZE)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class EvalReport:
+    """Aggregates streamed case results; only per-case latencies are kept in memory."""
+
+    input_price_per_mtok: float = 0.0
+    output_price_per_mtok: float = 0.0
+    cached_input_price_per_mtok: Optional[float] = None
+    cases: int = 0
+    passed: int = 0
+    confusion: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    latencies: List[float] = field(default_factory=list)
+    llm_latencies: List[float] = field(default_factory=list)
+    usage: LLMUsage = field(default_factory=LLMUsage)
+    wall_seconds: float = 0.0
+
+    def add(self, record: Dict[str, Any], usage: LLMUsage) -> None:
+        self.cases += 1
+        self.passed += record["pass"]
+        self.confusion[record["expected"]][record["predicted"]] += 1
+        self.latencies.append(record["latency_ms"])
+        if usage.calls:
+            self.llm_latencies.append(usage.seconds * 1000)
+        self.usage.add(usage)
+
+    @property
+    def accuracy(self) -> float:
+        return self.passed / self.cases if self.cases else 0.0
+
+    def class_metrics(self) -> Dict[str, Dict[str, float]]:
+        labels = sorted(set(PRIORITIES) | set(self.confusion), key=_priority_order)
+        metrics = {}
+        for label in labels:
+            true_positive = self.confusion[label][label]
+            predicted = sum(row[label] for row in self.confusion.values())
+            actual = sum(self.confusion[label].values())
+            metrics[label] = {
+                "precision": true_positive / predicted if predicted else 0.0,
+                "recall": true_positive / actual if actual else 0.0,
+                "support": actual,
+            }
+        return metrics
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        llm_latencies = sorted(self.llm_latencies)
+        cases = self.cases or 1
+        prices = (self.input_price_per_mtok, self.output_price_per_mtok)
+        cost = self.usage.cost(*prices, self.cached_input_price_per_mtok)
+        full_price = self.usage.cost(*prices)
+        return {
+            "cases": self.cases,
+            "accuracy": self.accuracy,
+            "wall_seconds": self.wall_seconds,
+            "latency_ms": {f"p{q}": percentile(latencies, q) for q in (50, 95, 99)},
+            "llm_latency_ms": {f"p{q}": percentile(llm_latencies, q) for q in (50, 95, 99)},
+            "llm_calls_per_case": self.usage.calls / cases,
+            "tokens_per_case": {
+                "prompt": self.usage.prompt_tokens / cases,
+                "completion": self.usage.completion_tokens / cases,
+                "cached": self.usage.cached_tokens / cases,
+            },
+            "cached_prompt_ratio": self.usage.cached_ratio,
+            "cost_usd": cost,
+            "prefix_cache_savings_usd": max(0.0, full_price - cost),
+            "per_class": self.class_metrics(),
+            "confusion": {expected: dict(row) for expected, row in self.confusion.items()},
+        }
+
+
+def _priority_order(label: str) -> tuple:
+    return (PRIORITIES.index(label) if label in PRIORITIES else len(PRIORITIES), label)
+
+
+async def run_eval(
+    cases: Iterable[Dict[str, Any]],
+    concurrency: int,
+    out: Optional[TextIO] = None,
+    report: Optional[EvalReport] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> EvalReport:
+    """Triage cases with at most `concurrency` in flight, streaming one JSON record per case to `out`."""
+    report = report or EvalReport()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    tasks: set = set()
+    started = time.perf_counter()
+
+    async def evaluate(case: Dict[str, Any]) -> None:
+        try:
+            with track_usage() as usage:
+                case_started = time.perf_counter()
+                predicted = await triage_issue_async(case["title"], case.get("description"), repo=None, url=None)
+                latency_ms = (time.perf_counter() - case_started) * 1000
+        finally:
+            slots.release()
+        record = {
+            "id": case.get("id"),
+            "expected": case["expected_priority"],
+            "predicted": predicted.priority,
+            "pass": case["expected_priority"] == predicted.priority,
+            "matched_rules": predicted.matched_rules,
+            "latency_ms": round(latency_ms, 3),
+            "llm_calls": usage.calls,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        }
+        report.add(record, usage)
+        if out is not None:
+            out.write(json.dumps(record) + "\n")
+        if on_result is not None:
+            on_result(record)
+
+    for case in cases:
+        await slots.acquire()
+        task = asyncio.create_task(evaluate(case))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    report.wall_seconds = time.perf_counter() - started
+    return report
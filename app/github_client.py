@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from .github_ratelimit import GitHubWriteScheduler
+from .logging_utils import get_logger
+from .metrics import GITHUB_API_SECONDS
+from .tracing import set_span_attributes, span
+
+logger = get_logger(__name__)
+
+GITHUB_API_VERSION = "2022-11-28"
+
+
+class GitHubAPIError(RuntimeError):
+    """A GitHub REST call returned a non-success status."""
+
+    def __init__(self, method: str, path: str, status_code: int, message: str):
+        super().__init__(f"GitHub {method} {path} failed with {status_code}: {message}")
+        self.status_code = status_code
+
+
+class GitHubClient:
+    """Async GitHub REST client for the triage write endpoints, on one pooled HTTP client.
+
+    Writes go straight to the issue sub-resources by repo name and number, so no repo or issue
+    lookup precedes them. With a scheduler, every write is paced by the token's bucket and, when
+    the webhook came from a GitHub App, by the installation's bucket too.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        http_client: httpx.AsyncClient,
+        scheduler: Optional[GitHubWriteScheduler] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._token = token
+        self._token_key = "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
+        self._http = http_client
+        self._scheduler = scheduler
+
+    async def add_labels(
+        self, repo_full_name: str, issue_number: int, labels: List[str], installation_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        path = f"/repos/{repo_full_name}/issues/{issue_number}/labels"
+        return await self._request("add_labels", "POST", path, {"labels": labels}, installation_id)
+
+    async def create_comment(
+        self, repo_full_name: str, issue_number: int, body: str, installation_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        path = f"/repos/{repo_full_name}/issues/{issue_number}/comments"
+        return await self._request("create_comment", "POST", path, {"body": body}, installation_id)
+
+    async def find_comment(
+        self, repo_full_name: str, issue_number: int, marker: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return the first comment on the issue whose body contains `marker`, or None."""
+        path = f"/repos/{repo_full_name}/issues/{issue_number}/comments"
+        async for comment in self._paginate("list_comments", path, {"per_page": 100}):
+            if marker in (comment.get("body") or ""):
+                return comment
+        return None
+
+    async def list_issues(
+        self, repo_full_name: str, state: str = "open", per_page: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the repo's issues page by page; pull requests are skipped."""
+        params = {"state": state, "per_page": per_page}
+        async for issue in self._paginate("list_issues", f"/repos/{repo_full_name}/issues", params):
+            if "pull_request" not in issue:
+                yield issue
+
+    async def _paginate(self, call: str, path: str, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """GET a list endpoint page by page, following `Link: rel="next"`."""
+        url: Optional[str] = f"{self.base_url}{path}"
+        query: Optional[Dict[str, Any]] = params
+        while url:
+            started = time.perf_counter()
+            response = await self._http.get(url, params=query, headers=self._headers())
+            GITHUB_API_SECONDS.observe(time.perf_counter() - started, call=call, status=str(response.status_code))
+            if response.status_code >= 400:
+                raise GitHubAPIError("GET", url, response.status_code, _error_message(response))
+            for item in response.json():
+                yield item
+            url = response.links.get("next", {}).get("url")
+            query = None  # the next link already carries the query string
+
+    async def _request(
+        self, call: str, method: str, path: str, payload: Dict[str, Any], installation_id: Optional[int] = None
+    ) -> Any:
+        async def send() -> httpx.Response:
+            started = time.perf_counter()
+            url = f"{self.base_url}{path}"
+            response = await self._http.request(method, url, json=payload, headers=self._headers())
+            GITHUB_API_SECONDS.observe(time.perf_counter() - started, call=call, status=str(response.status_code))
+            set_span_attributes(status=response.status_code)
+            return response
+
+        with span(f"github.{call}", installation_id=installation_id):
+            if self._scheduler is None:
+                response = await send()
+            else:
+                keys = [self._token_key]
+                if installation_id is not None:
+                    keys.append(f"installation:{installation_id}")
+                response = await self._scheduler.submit(keys, send)
+        if response.status_code >= 400:
+            raise GitHubAPIError(method, path, response.status_code, _error_message(response))
+        return response.json() if response.content else None
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self._token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": GITHUB_API_VERSION,
+        }
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return str(response.json().get("message", response.text))
+    except Exception:
+        return response.text
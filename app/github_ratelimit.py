@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+import httpx
+
+from .logging_utils import get_logger
+from .metrics import GITHUB_WRITE_QUEUE_DEPTH, GITHUB_WRITE_RETRIES, GITHUB_WRITE_WAIT_SECONDS, GITHUB_WRITES
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking.
+
+    `reserve` always takes a token, letting the balance go negative, and returns how long the
+    caller must wait for it. Callers therefore drain in arrival order at `rate` per second without
+    any loop-bound lock. GitHub rate-limit headers can slow the rate down or pause the bucket.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.max_rate = rate_per_second
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause_for(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, remaining: Optional[int], reset_in: Optional[float]) -> None:
+        """Spread the remaining primary quota evenly over the time left in GitHub's window."""
+        if remaining is None or reset_in is None:
+            return
+        if remaining <= 0:
+            self.pause_for(reset_in)
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, max(remaining / max(reset_in, 1.0), 0.01))
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class GitHubWriteScheduler:
+    """Rate-limits GitHub writes per token and per App installation, retrying rate-limit rejections.
+
+    Each write waits for a token from every bucket it belongs to. Responses feed
+    `X-RateLimit-Remaining`/`X-RateLimit-Reset` and `Retry-After` back into those buckets. A 429, or a
+    403 that GitHub marks as rate limiting, is retried with jittered exponential backoff. Other
+    errors are returned to the caller untouched, because replaying a comment GitHub may already
+    have created is not safe.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        max_retries: int,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+    ):
+        self.rate_per_second = max(rate_per_minute, 1e-3) / 60.0
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_second, self.burst)
+                self._buckets[key] = bucket
+            return bucket
+
+    async def submit(self, keys: Sequence[str], send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        buckets = [self.bucket(key) for key in keys]
+        attempt = 0
+        while True:
+            await self._acquire(buckets)
+            response = await send()
+            GITHUB_WRITES.inc(status=str(response.status_code))
+            self._observe(buckets, response)
+            if not is_rate_limited(response) or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            delay = self.retry_delay(response, attempt)
+            GITHUB_WRITE_RETRIES.inc()
+            logger.warning(
+                "GitHub rate limit hit (%s); retry %s/%s in %.1fs.",
+                response.status_code,
+                attempt,
+                self.max_retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    def retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        backoff = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** max(0, attempt - 1)))
+        backoff *= random.uniform(0.5, 1.0)
+        return max(backoff, _retry_after(response) or 0.0)
+
+    async def _acquire(self, buckets: Sequence[TokenBucket]) -> None:
+        wait = max((bucket.reserve() for bucket in buckets), default=0.0)
+        if wait <= 0:
+            return
+        GITHUB_WRITE_QUEUE_DEPTH.inc()
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            GITHUB_WRITE_QUEUE_DEPTH.dec()
+            GITHUB_WRITE_WAIT_SECONDS.inc(wait)
+
+    def _observe(self, buckets: Sequence[TokenBucket], response: httpx.Response) -> None:
+        remaining = _int_header(response, "X-RateLimit-Remaining")
+        reset_at = _int_header(response, "X-RateLimit-Reset")
+        reset_in = max(0.0, reset_at - time.time()) if reset_at is not None else None
+        retry_after = _retry_after(response)
+        for bucket in buckets:
+            bucket.observe(remaining, reset_in)
+            if retry_after:
+                bucket.pause_for(retry_after)
+
+
+def is_rate_limited(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    if response.headers.get("Retry-After") or response.headers.get("X-RateLimit-Remaining") == "0":
+        return True
+    return "rate limit" in response.text.lower()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _int_header(response: httpx.Response, name: str) -> Optional[int]:
+    value = response.headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
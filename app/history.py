@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config import get_settings
+from .logging_utils import get_logger
+from .metrics import HISTORY_BATCH_SECONDS, HISTORY_QUEUE_DEPTH, HISTORY_RECORDS
+from .schemas import TriageResult
+
+logger = get_logger(__name__)
+
+# Upper bounds (ms) of the triage latency buckets kept per repository; the last bucket is unbounded.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+STATS_PERCENTILES = (50, 95, 99)
+
+# Aggregate rows use '' for records without a repository, since NULLs never collide in a primary key.
+_NO_REPO = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS triage_history (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    repo TEXT,
+    issue_number INTEGER,
+    url TEXT,
+    priority TEXT NOT NULL,
+    notify_on_call INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    decided_by TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    notification TEXT,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS triage_history_issue ON triage_history (repo, issue_number, recorded_at);
+CREATE INDEX IF NOT EXISTS triage_history_recorded_at ON triage_history (recorded_at);
+CREATE INDEX IF NOT EXISTS triage_history_priority ON triage_history (priority, recorded_at);
+CREATE TABLE IF NOT EXISTS stats_decisions (
+    repo TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    decided_by TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (repo, priority, decided_by)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats_daily (
+    day TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, priority)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats_latency (
+    repo TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum_ms REAL NOT NULL,
+    PRIMARY KEY (repo, bucket)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class HistoryRecord:
+    recorded_at: float
+    repo: Optional[str]
+    issue_number: Optional[int]
+    url: Optional[str]
+    priority: str
+    notify_on_call: bool
+    confidence: float
+    decided_by: str
+    latency_ms: float
+    notification: Optional[str] = None
+    source: str = "webhook"
+
+
+def latency_bucket(latency_ms: float) -> int:
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def bucket_percentile(counts: Sequence[int], q: float) -> Optional[float]:
+    """Estimate a percentile from bucket counts, interpolating linearly inside the bucket that holds it."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q / 100 * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if index == len(LATENCY_BUCKETS_MS):
+                return float(LATENCY_BUCKETS_MS[-1])  # the unbounded bucket has no upper edge to interpolate to
+            lower = LATENCY_BUCKETS_MS[index - 1] if index else 0.0
+            upper = LATENCY_BUCKETS_MS[index]
+            return round(lower + (upper - lower) * (rank - seen) / count, 1)
+        seen += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+class HistoryStore:
+    """Append-only SQLite (WAL) log of triage decisions plus incrementally maintained aggregate tables.
+
+    Each batch is inserted and folded into the aggregates in one transaction, so `stats()` reads a few
+    small tables whose size depends on the number of repositories, priorities and days, never on the
+    number of decisions recorded.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def write_batch(self, records: Sequence[HistoryRecord]) -> None:
+        if not records:
+            return
+        decisions: Counter = Counter()
+        daily: Counter = Counter()
+        latency_counts: Counter = Counter()
+        latency_sums: Counter = Counter()
+        for record in records:
+            repo = record.repo or _NO_REPO
+            decisions[(repo, record.priority, record.decided_by)] += 1
+            daily[(time.strftime("%Y-%m-%d", time.gmtime(record.recorded_at)), record.priority)] += 1
+            bucket = (repo, latency_bucket(record.latency_ms))
+            latency_counts[bucket] += 1
+            latency_sums[bucket] += record.latency_ms
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO triage_history (recorded_at, repo, issue_number, url, priority, notify_on_call,"
+                    " confidence, decided_by, latency_ms, notification, source)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r.recorded_at,
+                            r.repo,
+                            r.issue_number,
+                            r.url,
+                            r.priority,
+                            int(r.notify_on_call),
+                            r.confidence,
+                            r.decided_by,
+                            r.latency_ms,
+                            r.notification,
+                            r.source,
+                        )
+                        for r in records
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT INTO stats_decisions (repo, priority, decided_by, count) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (repo, priority, decided_by) DO UPDATE SET count = count + excluded.count",
+                    [(*key, count) for key, count in decisions.items()],
+                )
+                self._conn.executemany(
+                    "INSERT INTO stats_daily (day, priority, count) VALUES (?, ?, ?)"
+                    " ON CONFLICT (day, priority) DO UPDATE SET count = count + excluded.count",
+                    [(*key, count) for key, count in daily.items()],
+                )
+                self._conn.executemany(
+                    "INSERT INTO stats_latency (repo, bucket, count, sum_ms) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (repo, bucket) DO UPDATE SET"
+                    " count = count + excluded.count, sum_ms = sum_ms + excluded.sum_ms",
+                    [(*key, count, latency_sums[key]) for key, count in latency_counts.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self, repo: Optional[str] = None, days: int = 14) -> Dict[str, Any]:
+        """Priority mix, decision sources, fallback rate and latency percentiles, overall and per repository."""
+        where, params = ("WHERE repo = ?", (repo or _NO_REPO,)) if repo is not None else ("", ())
+        since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - max(0, days - 1) * 86400))
+        with self._lock:
+            decisions = self._conn.execute(
+                f"SELECT repo, priority, decided_by, count FROM stats_decisions {where}", params
+            ).fetchall()
+            latency = self._conn.execute(
+                f"SELECT repo, bucket, count, sum_ms FROM stats_latency {where}", params
+            ).fetchall()
+            daily = self._conn.execute(
+                "SELECT day, priority, count FROM stats_daily WHERE day >= ? ORDER BY day", (since,)
+            ).fetchall()
+
+        overall = _Summary()
+        repos: Dict[str, _Summary] = defaultdict(_Summary)
+        for repo_name, priority, stage, count in decisions:
+            overall.add_decisions(priority, stage, count)
+            repos[repo_name].add_decisions(priority, stage, count)
+        for repo_name, bucket, count, sum_ms in latency:
+            overall.add_latency(bucket, count, sum_ms)
+            repos[repo_name].add_latency(bucket, count, sum_ms)
+
+        trend: Dict[str, Dict[str, int]] = {}
+        for day, priority, count in daily:
+            trend.setdefault(day, {})[priority] = count
+        result = overall.to_dict()
+        result["repos"] = {name: summary.to_dict() for name, summary in sorted(repos.items())}
+        if repo is None:
+            result["daily"] = [{"day": day, "priorities": counts} for day, counts in trend.items()]
+        return result
+
+    def issue_history(self, repo: str, issue_number: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Past decisions for one issue, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recorded_at, priority, notify_on_call, confidence, decided_by, latency_ms, notification, source"
+                " FROM triage_history WHERE repo = ? AND issue_number = ? ORDER BY recorded_at DESC LIMIT ?",
+                (repo, issue_number, limit),
+            ).fetchall()
+        return [
+            {
+                "recorded_at": row[0],
+                "priority": row[1],
+                "notify_on_call": bool(row[2]),
+                "confidence": row[3],
+                "decided_by": row[4],
+                "latency_ms": row[5],
+                "notification": row[6],
+                "source": row[7],
+            }
+            for row in rows
+        ]
+
+
+class _Summary:
+    def __init__(self) -> None:
+        self.total = 0
+        self.priorities: Counter = Counter()
+        self.decided_by: Counter = Counter()
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum_ms = 0.0
+
+    def add_decisions(self, priority: str, stage: str, count: int) -> None:
+        self.total += count
+        self.priorities[priority] += count
+        self.decided_by[stage] += count
+
+    def add_latency(self, bucket: int, count: int, sum_ms: float) -> None:
+        self.latency_counts[min(bucket, len(LATENCY_BUCKETS_MS))] += count
+        self.latency_sum_ms += sum_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        timed = sum(self.latency_counts)
+        latency: Dict[str, Any] = {f"p{q}": bucket_percentile(self.latency_counts, q) for q in STATS_PERCENTILES}
+        latency["mean"] = round(self.latency_sum_ms / timed, 1) if timed else None
+        llm_calls = self.decided_by["llm"] + self.decided_by["fallback"]
+        return {
+            "total": self.total,
+            "priorities": dict(self.priorities),
+            "decided_by": dict(self.decided_by),
+            "fallback_rate": round(self.decided_by["fallback"] / self.total, 4) if self.total else 0.0,
+            "llm_call_rate": round(llm_calls / self.total, 4) if self.total else 0.0,
+            "latency_ms": latency,
+        }
+
+
+class HistoryWriter:
+    """Background thread that drains a bounded queue into `HistoryStore.write_batch`.
+
+    `submit` never blocks the request path: when the queue is full (the disk cannot keep up) the record is
+    dropped and counted. The thread writes whatever has queued up, up to `batch_size` records per
+    transaction, and waits at most `flush_interval_seconds` for more once the queue runs dry.
+    """
+
+    def __init__(self, store: HistoryStore, batch_size: int, flush_interval_seconds: float, max_queue: int):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue: "queue.Queue[HistoryRecord | threading.Event | None]" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: HistoryRecord) -> bool:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            HISTORY_RECORDS.inc(outcome="dropped")
+            return False
+        HISTORY_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far is committed; returns False on timeout."""
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self.store.close()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[HistoryRecord] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[HistoryRecord]) -> None:
+        HISTORY_QUEUE_DEPTH.set(self._queue.qsize())
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            self.store.write_batch(batch)
+        except Exception as exc:
+            logger.error("Failed to write %d triage history record(s): %s", len(batch), exc)
+            HISTORY_RECORDS.inc(len(batch), outcome="failed")
+            return
+        HISTORY_BATCH_SECONDS.observe(time.perf_counter() - started)
+        HISTORY_RECORDS.inc(len(batch), outcome="written")
+
+
+_writer: Optional[HistoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_history_writer() -> Optional[HistoryWriter]:
+    """Return the process-wide history writer, or None when HISTORY_DB_PATH is unset."""
+    global _writer
+    settings = get_settings()
+    if not settings.HISTORY_DB_PATH:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = HistoryWriter(
+                HistoryStore(settings.HISTORY_DB_PATH),
+                batch_size=settings.HISTORY_BATCH_SIZE,
+                flush_interval_seconds=settings.HISTORY_FLUSH_INTERVAL_SECONDS,
+                max_queue=settings.HISTORY_QUEUE_MAX,
+            )
+        return _writer
+
+
+def record_triage(
+    result: TriageResult,
+    repo: Optional[str],
+    issue_number: Optional[int],
+    url: Optional[str],
+    decided_by: str,
+    latency_ms: float,
+    notification: Optional[str] = None,
+    source: str = "webhook",
+) -> None:
+    """Queue one triage decision for the history store; a no-op when history is disabled."""
+    writer = get_history_writer()
+    if writer is None:
+        return
+    writer.submit(
+        HistoryRecord(
+            recorded_at=time.time(),
+            repo=repo,
+            issue_number=issue_number,
+            url=url,
+            priority=result.priority,
+            notify_on_call=result.notify_on_call,
+            confidence=result.confidence,
+            decided_by=decided_by,
+            latency_ms=round(latency_ms, 3),
+            notification=notification,
+            source=source,
+        )
+    )
+
+
+def reset_history_writer() -> None:
+    """Flush and close the writer; the next `get_history_writer()` opens a fresh one."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
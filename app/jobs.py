@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    delivery_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at REAL NOT NULL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    worker_id TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_run_at);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    delivery_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+# Queue files created before leases existed get the lease columns added on open.
+_LEASE_COLUMNS = {"worker_id": "TEXT", "lease_expires_at": "REAL"}
+
+# A job still claimed by this worker: running, leased to it, and not re-claimed since.
+_OWNED_CLAIM = "delivery_id = ? AND status = 'running' AND worker_id = ? AND attempts = ?"
+
+
+class JobLeaseLostError(RuntimeError):
+    """The job is no longer leased to this worker: its lease lapsed and another claim took it over."""
+
+    def __init__(self, delivery_id: str):
+        super().__init__(f"Job {delivery_id} is no longer leased to this worker")
+        self.delivery_id = delivery_id
+
+
+@dataclass
+class Job:
+    delivery_id: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class JobQueue:
+    """SQLite-backed durable queue of triage jobs keyed by GitHub delivery ID.
+
+    Several processes may share one queue file. A claim stamps the job with this queue's `worker_id`
+    and a lease that the owner keeps renewing; only the owner, or anyone once the lease has expired,
+    may put a running job back in the queue. Finishing a job (`complete`, `fail`) requires still
+    holding its claim and raises `JobLeaseLostError` otherwise.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300.0, worker_id: Optional[str] = None):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in _LEASE_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires_at)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, delivery_id: str, payload: Dict[str, Any]) -> bool:
+        """Persist a new job; returns False when the delivery is already known."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (delivery_id, payload, status, attempts, next_run_at, created_at, updated_at)"
+                " VALUES (?, ?, 'queued', 0, ?, ?, ?)",
+                (delivery_id, json.dumps(payload), now, now, now),
+            )
+            return cursor.rowcount == 1
+
+    def claim(self) -> Optional[Job]:
+        """Atomically lease the oldest ready job, or a running one whose lease expired, and return it."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?, lease_expires_at = ?,"
+                " updated_at = ?"
+                " WHERE delivery_id = ("
+                "   SELECT delivery_id FROM jobs"
+                "   WHERE (status = 'queued' AND next_run_at <= ?)"
+                "      OR (status = 'running' AND COALESCE(lease_expires_at, 0) <= ?)"
+                "   ORDER BY next_run_at LIMIT 1"
+                " ) RETURNING delivery_id, payload, attempts",
+                (self.worker_id, now + self.lease_seconds, now, now, now),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(delivery_id=row[0], payload=json.loads(row[1]), attempts=row[2])
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> None:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, last_error = NULL, worker_id = NULL,"
+                f" lease_expires_at = NULL, updated_at = ? WHERE {_OWNED_CLAIM}",
+                (json.dumps(result), time.time(), *self._claim_params(job)),
+            )
+            if cursor.rowcount == 0:
+                raise JobLeaseLostError(job.delivery_id)
+
+    def fail(self, job: Job, error: str, max_attempts: int, retry_delay: float) -> bool:
+        """Record a failed attempt; returns True when the job was moved to the dead-letter table."""
+        now = time.time()
+        with self._lock:
+            if job.attempts >= max_attempts:
+                self._conn.execute("BEGIN")
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'dead', last_error = ?, worker_id = NULL, lease_expires_at = NULL,"
+                    f" updated_at = ? WHERE {_OWNED_CLAIM}",
+                    (error, now, *self._claim_params(job)),
+                )
+                if cursor.rowcount == 0:
+                    self._conn.execute("ROLLBACK")
+                    raise JobLeaseLostError(job.delivery_id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dead_letter (delivery_id, payload, attempts, last_error, failed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (job.delivery_id, json.dumps(job.payload), job.attempts, error, now),
+                )
+                self._conn.execute("COMMIT")
+                return True
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', last_error = ?, next_run_at = ?, worker_id = NULL,"
+                f" lease_expires_at = NULL, updated_at = ? WHERE {_OWNED_CLAIM}",
+                (error, now + retry_delay, now, *self._claim_params(job)),
+            )
+            if cursor.rowcount == 0:
+                raise JobLeaseLostError(job.delivery_id)
+            return False
+
+    def _claim_params(self, job: Job) -> Tuple[str, str, int]:
+        return (job.delivery_id, self.worker_id, job.attempts)
+
+    def renew_leases(self) -> int:
+        """Extend the lease of every job this worker is running."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE status = 'running' AND worker_id = ?",
+                (now + self.lease_seconds, self.worker_id),
+            )
+            return cursor.rowcount
+
+    def requeue_owned(self) -> int:
+        """Return this worker's running jobs to the queue (on shutdown)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, updated_at = ?"
+                " WHERE status = 'running' AND worker_id = ?",
+                (time.time(), self.worker_id),
+            )
+            return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """Return running jobs whose owner stopped renewing their lease (crashed or killed) to the queue."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, updated_at = ?"
+                " WHERE status = 'running' AND COALESCE(lease_expires_at, 0) <= ?",
+                (now, now),
+            )
+            return cursor.rowcount
+
+    def get(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT delivery_id, status, attempts, last_error, result, created_at, updated_at"
+                " FROM jobs WHERE delivery_id = ?",
+                (delivery_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "delivery_id": row[0],
+            "status": row[1],
+            "attempts": row[2],
+            "last_error": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT delivery_id, attempts, last_error, failed_at FROM dead_letter ORDER BY failed_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"delivery_id": row[0], "attempts": row[1], "last_error": row[2], "failed_at": row[3]} for row in rows
+        ]
+
+
+class JobWorkerPool:
+    """In-process asyncio workers draining a JobQueue with retries and exponential backoff."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+        poll_interval_seconds: float,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        # Only jobs whose lease lapsed: other processes sharing the queue file may be running theirs.
+        recovered = await asyncio.to_thread(self.queue.requeue_expired)
+        if recovered:
+            logger.info("Re-queued %s job(s) whose worker stopped renewing its lease.", recovered)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._renew_leases()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # This worker's jobs cancelled mid-flight go back to the queue for the next start.
+        await asyncio.to_thread(self.queue.requeue_owned)
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.queue.renew_leases)
+            except sqlite3.Error as exc:
+                logger.warning("Failed to renew job leases: %s", exc)
+
+    async def _worker(self, index: int) -> None:
+        assert self._wakeup is not None
+        while True:
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(index, job)
+            except JobLeaseLostError as exc:
+                # Another worker took the job over after this one's lease lapsed; its outcome wins.
+                logger.warning("%s; dropping this attempt's outcome.", exc)
+
+    async def _run(self, index: int, job: Job) -> None:
+        try:
+            result = await self.handler(job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            dead = await asyncio.to_thread(
+                self.queue.fail, job, error, self.max_attempts, self.retry_delay(job.attempts)
+            )
+            if dead:
+                logger.error("Job %s moved to dead-letter after %s attempts: %s", job.delivery_id, job.attempts, exc)
+            else:
+                logger.warning("Job %s attempt %s failed; will retry: %s", job.delivery_id, job.attempts, exc)
+            return
+
+        await asyncio.to_thread(self.queue.complete, job, result)
+        logger.info("Worker %s completed job %s.", index, job.delivery_id)
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+
 
 class BaseLLM:
     """Interface for LLM backends."""
 
     def generate(self, system_prompt: str, user_prompt: str) -> str:  # pragma: no cover - interface
         raise NotImplementedError
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        """Async variant of `generate`; backends without a native client run the sync call in a thread."""
+        return await asyncio.to_thread(self.generate, system_prompt, user_prompt)
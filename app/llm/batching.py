@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from ..logging_utils import get_logger
+from .base import BaseLLM
+from .router import mark_served_by_last_resort, served_by_last_resort
+from .usage import LLMUsage, current_usage, track_usage
+
+logger = get_logger(__name__)
+
+BATCH_ISSUE_HEADER = "### Issue "
+
+BATCH_INSTRUCTIONS = (
+    "You will receive several independent issues, each introduced by a '### Issue <index>' header.\n"
+    "Triage every issue separately using the rules above.\n"
+    'Return a single JSON object of the form {"results": [...]} containing one triage object per issue, '
+    'in the same order, each with an extra integer field "index" matching its header.'
+)
+
+BATCH_MODES = ("prompt", "parallel")
+
+
+def build_batch_prompts(system_prompt: str, user_prompts: List[str]) -> tuple[str, str]:
+    """Combine several single-issue prompts into one multi-issue request."""
+    batch_system = f"{system_prompt}\n\n{BATCH_INSTRUCTIONS}"
+    batch_user = "\n\n".join(f"{BATCH_ISSUE_HEADER}{index}\n{prompt}" for index, prompt in enumerate(user_prompts))
+    return batch_system, batch_user
+
+
+def split_batch_prompt(user_prompt: str) -> List[str]:
+    """Inverse of `build_batch_prompts` for the user prompt; used by deterministic backends."""
+    sections = user_prompt.split(BATCH_ISSUE_HEADER)
+    prompts = []
+    for section in sections[1:]:
+        _, _, prompt = section.partition("\n")
+        prompts.append(prompt.strip())
+    return prompts
+
+
+def split_batch_output(raw_output: str, size: int) -> List[str] | None:
+    """Split a multi-issue answer into per-issue JSON strings.
+
+    Returns None when the response as a whole is unusable. Individual items that are missing or malformed
+    come back as "" so only those issues take the invalid-output fallback.
+    """
+    text = raw_output.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:]
+    try:
+        data = json.loads(text)
+    except Exception:
+        return None
+
+    items = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None
+
+    outputs = [""] * size
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", position)
+        if isinstance(index, int) and 0 <= index < size and not outputs[index]:
+            outputs[index] = json.dumps(item)
+    return outputs
+
+
+@dataclass
+class _Pending:
+    system_prompt: str
+    user_prompt: str
+    future: asyncio.Future
+    usage: LLMUsage | None = None
+    last_resort: bool = False
+
+
+@dataclass
+class _LoopState:
+    pending: List[_Pending] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+    tasks: set = field(default_factory=set)
+
+
+class BatchingLLM(BaseLLM):
+    """Collects concurrent `agenerate` calls over a short window and sends them to the backend together.
+
+    `prompt` mode sends one multi-issue prompt per system prompt (the static prefix is paid once);
+    `parallel` mode fires the individual requests together over the backend's shared connection pool.
+    """
+
+    def __init__(self, backend: BaseLLM, window_ms: float, max_batch_size: int, mode: str = "prompt"):
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unsupported LLM batch mode: {mode}")
+        self.backend = backend
+        self.model = getattr(backend, "model", backend.__class__.__name__)
+        self.window_seconds = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.mode = mode
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        return self.backend.generate(system_prompt, user_prompt)
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+
+        item = _Pending(system_prompt, user_prompt, loop.create_future(), current_usage())
+        state.pending.append(item)
+        if len(state.pending) >= self.max_batch_size:
+            self._flush(state)
+        elif state.timer is None:
+            state.timer = loop.call_later(self.window_seconds, self._flush, state)
+        output = await item.future
+        # The router flagged the dispatch task's context; hand the flag back to the caller's.
+        mark_served_by_last_resort(item.last_resort)
+        return output
+
+    def _flush(self, state: _LoopState) -> None:
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        batch, state.pending = state.pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        state.tasks.add(task)
+        task.add_done_callback(state.tasks.discard)
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        groups: Dict[str, List[_Pending]] = {}
+        for item in batch:
+            groups.setdefault(item.system_prompt, []).append(item)
+        await asyncio.gather(*(self._dispatch_group(system_prompt, items) for system_prompt, items in groups.items()))
+
+    async def _dispatch_group(self, system_prompt: str, items: List[_Pending]) -> None:
+        try:
+            if self.mode == "parallel" or len(items) == 1:
+                outputs = await self._run_individually(system_prompt, items)
+            else:
+                outputs = await self._run_combined(system_prompt, items)
+        except Exception as exc:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        for item, output in zip(items, outputs):
+            if not item.future.done():
+                item.future.set_result(output)
+
+    async def _run_individually(self, system_prompt: str, items: List[_Pending]) -> List[str]:
+        return list(await asyncio.gather(*(self._run_one(system_prompt, item) for item in items)))
+
+    async def _run_one(self, system_prompt: str, item: _Pending) -> str:
+        # The flush task runs outside the caller's context; attribute usage back to the caller.
+        mark_served_by_last_resort(False)
+        with track_usage(item.usage if item.usage is not None else LLMUsage()):
+            output = await self.backend.agenerate(system_prompt, item.user_prompt)
+        item.last_resort = served_by_last_resort()
+        return output
+
+    async def _run_combined(self, system_prompt: str, items: List[_Pending]) -> List[str]:
+        batch_system, batch_user = build_batch_prompts(system_prompt, [item.user_prompt for item in items])
+        mark_served_by_last_resort(False)
+        with track_usage() as batch_usage:
+            raw_output = await self.backend.agenerate(batch_system, batch_user)
+        last_resort = served_by_last_resort()
+        for item in items:
+            item.last_resort = last_resort
+            if item.usage is not None:
+                item.usage.add(batch_usage, share=1 / len(items))
+        outputs = split_batch_output(raw_output, len(items))
+        if outputs is None:
+            logger.warning("Batched LLM response for %s issues was unusable; retrying individually.", len(items))
+            return await self._run_individually(system_prompt, items)
+        logger.debug("Triaged %s issues in one batched LLM call.", len(items))
+        return outputs
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from ..config import get_settings
 from ..logging_utils import get_logger
+from ..prompt_builder import prompt_prefix_key
 from .base import BaseLLM
+from .usage import record_response_usage
 
 logger = get_logger(__name__)
 
@@ -12,28 +15,75 @@ logger = get_logger(__name__)
 class ChatGPTLLM(BaseLLM):
     """ChatGPT client using the official openai package."""
 
-    def __init__(self, api_key: str | None = None, model: str | None = None, timeout_seconds: int | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        timeout_seconds: float | None = None,
+        base_url: str | None = None,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+    ):
         settings = get_settings()
         self.api_key = api_key or settings.OPENAI_API_KEY
         self.model = model or settings.OPENAI_MODEL
         self.timeout = float(timeout_seconds or settings.LLM_TIMEOUT_SECONDS)
-        self._client = OpenAI(api_key=self.api_key, timeout=self.timeout) if self.api_key else None
+        self.prompt_cache_key = settings.LLM_PROMPT_CACHE_KEY_ENABLED
+        self._client = (
+            OpenAI(api_key=self.api_key, base_url=base_url, timeout=self.timeout, http_client=http_client)
+            if self.api_key
+            else None
+        )
+        self._async_client = (
+            AsyncOpenAI(api_key=self.api_key, base_url=base_url, timeout=self.timeout, http_client=async_http_client)
+            if self.api_key
+            else None
+        )
 
     def generate(self, system_prompt: str, user_prompt: str) -> str:
         if not self._client:
             raise ValueError("OPENAI_API_KEY is required to use ChatGPTLLM")
 
         try:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0,
+            response = self._client.chat.completions.create(**self._request_kwargs(system_prompt, user_prompt))
+            record_response_usage(response)
+            return (response.choices[0].message.content or "").strip()
+        except Exception as exc:  # pragma: no cover - network path
+            logger.error("ChatGPT API call failed: %s", exc)
+            return ""
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        if not self._async_client:
+            raise ValueError("OPENAI_API_KEY is required to use ChatGPTLLM")
+
+        try:
+            response = await self._async_client.chat.completions.create(
+                **self._request_kwargs(system_prompt, user_prompt)
             )
+            record_response_usage(response)
             return (response.choices[0].message.content or "").strip()
         except Exception as exc:  # pragma: no cover - network path
             logger.error("ChatGPT API call failed: %s", exc)
             return ""
+
+    async def aclose(self) -> None:
+        if self._client:
+            self._client.close()
+        if self._async_client:
+            await self._async_client.close()
+
+    def _request_kwargs(self, system_prompt: str, user_prompt: str) -> dict:
+        # The system prompt is the byte-stable prefix; keep it first so the provider can reuse its cache.
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0,
+        }
+        if self.prompt_cache_key:
+            # Requests sharing a key are routed to the same prompt-cache shard.
+            kwargs["extra_body"] = {"prompt_cache_key": f"triage-{prompt_prefix_key(system_prompt)}"}
+        return kwargs
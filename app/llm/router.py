@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from ..logging_utils import get_logger
+from ..metrics import LLM_BREAKER_OPEN, LLM_HEDGES, LLM_ROUTE_ATTEMPTS
+from ..tracing import span
+from .base import BaseLLM
+
+logger = get_logger(__name__)
+
+# Hedging waits for this many successful calls before trusting a backend's latency quantile.
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 256
+
+_served_by_last_resort: ContextVar[bool] = ContextVar("llm_served_by_last_resort", default=False)
+
+
+def served_by_last_resort() -> bool:
+    """True when the latest routed call in this context was answered by a last-resort backend."""
+    return _served_by_last_resort.get()
+
+
+def mark_served_by_last_resort(value: bool) -> None:
+    """Set the flag in the current context; for wrappers that run the router in a task of their own."""
+    _served_by_last_resort.set(value)
+
+
+@dataclass(frozen=True)
+class BackendSpec:
+    model: str
+    base_url: Optional[str]
+    timeout_seconds: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{urlparse(self.base_url).netloc or self.base_url}" if self.base_url else self.model
+
+
+def parse_backend_specs(text: str, default_model: str, default_timeout: float) -> List[BackendSpec]:
+    """Parse LLM_ROUTER_BACKENDS: comma-separated `model|base_url|timeout_seconds`, trailing fields optional."""
+    specs = []
+    for entry in text.split(","):
+        if not entry.strip():
+            continue
+        model, base_url, timeout = (entry.split("|") + ["", ""])[:3]
+        if not model.strip():
+            raise ValueError(f"LLM_ROUTER_BACKENDS entry without a model: {entry!r}")
+        timeout_seconds = float(timeout) if timeout.strip() else default_timeout
+        specs.append(BackendSpec(model.strip(), base_url.strip() or None, timeout_seconds))
+    return specs or [BackendSpec(default_model, None, default_timeout)]
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls for `reset_seconds`.
+
+    After that one probe call is let through (half-open): success closes the breaker, failure opens it
+    again for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._clock() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def admit(self) -> Optional[str]:
+        """Like `allow`, but says how the call got through: "closed", or "probe" when it holds the half-open probe."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or self._clock() - self._opened_at < self.reset_seconds:
+                return None
+            self._probing = True
+            return "probe"
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe whose call was abandoned without an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures, self._opened_at, self._probing = 0, None, False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True when this failure opened the breaker."""
+        with self._lock:
+            self._failures += 1
+            was_closed = self._opened_at is None
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at, self._probing = self._clock(), False
+                return was_closed
+            return False
+
+
+@dataclass
+class RouteBackend:
+    """One entry of the router's ordered backend list."""
+
+    name: str
+    llm: BaseLLM
+    timeout_seconds: float
+    breaker: CircuitBreaker
+    last_resort: bool = False
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+class LLMRouter(BaseLLM):
+    """Routes each call over an ordered list of backends, failing over on errors, timeouts and empty answers.
+
+    Backends whose circuit breaker is open are skipped. Last-resort backends (the deterministic MockLLM)
+    are only used once every other backend has failed or is open, and are never hedged to. With hedging
+    on, a call still unanswered after the backend's `hedge_quantile` latency fires a second request at the
+    next available backend (or the same one when it is the only one and its breaker is closed), and the
+    first answer wins.
+    """
+
+    def __init__(self, backends: Sequence[RouteBackend], hedge: bool = False, hedge_quantile: float = 0.95):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends: List[RouteBackend] = list(backends)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.model = self.backends[0].name
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        # Synchronous callers get ordered failover only; timeouts are the backends' own client timeouts.
+        _served_by_last_resort.set(False)
+        for backend in self._ordered():
+            if self._admit(backend) is None:
+                continue
+            started = time.perf_counter()
+            try:
+                output = backend.llm.generate(system_prompt, user_prompt)
+            except Exception as exc:
+                self._record(backend, "error", started, exc)
+                continue
+            if self._accept(backend, output, started):
+                _served_by_last_resort.set(backend.last_resort)
+                return output
+        return ""
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        _served_by_last_resort.set(False)
+        tried: List[RouteBackend] = []
+        for backend in self._ordered():
+            if any(backend is other for other in tried):
+                continue
+            admission = self._admit(backend)
+            if admission is None:
+                continue
+            tried.append(backend)
+            output, winner = await self._race(backend, admission == "probe", tried, system_prompt, user_prompt)
+            if output:
+                # Set here, in the caller's context; the attempts themselves run in child tasks.
+                _served_by_last_resort.set(winner.last_resort)
+                return output
+        return ""
+
+    def _ordered(self) -> List[RouteBackend]:
+        regular = [backend for backend in self.backends if not backend.last_resort]
+        return regular + [backend for backend in self.backends if backend.last_resort]
+
+    def _admit(self, backend: RouteBackend) -> Optional[str]:
+        # Breakers are consulted only right before a call, so a half-open probe is never wasted.
+        if backend.last_resort:
+            return "closed"
+        admission = backend.breaker.admit()
+        if admission is None:
+            LLM_ROUTE_ATTEMPTS.inc(backend=backend.name, outcome="skipped_open")
+        return admission
+
+    def _hedge_target(self, backend: RouteBackend, tried: List[RouteBackend]) -> Optional[Tuple[RouteBackend, bool]]:
+        """The backend to hedge to and whether that attempt holds its half-open probe; None to not hedge."""
+        for other in self._ordered():
+            if other.last_resort or any(other is seen for seen in tried):
+                continue
+            admission = other.breaker.admit()
+            if admission is not None:
+                tried.append(other)
+                return other, admission == "probe"
+        # A second call to the same backend is only safe while its breaker is fully closed.
+        return (backend, False) if backend.breaker.state == "closed" else None
+
+    async def _race(
+        self, backend: RouteBackend, probe: bool, tried: List[RouteBackend], system_prompt: str, user_prompt: str
+    ) -> Tuple[str, RouteBackend]:
+        first = asyncio.create_task(self._attempt(backend, system_prompt, user_prompt))
+        owners = {first: backend}
+        probes = {first: probe}
+        pending = {first}
+        try:
+            delay = None
+            if self.hedge and not backend.last_resort:
+                delay = backend.latency_quantile(self.hedge_quantile)
+            if delay is not None and delay < backend.timeout_seconds:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                target = None if done else self._hedge_target(backend, tried)
+                if target is not None:
+                    hedge_to, hedge_probe = target
+                    LLM_HEDGES.inc(backend=hedge_to.name)
+                    logger.info("Hedging LLM call from %s to %s after %.3fs.", backend.name, hedge_to.name, delay)
+                    hedge = asyncio.create_task(self._attempt(hedge_to, system_prompt, user_prompt))
+                    owners[hedge], probes[hedge] = hedge_to, hedge_probe
+                    pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    output = task.result()
+                    if output:
+                        return output, owners[task]
+            return "", backend
+        finally:
+            for task in pending:
+                # Lost the race; says nothing about the backend's health. Only the probe holder gives it back.
+                task.cancel()
+                if probes[task]:
+                    owners[task].breaker.release_probe()
+                LLM_ROUTE_ATTEMPTS.inc(backend=owners[task].name, outcome="cancelled")
+
+    async def _attempt(self, backend: RouteBackend, system_prompt: str, user_prompt: str) -> str:
+        started = time.perf_counter()
+        try:
+            with span("llm.attempt", backend=backend.name):
+                output = await asyncio.wait_for(
+                    backend.llm.agenerate(system_prompt, user_prompt), backend.timeout_seconds
+                )
+        except asyncio.TimeoutError:
+            self._record(backend, "timeout", started)
+            return ""
+        except Exception as exc:
+            self._record(backend, "error", started, exc)
+            return ""
+        return output if self._accept(backend, output, started) else ""
+
+    def _accept(self, backend: RouteBackend, output: str, started: float) -> bool:
+        if not output.strip():
+            self._record(backend, "empty", started)
+            return False
+        backend.latencies.append(time.perf_counter() - started)
+        backend.breaker.record_success()
+        LLM_BREAKER_OPEN.set(0, backend=backend.name)
+        LLM_ROUTE_ATTEMPTS.inc(backend=backend.name, outcome="ok")
+        if backend.last_resort:
+            logger.warning("All preferred LLM backends failed; answered by last resort %s.", backend.name)
+        return True
+
+    def _record(self, backend: RouteBackend, outcome: str, started: float, exc: Optional[BaseException] = None) -> None:
+        LLM_ROUTE_ATTEMPTS.inc(backend=backend.name, outcome=outcome)
+        elapsed = time.perf_counter() - started
+        logger.warning("LLM backend %s failed (%s after %.3fs): %s", backend.name, outcome, elapsed, exc or "")
+        if backend.breaker.record_failure():
+            LLM_BREAKER_OPEN.set(1, backend=backend.name)
+            logger.error("Circuit breaker opened for LLM backend %s.", backend.name)
+
+    async def aclose(self) -> None:
+        for backend in self.backends:
+            close = getattr(backend.llm, "aclose", None)
+            if close is not None:
+                await close()
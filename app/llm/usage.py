@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+
+@dataclass
+class LLMUsage:
+    """LLM calls, tokens and time attributed to one unit of work (usually one triaged issue).
+
+    Values are floats because a batched call is split evenly across the issues it carried.
+    """
+
+    calls: float = 0.0
+    prompt_tokens: float = 0.0
+    completion_tokens: float = 0.0
+    cached_tokens: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def total_tokens(self) -> float:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "LLMUsage", share: float = 1.0) -> None:
+        self.calls += other.calls * share
+        self.prompt_tokens += other.prompt_tokens * share
+        self.completion_tokens += other.completion_tokens * share
+        self.cached_tokens += other.cached_tokens * share
+        self.seconds += other.seconds * share
+
+    @property
+    def cached_ratio(self) -> float:
+        """Share of prompt tokens served from the provider's prefix cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def cost(
+        self,
+        input_price_per_mtok: float,
+        output_price_per_mtok: float,
+        cached_input_price_per_mtok: Optional[float] = None,
+    ) -> float:
+        cached_price = input_price_per_mtok if cached_input_price_per_mtok is None else cached_input_price_per_mtok
+        uncached = self.prompt_tokens - self.cached_tokens
+        return (
+            uncached * input_price_per_mtok
+            + self.cached_tokens * cached_price
+            + self.completion_tokens * output_price_per_mtok
+        ) / 1_000_000
+
+
+_current: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+
+def current_usage() -> Optional[LLMUsage]:
+    return _current.get()
+
+
+@contextmanager
+def track_usage(usage: Optional[LLMUsage] = None) -> Iterator[LLMUsage]:
+    """Attribute LLM usage in this context (and tasks or threads started from it) to `usage`."""
+    usage = usage if usage is not None else LLMUsage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed_llm_call() -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        usage = _current.get()
+        if usage is not None:
+            usage.calls += 1
+            usage.seconds += time.perf_counter() - started
+
+
+def record_tokens(prompt_tokens: float = 0, completion_tokens: float = 0, cached_tokens: float = 0) -> None:
+    usage = _current.get()
+    if usage is not None:
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+        usage.cached_tokens += cached_tokens
+
+
+def record_response_usage(response: Any) -> None:
+    """Record the `usage` block of an OpenAI chat completion, if present."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    record_tokens(
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+    )
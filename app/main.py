@@ -1,31 +1,167 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from .agent import execute_actions, triage_issue
+from .agent import decided_by, execute_actions, issue_components, triage_issue_async
+from .clients import close_client_registry, get_client_registry
 from .config import get_settings
+from .dedup import get_coalescer, get_delivery_store
+from .history import get_history_writer, record_triage, reset_history_writer
+from .jobs import JobQueue, JobWorkerPool
 from .logging_utils import get_logger
-from .webhook_security import is_allowed_action, verify_signature
+from .metrics import SIGNATURE_SECONDS, WEBHOOK_REQUESTS, WEBHOOK_SECONDS, get_multiprocess_metrics, render_metrics
+from .storms import get_storm_aggregator
+from .tracing import current_traceparent, reset_tracer, set_span_attributes, span
+from .triage_criteria import current_criteria
+from .webhook_ingest import InvalidPayload, PayloadTooLarge, extract_issue_payload, loads, payload_action, read_body
+from .webhook_security import is_allowed_action, signature_matches
 
 logger = get_logger(__name__)
-app = FastAPI(title="issue-triager")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    get_client_registry()
+    multiprocess_metrics = get_multiprocess_metrics()
+    if multiprocess_metrics is not None:
+        multiprocess_metrics.start()
+    app.state.job_queue = None
+    app.state.job_pool = None
+    if settings.WEBHOOK_ASYNC_MODE:
+        queue = JobQueue(settings.JOB_QUEUE_PATH, lease_seconds=settings.JOB_LEASE_SECONDS)
+        pool = JobWorkerPool(
+            queue,
+            run_triage_job,
+            concurrency=settings.JOB_WORKERS,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            backoff_seconds=settings.JOB_BACKOFF_SECONDS,
+            backoff_max_seconds=settings.JOB_BACKOFF_MAX_SECONDS,
+            poll_interval_seconds=settings.JOB_POLL_INTERVAL_SECONDS,
+        )
+        await pool.start()
+        app.state.job_queue = queue
+        app.state.job_pool = pool
+        logger.info("Async webhook mode enabled with %s worker(s).", settings.JOB_WORKERS)
+    try:
+        yield
+    finally:
+        if app.state.job_pool is not None:
+            await app.state.job_pool.stop()
+            app.state.job_queue.close()
+        await close_client_registry()
+        await asyncio.to_thread(reset_history_writer)
+        if multiprocess_metrics is not None:
+            multiprocess_metrics.stop()
+        reset_tracer()
+
+
+app = FastAPI(title="issue-triager", lifespan=lifespan)
 
 
 @app.get("/health")
 async def health() -> dict:
-    return {"ok": True}
+    try:
+        criteria_version = current_criteria().version
+    except FileNotFoundError:
+        criteria_version = None
+    return {"ok": True, "criteria_version": criteria_version}
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/storms")
+async def storms() -> dict:
+    aggregator = get_storm_aggregator()
+    if aggregator is None:
+        raise HTTPException(status_code=404, detail="Storm aggregation is not enabled")
+    return aggregator.snapshot()
+
+
+@app.get("/stats")
+async def stats(repo: str | None = None, days: int = 14) -> dict:
+    writer = get_history_writer()
+    if writer is None:
+        raise HTTPException(status_code=404, detail="Triage history is not enabled")
+    return await asyncio.to_thread(writer.store.stats, repo, days)
+
+
+@app.get("/history/{owner}/{name}/{issue_number}")
+async def issue_history(owner: str, name: str, issue_number: int) -> dict:
+    writer = get_history_writer()
+    if writer is None:
+        raise HTTPException(status_code=404, detail="Triage history is not enabled")
+    repo = f"{owner}/{name}"
+    decisions = await asyncio.to_thread(writer.store.issue_history, repo, issue_number)
+    return {"repo": repo, "issue_number": issue_number, "decisions": decisions}
 
 
 @app.post("/webhook/github")
-async def github_webhook(request: Request) -> dict:
+async def github_webhook(request: Request) -> Any:
+    started = time.perf_counter()
+    outcome = "error"
+    with span(
+        "webhook",
+        traceparent=request.headers.get("traceparent"),
+        delivery_id=request.headers.get("X-GitHub-Delivery"),
+        event=request.headers.get("X-GitHub-Event"),
+    ) as root:
+        try:
+            response = await _handle_webhook(request)
+            outcome = _webhook_outcome(response)
+            return response
+        except HTTPException as exc:
+            outcome = {400: "bad_request", 401: "invalid_signature", 413: "too_large"}.get(exc.status_code, "error")
+            raise
+        finally:
+            action = getattr(request.state, "webhook_action", None) or "unknown"
+            root.set_attributes(action=action, outcome=outcome)
+            WEBHOOK_REQUESTS.inc(action=action, outcome=outcome)
+            WEBHOOK_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+
+def _webhook_outcome(response: Any) -> str:
+    body = json.loads(response.body) if isinstance(response, JSONResponse) else response
+    if body.get("queued"):
+        return "duplicate" if body.get("duplicate") else "queued"
+    for flag in ("ignored", "replayed", "in_progress", "coalesced"):
+        if body.get(flag):
+            return flag
+    return "triaged"
+
+
+async def _handle_webhook(request: Request) -> Any:
     settings = get_settings()
-    raw_body = await request.body()
+    try:
+        with span("read_body") as read_span:
+            received = await read_body(
+                request.stream(),
+                settings.WEBHOOK_MAX_BODY_BYTES,
+                settings.WEBHOOK_SECRET,
+                request.headers.get("Content-Length"),
+            )
+            read_span.set_attributes(bytes=len(received.raw))
+    except PayloadTooLarge as exc:
+        logger.warning("Rejecting webhook body: %s", exc)
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
 
-    signature = request.headers.get("X-Hub-Signature-256")
-    if settings.WEBHOOK_SECRET:
-        if not signature or not verify_signature(raw_body, settings.WEBHOOK_SECRET, signature):
+    if received.digest is not None:
+        # The HMAC was computed while the body streamed in; only the comparison is left.
+        started = time.perf_counter()
+        valid = signature_matches(received.digest, request.headers.get("X-Hub-Signature-256"))
+        SIGNATURE_SECONDS.observe(received.hash_seconds + time.perf_counter() - started)
+        if not valid:
             logger.warning("Signature verification failed.")
             raise HTTPException(status_code=401, detail="Invalid signature")
     else:
@@ -36,35 +172,159 @@ async def github_webhook(request: Request) -> dict:
         raise HTTPException(status_code=400, detail=f"Unsupported event: {event}")
 
     try:
-        payload = await request.json()
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {exc}") from exc
+        with span("parse_json", bytes=len(received.raw)):
+            data = loads(received.raw)
+    except InvalidPayload as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    action = payload.get("action")
+    action = payload_action(data)
+    request.state.webhook_action = action
     if not action:
         raise HTTPException(status_code=400, detail="Missing action")
     if not is_allowed_action(action, settings.allowed_actions):
         logger.info("Ignoring GitHub issues action '%s'", action)
         return {"ok": True, "ignored": True, "event": event, "action": action}
 
-    repo = (payload.get("repository") or {}).get("full_name")
-    issue = payload.get("issue") or {}
-    issue_number = issue.get("number")
-    title = issue.get("title")
-    body = issue.get("body") or ""
-    issue_url = issue.get("html_url") or ""
+    try:
+        payload = extract_issue_payload(data)
+    except InvalidPayload as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    repo, issue = payload.repository.full_name, payload.issue
+    set_span_attributes(repo=repo, issue_number=issue.number)
 
-    if not repo or issue_number is None or not title:
-        raise HTTPException(status_code=400, detail="Missing required issue fields")
+    job = {
+        "repo": repo,
+        "issue_number": issue.number,
+        "title": issue.title,
+        "body": issue.body or "",
+        "issue_url": issue.html_url or "",
+    }
+    if payload.installation is not None:
+        job["installation_id"] = payload.installation.id
 
-    triage_result = triage_issue(title, body, repo, issue_url)
-    actions = await execute_actions(triage_result, repo, issue_number, issue_url)
+    if settings.WEBHOOK_ASYNC_MODE:
+        delivery_id = request.headers.get("X-GitHub-Delivery") or uuid.uuid4().hex
+        # The worker continues this trace from the stored context.
+        job["delivery_id"] = delivery_id
+        traceparent = current_traceparent()
+        if traceparent:
+            job["traceparent"] = traceparent
+        return await _enqueue_job(request, delivery_id, job)
+
+    return await _triage_delivery(request.headers.get("X-GitHub-Delivery"), job)
+
+
+@app.get("/jobs/{delivery_id}")
+async def job_status(delivery_id: str, request: Request) -> dict:
+    queue: JobQueue | None = getattr(request.app.state, "job_queue", None)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Async webhook mode is not enabled")
+    job = await asyncio.to_thread(queue.get, delivery_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown delivery: {delivery_id}")
+    return job
+
+
+async def run_triage_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Triage one issue and apply actions; concurrent jobs for the same issue share one run."""
+    response, _ = await get_coalescer().run([_issue_key(job)], lambda: _run_triage_job(job))
+    return response
+
+
+async def _run_triage_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    settings = get_settings()
+    with span(
+        "triage_job",
+        traceparent=job.get("traceparent"),
+        delivery_id=job.get("delivery_id"),
+        repo=job["repo"],
+        issue_number=job["issue_number"],
+    ) as job_span:
+        started = time.perf_counter()
+        triage_result = await triage_issue_async(job["title"], job["body"], job["repo"], job["issue_url"])
+        latency_ms = (time.perf_counter() - started) * 1000
+        stage = decided_by()
+        job_span.set_attributes(priority=triage_result.priority)
+        components = issue_components(job["title"], job["body"]) if triage_result.notify_on_call else []
+        actions = await execute_actions(
+            triage_result,
+            job["repo"],
+            job["issue_number"],
+            job["issue_url"],
+            job.get("installation_id"),
+            components=components,
+        )
+    record_triage(
+        triage_result,
+        job["repo"],
+        job["issue_number"],
+        job["issue_url"],
+        decided_by=stage,
+        latency_ms=latency_ms,
+        notification=actions.get("notification"),
+    )
 
     return {
         "ok": True,
-        "repo": repo,
-        "issue_number": issue_number,
+        "repo": job["repo"],
+        "issue_number": job["issue_number"],
         "triage": triage_result.model_dump(),
         "dry_run": settings.DRY_RUN,
         "actions": actions,
     }
+
+
+async def _triage_delivery(delivery_id: str | None, job: Dict[str, Any]) -> Any:
+    store = get_delivery_store()
+    if not delivery_id or store is None:
+        return await run_triage_job(job)
+
+    stored = await asyncio.to_thread(store.lookup, delivery_id)
+    if stored is not None:
+        logger.info("Replaying stored response for delivery %s.", delivery_id)
+        return {**stored, "replayed": True}
+
+    keys = [f"delivery:{delivery_id}", _issue_key(job)]
+    claimed = await asyncio.to_thread(store.claim, delivery_id)
+    if not claimed:
+        logger.info("Delivery %s is being handled by another worker.", delivery_id)
+        return JSONResponse(
+            status_code=202,
+            content={"ok": True, "in_progress": True, "delivery_id": delivery_id},
+        )
+
+    try:
+        response, coalesced = await get_coalescer().run(keys, lambda: _run_triage_job(job))
+    except Exception:
+        await asyncio.to_thread(store.release, delivery_id)
+        raise
+    await asyncio.to_thread(store.store, delivery_id, response)
+    return {**response, "coalesced": True} if coalesced else response
+
+
+def _issue_key(job: Dict[str, Any]) -> str:
+    return f"issue:{job['repo']}#{job['issue_number']}"
+
+
+async def _enqueue_job(request: Request, delivery_id: str, job: Dict[str, Any]) -> JSONResponse:
+    queue: JobQueue | None = getattr(request.app.state, "job_queue", None)
+    pool: JobWorkerPool | None = getattr(request.app.state, "job_pool", None)
+    if queue is None or pool is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+
+    created = await asyncio.to_thread(queue.enqueue, delivery_id, job)
+    if created:
+        pool.notify()
+    else:
+        logger.info("Delivery %s already queued; not enqueuing again.", delivery_id)
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "ok": True,
+            "queued": True,
+            "duplicate": not created,
+            "delivery_id": delivery_id,
+            "status_url": f"/jobs/{delivery_id}",
+        },
+    )
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from .config import get_settings
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond stages up to slow LLM calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+
+class Counter:
+    """Monotonic counter with optional labels, rendered in the Prometheus text format."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return self.render_values(self.export())
+
+    def render_values(self, values: Dict[LabelValues, Any]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+    def export(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            return {key: _copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def merge(left: Any, right: Any) -> Any:
+        return left + right
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Gauge(Counter):
+    """Value that can go up and down, such as a queue depth."""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    """Bucketed distribution; each label set keeps per-bucket counts plus the running sum."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts, the +Inf bucket, then the sum.
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[:-1]) if state else 0.0
+
+    def sum(self, **labels: str) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0.0
+
+    def value(self, **labels: str) -> float:
+        return self.count(**labels)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        raise TypeError("use observe() on a histogram")
+
+    def render_values(self, values: Dict[LabelValues, Any]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for key, state in sorted(values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (le,))} {cumulative:g}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {state[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+    @staticmethod
+    def merge(left: Any, right: Any) -> Any:
+        return [a + b for a, b in zip(left, right)]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Counter] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return metric  # type: ignore[return-value]
+
+    def _register(self, kind: Type[Counter], name: str, documentation: str, labelnames: Tuple[str, ...]) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = kind(name, documentation, labelnames)
+                self._metrics[name] = metric
+            return metric
+
+    def metrics(self) -> List[Counter]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        return {metric.name: [[list(key), value] for key, value in metric.export().items()] for metric in self.metrics()}
+
+    def render_merged(self, snapshots: List[Tuple[int, Dict[str, List[Any]]]]) -> str:
+        """Render the sum of per-process snapshots; gauges only count processes that are still alive."""
+        lines: List[str] = []
+        for metric in self.metrics():
+            merged: Dict[LabelValues, Any] = {}
+            for pid, snapshot in snapshots:
+                if metric.type_name == "gauge" and not _pid_alive(pid):
+                    continue
+                for key, value in snapshot.get(metric.name, ()):
+                    key = tuple(key)
+                    merged[key] = metric.merge(merged[key], value) if key in merged else value
+            lines.extend(metric.render_values(merged))
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self.metrics():
+            metric.reset()
+
+
+class MultiprocessMetrics:
+    """Shares metrics between worker processes through per-process snapshot files in one directory.
+
+    Each process writes `<pid>.json` on a background timer (and right before serving a scrape); the
+    scrape merges every file, so any worker can answer `/metrics` for the whole server. Clear the
+    directory when deploying so counters from an older release are not carried over.
+    """
+
+    def __init__(self, directory: str, registry: MetricsRegistry, flush_interval_seconds: float):
+        self.directory = Path(directory)
+        self.registry = registry
+        self.flush_interval_seconds = flush_interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def flush(self) -> None:
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.registry.snapshot()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def render(self) -> str:
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshots.append((int(path.stem), json.loads(path.read_text(encoding="utf-8"))))
+            except (ValueError, OSError):
+                continue  # partially written or foreign file
+        return self.registry.render_merged(snapshots)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_seconds):
+            self.flush()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _copy(value: Any) -> Any:
+    return list(value) if isinstance(value, list) else value
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: LabelValues) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = MetricsRegistry()
+
+_multiprocess: Optional[MultiprocessMetrics] = None
+_multiprocess_lock = threading.Lock()
+
+
+def get_multiprocess_metrics() -> Optional[MultiprocessMetrics]:
+    """Return the shared-directory exporter, or None when METRICS_MULTIPROC_DIR is unset."""
+    global _multiprocess
+    settings = get_settings()
+    if not settings.METRICS_MULTIPROC_DIR:
+        return None
+    with _multiprocess_lock:
+        if _multiprocess is None or str(_multiprocess.directory) != settings.METRICS_MULTIPROC_DIR:
+            _multiprocess = MultiprocessMetrics(
+                settings.METRICS_MULTIPROC_DIR, REGISTRY, settings.METRICS_FLUSH_INTERVAL_SECONDS
+            )
+        return _multiprocess
+
+
+def render_metrics() -> str:
+    multiprocess = get_multiprocess_metrics()
+    return multiprocess.render() if multiprocess is not None else REGISTRY.render()
+
+
+LLM_CALLS = REGISTRY.counter("triage_llm_calls_total", "Triage requests that called the LLM backend.")
+LLM_CALLS_AVOIDED = REGISTRY.counter(
+    "triage_llm_calls_avoided_total",
+    "Triage requests answered without an LLM call, by reason.",
+    ("reason",),
+)
+NEAR_DUPLICATE_LOOKUP_SECONDS = REGISTRY.histogram(
+    "triage_near_duplicate_lookup_seconds",
+    "Time to sign an issue and probe the near-duplicate index.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+NEAR_DUPLICATE_INDEX_SIZE = REGISTRY.gauge(
+    "triage_near_duplicate_index_size", "Recently triaged issues held in the near-duplicate index."
+)
+STORM_EVENTS = REGISTRY.counter(
+    "triage_storm_events_total",
+    "Pageable triage results by storm outcome (opened pages on-call, aggregated joins an open storm,"
+    " repeated is an issue already in the storm).",
+    ("outcome",),
+)
+STORMS_ACTIVE = REGISTRY.gauge("triage_storms_active", "Incident storms currently open.")
+HISTORY_RECORDS = REGISTRY.counter(
+    "triage_history_records_total",
+    "Triage history records by outcome (written, dropped when the queue is full, failed).",
+    ("outcome",),
+)
+HISTORY_QUEUE_DEPTH = REGISTRY.gauge("triage_history_queue_depth", "Triage history records waiting to be written.")
+HISTORY_BATCH_SECONDS = REGISTRY.histogram(
+    "triage_history_batch_seconds", "Time to commit one batch of triage history records and their aggregates."
+)
+LOCAL_CLASSIFIER_DECISIONS = REGISTRY.counter(
+    "triage_local_classifier_decisions_total",
+    "Local classifier outcomes: answered above LOCAL_CLASSIFIER_THRESHOLD, deferred to the LLM, or stale "
+    "(trained for another criteria version).",
+    ("outcome",),
+)
+LOCAL_CLASSIFIER_SECONDS = REGISTRY.histogram(
+    "triage_local_classifier_seconds",
+    "Time to vectorize and score one issue with the local classifier.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "triage_llm_call_seconds", "LLM call latency by backend and model.", ("backend", "model")
+)
+LLM_ERRORS = REGISTRY.counter(
+    "triage_llm_errors_total", "LLM calls that raised or returned nothing, by backend and model.", ("backend", "model")
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "triage_llm_fallbacks_total",
+    "LLM answers replaced by the invalid-output fallback, by reason (invalid_json, invalid_schema).",
+    ("reason",),
+)
+LLM_ROUTE_ATTEMPTS = REGISTRY.counter(
+    "triage_llm_route_attempts_total",
+    "LLM router attempts per backend by outcome (ok, error, timeout, empty, cancelled, skipped_open).",
+    ("backend", "outcome"),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "triage_llm_hedges_total", "Hedged LLM requests fired after the p95 wait, by hedge backend.", ("backend",)
+)
+LLM_BREAKER_OPEN = REGISTRY.gauge(
+    "triage_llm_breaker_open", "1 while the LLM backend's circuit breaker is open.", ("backend",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "triage_llm_tokens_total",
+    "Tokens reported by the LLM backend, by backend, model and kind (prompt, completion, cached).",
+    ("backend", "model", "kind"),
+)
+LLM_REQUEST_TOKENS = REGISTRY.histogram(
+    "triage_llm_request_tokens",
+    "Tokens per LLM request as reported by the backend, by kind (prompt, completion).",
+    ("kind",),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_CACHED_PROMPT_RATIO = REGISTRY.histogram(
+    "triage_llm_cached_prompt_ratio",
+    "Share of each request's prompt tokens served from the provider's prefix cache.",
+    ("backend", "model"),
+    buckets=(0.0, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+LLM_PREFIX_CACHE_SECONDS = REGISTRY.histogram(
+    "triage_llm_prefix_cache_call_seconds",
+    "LLM call latency split by whether the provider reused a cached prompt prefix (hit, miss).",
+    ("prefix_cache",),
+)
+LLM_COST_USD = REGISTRY.counter(
+    "triage_llm_cost_usd_total", "Estimated LLM spend from reported tokens and LLM_PRICE_*.", ("backend", "model")
+)
+LLM_PREFIX_CACHE_SAVINGS_USD = REGISTRY.counter(
+    "triage_llm_prefix_cache_savings_usd_total",
+    "Estimated spend avoided because prompt tokens were served from the provider's prefix cache.",
+    ("backend", "model"),
+)
+PROMPT_INPUT_TOKENS = REGISTRY.histogram(
+    "triage_prompt_input_tokens",
+    "Counted input tokens (system and user prompt) of each LLM request, after compaction.",
+    buckets=TOKEN_BUCKETS,
+)
+PROMPT_COMPACTIONS = REGISTRY.counter(
+    "triage_prompt_compactions_total", "Issue bodies compacted to fit LLM_INPUT_TOKEN_BUDGET."
+)
+VAGUE_GUARD_OVERRIDES = REGISTRY.counter(
+    "triage_vague_guard_overrides_total", "Triage results forced to LOW by the vague-issue guard."
+)
+TRIAGE_PRIORITY = REGISTRY.counter("triage_results_total", "Final triage results by priority.", ("priority",))
+
+WEBHOOK_REQUESTS = REGISTRY.counter(
+    "triage_webhook_requests_total", "Webhook deliveries by issue action and outcome.", ("action", "outcome")
+)
+WEBHOOK_SECONDS = REGISTRY.histogram(
+    "triage_webhook_request_seconds", "Webhook handling time by outcome.", ("outcome",)
+)
+SIGNATURE_SECONDS = REGISTRY.histogram(
+    "triage_signature_verify_seconds", "Webhook HMAC signature verification time."
+)
+
+GITHUB_API_SECONDS = REGISTRY.histogram(
+    "github_api_request_seconds", "GitHub API request latency by call and status.", ("call", "status")
+)
+GITHUB_WRITE_QUEUE_DEPTH = REGISTRY.gauge(
+    "github_write_queue_depth", "GitHub writes currently waiting for rate-limit capacity."
+)
+GITHUB_WRITE_WAIT_SECONDS = REGISTRY.counter(
+    "github_write_wait_seconds_total", "Total seconds GitHub writes spent queued for rate-limit capacity."
+)
+GITHUB_WRITES = REGISTRY.counter("github_writes_total", "GitHub write requests sent, by response status.", ("status",))
+GITHUB_WRITE_RETRIES = REGISTRY.counter(
+    "github_write_retries_total", "GitHub writes retried after a rate-limit response."
+)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .rules import KeywordRule, RuleEngine
+
+# Rule D minimum when the criteria do not state one.
+DEFAULT_MIN_WORDS = 10
+
+_CODE_SPAN = re.compile(r"`([^`]+)`")
+_BOLD_LEVEL = re.compile(r"\*\*(HIGH|MEDIUM|LOW):?\*\*:?", re.IGNORECASE)
+_RULE_HEADING = re.compile(r"^Rule\s+([A-Za-z0-9]+)\s*:\s*(.+)$")
+_MIN_WORDS = re.compile(r"fewer than\s+(\d+)\s+words", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ScopeDefinition:
+    level: str
+    description: str
+    keywords: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class PolicyRule:
+    rule_id: str
+    title: str
+    description: str
+    items: Tuple[str, ...]
+
+    @property
+    def label(self) -> str:
+        return f"Rule {self.rule_id}: {self.title}"
+
+
+@dataclass(frozen=True)
+class TriagePolicy:
+    """The parts of TRIAGE_CRITERIA.md the deterministic matchers use; the prompt is the file text itself."""
+
+    scopes: Tuple[ScopeDefinition, ...]
+    rules: Tuple[PolicyRule, ...]
+
+    def rule(self, rule_id: str) -> Optional[PolicyRule]:
+        for rule in self.rules:
+            if rule.rule_id.upper() == rule_id.upper():
+                return rule
+        return None
+
+    def scope_keywords(self, level: str) -> Tuple[str, ...]:
+        for scope in self.scopes:
+            if scope.level == level:
+                return scope.keywords
+        return ()
+
+    @property
+    def critical_components(self) -> Tuple[str, ...]:
+        """Rule C components that must be HIGH automatically."""
+        rule = self.rule("C")
+        return rule.items if rule else ()
+
+    @property
+    def min_words(self) -> int:
+        """Rule D threshold: issues with fewer words are LOW."""
+        rule = self.rule("D")
+        found = _MIN_WORDS.search(rule.description) if rule else None
+        return int(found.group(1)) if found else DEFAULT_MIN_WORDS
+
+
+def parse_policy(text: str) -> TriagePolicy:
+    raw_sections: List[Tuple[str, List[str]]] = []
+    for line in text.splitlines():
+        if line.startswith("## "):
+            raw_sections.append((line[3:].strip(), []))
+        elif raw_sections:
+            raw_sections[-1][1].append(line)
+
+    scopes: List[ScopeDefinition] = []
+    rules: List[PolicyRule] = []
+    for heading, lines in raw_sections:
+        kind = _section_kind(heading, lines)
+        if kind == "scope" and not scopes:
+            scopes = _parse_scopes(lines)
+        elif kind == "rules" and not rules:
+            rules = _parse_rules(lines)
+    return TriagePolicy(scopes=tuple(scopes), rules=tuple(rules))
+
+
+def _section_kind(heading: str, lines: List[str]) -> str:
+    if "scope" in heading.lower():
+        return "scope"
+    if any(line.startswith("### ") and _RULE_HEADING.match(line[4:].strip()) for line in lines):
+        return "rules"
+    return "other"
+
+
+def _parse_scopes(lines: List[str]) -> List[ScopeDefinition]:
+    scopes = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped.startswith("- "):
+            continue
+        found = _BOLD_LEVEL.search(stripped)
+        if not found:
+            continue
+        description = stripped[found.end():].strip()
+        scopes.append(
+            ScopeDefinition(
+                level=found.group(1).upper(),
+                description=description,
+                keywords=tuple(_CODE_SPAN.findall(description)),
+            )
+        )
+    return scopes
+
+
+def _parse_rules(lines: List[str]) -> List[PolicyRule]:
+    blocks: List[Tuple[str, List[str]]] = []
+    for line in lines:
+        if line.startswith("### "):
+            blocks.append((line[4:].strip(), []))
+        elif blocks:
+            blocks[-1][1].append(line)
+
+    rules = []
+    for heading, body_lines in blocks:
+        found = _RULE_HEADING.match(heading)
+        if not found:
+            continue
+        items = tuple(
+            span
+            for line in body_lines
+            if line.strip().startswith("- ")
+            for span in _CODE_SPAN.findall(line)
+        )
+        rules.append(
+            PolicyRule(rule_id=found.group(1), title=found.group(2).strip(), description=_join(body_lines), items=items)
+        )
+    return rules
+
+
+def _join(lines: List[str]) -> str:
+    return "\n".join(lines).strip()
+
+
+@dataclass(frozen=True)
+class PolicyMatchers:
+    """Deterministic matchers compiled from one policy version."""
+
+    critical_components: RuleEngine
+    scope: RuleEngine
+    min_words: int
+    # Every policy keyword; lines mentioning one survive prompt compaction.
+    relevant: RuleEngine
+
+
+CRITICAL_RULE = "critical_components"
+
+
+def compile_matchers(policy: TriagePolicy) -> PolicyMatchers:
+    scope_rules: Dict[str, Tuple[str, ...]] = {}
+    for scope in policy.scopes:
+        scope_rules[scope.level] = scope_rules.get(scope.level, ()) + tuple(k.lower() for k in scope.keywords)
+    return PolicyMatchers(
+        critical_components=RuleEngine([KeywordRule(CRITICAL_RULE, policy.critical_components)]),
+        scope=RuleEngine([KeywordRule(level, keywords) for level, keywords in scope_rules.items()]),
+        min_words=policy.min_words,
+        relevant=RuleEngine(
+            [KeywordRule("relevant", policy.critical_components + tuple(k for ks in scope_rules.values() for k in ks))]
+        ),
+    )
@@ -1,6 +1,32 @@
 from __future__ import annotations
 
-from textwrap import dedent
+import hashlib
+from functools import lru_cache
+
+# The system prompt is the provider-cacheable prefix: persona, criteria, schema and example, in that
+# order, built from constants so one criteria version always renders to the same bytes. Everything
+# issue-specific goes in the user prompt, after it.
+SYSTEM_PERSONA = "You are the 'issue-triager' bot, a DevOps triage expert.\nTriaging Rules:"
+
+RESPONSE_FORMAT = """Return your answer strictly as JSON with no markdown or extra commentary.
+The JSON must match this schema exactly:
+{
+  "priority": "HIGH|MEDIUM|LOW",
+  "notify_on_call": true/false,
+  "labels": ["priority:high|medium|low"],
+  "reasoning": "short rationale",
+  "confidence": 0.0-1.0,
+  "matched_rules": ["rules or heuristics applied"]
+}
+Example:
+{
+  "priority": "HIGH",
+  "notify_on_call": true,
+  "labels": ["priority:high"],
+  "reasoning": "Production outage impacting customers.",
+  "confidence": 0.91,
+  "matched_rules": ["HIGH: Production impact"]
+}"""
 
 
 def build_prompts(
@@ -10,42 +36,31 @@ def build_prompts(
     repo: str | None,
     url: str | None,
 ) -> tuple[str, str]:
-    system_prompt = dedent(
-        f"""
-        You are the 'issue-triager' bot, a DevOps triage expert.
-        Triaging Rules:
-        {criteria_text}
-
-        Return your answer strictly as JSON with no markdown or extra commentary.
-        The JSON must match this schema exactly:
-        {{
-          "priority": "HIGH|MEDIUM|LOW",
-          "notify_on_call": true/false,
-          "labels": ["priority:high|medium|low"],
-          "reasoning": "short rationale",
-          "confidence": 0.0-1.0,
-          "matched_rules": ["rules or heuristics applied"]
-        }}
-        Example:
-        {{
-          "priority": "HIGH",
-          "notify_on_call": true,
-          "labels": ["priority:high"],
-          "reasoning": "Production outage impacting customers.",
-          "confidence": 0.91,
-          "matched_rules": ["HIGH: Production impact"]
-        }}
-        """
-    ).strip()
-
-    body_text = body or ""
-    user_prompt = dedent(
-        f"""
-        Issue Title: {title}
-        Issue Body: {body_text}
-        Repository: {repo or 'unknown'}
-        Issue URL: {url or 'unknown'}
-        """
-    ).strip()
-
-    return system_prompt, user_prompt
+    return build_system_prompt(criteria_text), build_user_prompt(title, body, repo, url)
+
+
+@lru_cache(maxsize=16)
+def build_system_prompt(criteria_text: str) -> str:
+    criteria = "\n".join(line.rstrip() for line in criteria_text.strip().splitlines())
+    return f"{SYSTEM_PERSONA}\n{criteria}\n\n{RESPONSE_FORMAT}"
+
+
+def build_user_prompt(title: str, body: str | None, repo: str | None, url: str | None) -> str:
+    return (
+        f"Issue Title: {title}\n"
+        f"Issue Body: {body or ''}\n"
+        f"Repository: {repo or 'unknown'}\n"
+        f"Issue URL: {url or 'unknown'}"
+    )
+
+
+@lru_cache(maxsize=16)
+def prompt_prefix_key(system_prompt: str) -> str:
+    """Short stable id of a system prompt, sent as the provider's prompt-cache routing key."""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_template_fingerprint() -> str:
+    """Stable hash of the prompt templates, so cached answers expire when the wording changes."""
+    placeholders = build_prompts("{criteria}", "{title}", "{body}", "{repo}", "{url}")
+    return hashlib.sha256("\n".join(placeholders).encode("utf-8")).hexdigest()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Above this many distinct keywords a single regex pass beats one C-level substring scan per keyword.
+# Measured on CPython 3.11 with 100 KB issue bodies (see benchmarks/bench_rules.py).
+REGEX_STRATEGY_MIN_KEYWORDS = 96
+
+STRATEGIES = ("auto", "scan", "regex")
+
+
+@dataclass(frozen=True)
+class KeywordRule:
+    """A named rule that fires when any of its keywords occurs as a substring of the text."""
+
+    name: str
+    keywords: Tuple[str, ...]
+
+
+class RuleEngine:
+    """Keyword rules compiled once and evaluated together, returning every rule that matched.
+
+    Matching is case-insensitive substring matching, identical to `keyword in text.lower()`. Keywords
+    shared by several rules are searched once, and keywords containing a shorter keyword of the same
+    rule are never searched. Small keyword sets are matched with one fast substring
+    search per keyword; large sets are compiled into a single trie-shaped regex that finds every
+    keyword, including overlapping ones, in one pass over the text.
+    """
+
+    def __init__(self, rules: Iterable[KeywordRule], strategy: str = "auto"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown rule engine strategy: {strategy}")
+        self.rules: Tuple[KeywordRule, ...] = tuple(rules)
+
+        self._keywords_by_rule = {
+            rule.name: _drop_redundant(keyword.lower() for keyword in rule.keywords if keyword) for rule in self.rules
+        }
+        rules_by_keyword: Dict[str, List[str]] = {}
+        for name, keywords in self._keywords_by_rule.items():
+            for keyword in keywords:
+                rules_by_keyword.setdefault(keyword, []).append(name)
+        self._rules_by_keyword = {keyword: tuple(names) for keyword, names in rules_by_keyword.items()}
+        self._keywords = tuple(sorted(self._rules_by_keyword, key=len, reverse=True))
+
+        if strategy == "auto":
+            strategy = "regex" if len(self._keywords) >= REGEX_STRATEGY_MIN_KEYWORDS else "scan"
+        self.strategy = strategy
+        self._pattern = re.compile(f"(?=({_trie_pattern(self._keywords)}))") if strategy == "regex" else None
+        # A regex hit is the longest keyword starting at that position; shorter keywords that are
+        # prefixes of it start there too.
+        self._prefixes = {
+            keyword: tuple(other for other in self._keywords if keyword.startswith(other))
+            for keyword in self._keywords
+        }
+
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        return self._keywords
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Return the names of all rules with at least one keyword in `text`."""
+        lowered = text.lower()
+        matched: set[str] = set()
+        if self._pattern is None:
+            for keyword in self._keywords:
+                names = self._rules_by_keyword[keyword]
+                if not matched.issuperset(names) and keyword in lowered:
+                    matched.update(names)
+            return frozenset(matched)
+
+        seen: set[str] = set()
+        for found in self._pattern.finditer(lowered):
+            keyword = found.group(1)
+            if keyword in seen:
+                continue
+            for prefix in self._prefixes[keyword]:
+                if prefix not in seen:
+                    seen.add(prefix)
+                    matched.update(self._rules_by_keyword[prefix])
+            if len(seen) == len(self._keywords):
+                break
+        return frozenset(matched)
+
+    def lazy_match(self, text: str) -> "LazyMatches":
+        """Like `match`, but each rule is only evaluated when asked about; suits branchy callers."""
+        return LazyMatches(self, text.lower())
+
+    def matched_keywords(self, text: str, rule_name: str) -> List[str]:
+        """Keywords of one rule present in `text`, in rule order (e.g. which critical component was named)."""
+        lowered = text.lower()
+        for rule in self.rules:
+            if rule.name == rule_name:
+                return [keyword for keyword in rule.keywords if keyword.lower() in lowered]
+        return []
+
+
+class LazyMatches:
+    """Membership view over an engine's rules for one text, evaluating and memoizing rules on demand."""
+
+    def __init__(self, engine: RuleEngine, lowered: str):
+        self._engine = engine
+        self._lowered = lowered
+        self._results: Dict[str, bool] = {}
+        self._all: FrozenSet[str] | None = None
+
+    def __contains__(self, rule_name: object) -> bool:
+        if self._engine._pattern is not None:
+            if self._all is None:
+                self._all = self._engine.match(self._lowered)
+            return rule_name in self._all
+        result = self._results.get(rule_name)  # type: ignore[arg-type]
+        if result is None:
+            keywords = self._engine._keywords_by_rule.get(rule_name, ())  # type: ignore[arg-type]
+            result = any(keyword in self._lowered for keyword in keywords)
+            self._results[rule_name] = result  # type: ignore[index]
+        return result
+
+
+def _drop_redundant(keywords: Iterable[str]) -> Tuple[str, ...]:
+    """Drop keywords that contain another keyword of the same rule; the shorter one always fires too."""
+    unique = sorted(set(keywords), key=len)
+    kept: List[str] = []
+    for keyword in unique:
+        if not any(shorter in keyword for shorter in kept):
+            kept.append(keyword)
+    return tuple(kept)
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _render_trie(trie) or "(?!)"
+
+
+def _render_trie(node: Dict[str, dict]) -> str:
+    terminal = "" in node
+    branches = [re.escape(char) + _render_trie(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    group = "(?:" + "|".join(branches) + ")"
+    return group + "?" if terminal else group
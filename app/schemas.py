@@ -41,17 +41,22 @@ class TriageResult(BaseModel):
 
 
 class Repository(BaseModel):
-    full_name: str
+    full_name: str = Field(min_length=1)
 
 
 class Issue(BaseModel):
     number: int
-    title: str
+    title: str = Field(min_length=1)
     body: Optional[str] = None
     html_url: Optional[str] = None
 
 
+class Installation(BaseModel):
+    id: int
+
+
 class GitHubPayload(BaseModel):
     action: str
     repository: Repository
     issue: Issue
+    installation: Optional[Installation] = None
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import get_settings
+from .schemas import TriageResult
+
+# Signature layout: NUM_BINS one-permutation MinHash bins, banded for LSH into BANDS x ROWS_PER_BAND.
+# With 16 bands of 4 rows an issue pair at Jaccard 0.7 becomes a candidate with probability ~0.99,
+# one at 0.3 with ~0.12; candidates are then scored on the full signature.
+NUM_BINS = 64
+ROWS_PER_BAND = 4
+BANDS = NUM_BINS // ROWS_PER_BAND
+# Only the leading characters are shingled, which bounds signature cost for huge bodies.
+MAX_CHARS = 16384
+
+_BIN_SHIFT = 64 - (NUM_BINS - 1).bit_length()
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_VALUE_MASK = 0xFFFFFFFF
+_EMPTY = _VALUE_MASK
+# Numbers, hex fragments and punctuation only separate words, so timestamps and ids never count.
+_WORD = re.compile(r"[a-z]{2,}")
+
+Signature = array  # array("I") of NUM_BINS values
+
+
+def minhash_signature(text: str) -> Optional[Signature]:
+    """One-permutation MinHash of the text's word pairs, or None when it has no words.
+
+    Each word pair is hashed once; the top bits pick a bin and the bin keeps the smallest of the next
+    32 bits. Empty bins borrow from the next filled bin (rotation densification), so short texts still
+    get comparable signatures.
+    """
+    words = [zlib.crc32(word.encode()) for word in _WORD.findall(text[:MAX_CHARS].lower())]
+    if not words:
+        return None
+    shingles = set(zip(words, words[1:])) or {(words[0], 0)}
+    bins = [_EMPTY] * NUM_BINS
+    for first, second in shingles:
+        # CRC32 is fast but linear; the multiplicative mix spreads the pair over 64 bits.
+        hashed = (((first << 32) | second) * _MIX) & _MASK64
+        index = hashed >> _BIN_SHIFT
+        value = (hashed >> (_BIN_SHIFT - 32)) & _VALUE_MASK
+        if value < bins[index]:
+            bins[index] = value
+    if _EMPTY in bins:
+        bins = _densify(bins)
+    return array("I", bins)
+
+
+def _densify(bins: List[int]) -> List[int]:
+    dense = list(bins)
+    for index, value in enumerate(bins):
+        if value != _EMPTY:
+            continue
+        for step in range(1, NUM_BINS):
+            borrowed = bins[(index + step) % NUM_BINS]
+            if borrowed != _EMPTY:
+                # The step is mixed in so two borrowing bins do not always agree with each other.
+                dense[index] = (borrowed + step * 0x9E3779B1) & _VALUE_MASK
+                break
+    return dense
+
+
+def signature_similarity(left: Signature, right: Signature) -> float:
+    """Estimated Jaccard similarity: the share of bins on which the two signatures agree."""
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_BINS
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    result: TriageResult
+    origin: str
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    signature: Signature
+    scope: Tuple[str, ...]
+    result: TriageResult
+    origin: str
+    stored_at: float
+
+
+class NearDuplicateIndex:
+    """In-memory LSH index of recently triaged issues, bounded by entry count and age.
+
+    Each LSH bucket remembers only its latest issue: an older issue sharing the bucket is itself a
+    near-duplicate of the newer one, so lookups stay a fixed number of dict probes however large the
+    index grows. Entries are scoped (repository and criteria version), so a result is never reused
+    across repositories or after a criteria edit.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        window_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.window_seconds = window_seconds
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[int, int] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, signature: Signature, scope: Tuple[str, ...]) -> Optional[NearDuplicate]:
+        band_keys = _band_keys(signature, scope)
+        with self._lock:
+            self._expire(self._clock())
+            best: Optional[_Entry] = None
+            best_similarity = 0.0
+            for entry_id in {self._buckets.get(key) for key in band_keys}:
+                entry = self._entries.get(entry_id) if entry_id is not None else None
+                if entry is None:
+                    continue
+                similarity = signature_similarity(signature, entry.signature)
+                if similarity > best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return NearDuplicate(best.result, best.origin, best_similarity)
+
+    def add(self, signature: Signature, scope: Tuple[str, ...], result: TriageResult, origin: str) -> None:
+        entry = _Entry(signature, scope, result, origin, self._clock())
+        with self._lock:
+            entry_id, self._next_id = self._next_id, self._next_id + 1
+            self._entries[entry_id] = entry
+            for key in _band_keys(signature, scope):
+                self._buckets[key] = entry_id
+            self._expire(entry.stored_at)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in insertion order, so the oldest (and first to expire) are at the front.
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - entry.stored_at < self.window_seconds:
+                break
+            del self._entries[entry_id]
+            # Recomputed rather than stored, which keeps each entry about 10% smaller.
+            for key in _band_keys(entry.signature, entry.scope):
+                if self._buckets.get(key) == entry_id:
+                    del self._buckets[key]
+
+
+def _band_keys(signature: Signature, scope: Tuple[str, ...]) -> Tuple[int, ...]:
+    raw = signature.tobytes()
+    width = ROWS_PER_BAND * signature.itemsize
+    return tuple(hash((scope, band, raw[band * width : (band + 1) * width])) for band in range(BANDS))
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    """Return the process-wide index, or None when NEAR_DUPLICATE_ENABLED is off."""
+    global _index
+    settings = get_settings()
+    if not settings.NEAR_DUPLICATE_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex(
+                threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+                max_entries=settings.NEAR_DUPLICATE_MAX_ENTRIES,
+                window_seconds=settings.NEAR_DUPLICATE_WINDOW_SECONDS,
+            )
+        return _index
+
+
+def reset_near_duplicate_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from .config import get_settings
+from .logging_utils import get_logger
+from .metrics import STORM_EVENTS, STORMS_ACTIVE
+
+logger = get_logger(__name__)
+
+# Closed storms kept for the /storms endpoint.
+RECENT_STORMS = 20
+
+StormKey = Tuple[str, str]
+
+
+@dataclass
+class Storm:
+    """Pageable issues sharing a rule and component, open while they keep arriving within the window."""
+
+    storm_id: str
+    rule: str
+    component: str
+    started_at: float
+    last_seen: float
+    count: int = 0
+    issues: Deque[str] = field(default_factory=deque)
+    opened_by: str = ""
+    # The references in `issues`, for O(1) repeat checks; bounded by the same `max_issues`.
+    members: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.storm_id,
+            "rule": self.rule,
+            "component": self.component,
+            "count": self.count,
+            "started_at": self.started_at,
+            "last_seen": self.last_seen,
+            "issues": list(self.issues),
+            "issues_truncated": self.count > len(self.issues),
+        }
+
+
+@dataclass(frozen=True)
+class StormUpdate:
+    storm_id: str
+    count: int
+    notify: bool  # True only for the issue that opened the storm
+    repeat: bool = False  # the issue was already part of this storm
+
+
+class StormAggregator:
+    """Session-windowed grouping of on-call notifications.
+
+    The first pageable issue for a (rule, component) key opens a storm and pages; later ones within
+    `window_seconds` of the storm's last issue only bump its count and issue list. An issue already in
+    the storm (a retry, a re-triage or an `edited` delivery) changes nothing and gets its original
+    answer back (only the latest `max_issues` issues are remembered as members). Every update is O(1):
+    storms sit in an OrderedDict ordered by last activity, so expiry pops from the front, and each storm
+    keeps at most `max_issues` issue references however long it stays open.
+    """
+
+    def __init__(
+        self, window_seconds: float, max_active: int, max_issues: int, clock: Callable[[], float] = time.time
+    ):
+        self.window_seconds = window_seconds
+        self.max_active = max(1, max_active)
+        self.max_issues = max(1, max_issues)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._active: "OrderedDict[StormKey, Storm]" = OrderedDict()
+        self._recent: Deque[Storm] = deque(maxlen=RECENT_STORMS)
+        self._opened = 0
+
+    def record(self, rule: str, component: str, issue: str) -> StormUpdate:
+        now = self._clock()
+        key = (rule, component)
+        with self._lock:
+            self._expire(now)
+            storm = self._active.get(key)
+            if storm is not None and issue in storm.members:
+                update = StormUpdate(storm.storm_id, storm.count, issue == storm.opened_by, repeat=True)
+                STORM_EVENTS.inc(outcome="repeated")
+                return update
+            opened = storm is None
+            if storm is None:
+                self._opened += 1
+                issues: Deque[str] = deque(maxlen=self.max_issues)
+                storm = Storm(f"storm-{self._opened}", rule, component, now, now, issues=issues, opened_by=issue)
+                self._active[key] = storm
+                self._evict_over_capacity()
+            else:
+                self._active.move_to_end(key)
+            storm.count += 1
+            storm.last_seen = now
+            if len(storm.issues) == storm.issues.maxlen:
+                storm.members.discard(storm.issues[0])
+            storm.issues.append(issue)
+            storm.members.add(issue)
+            update = StormUpdate(storm.storm_id, storm.count, opened)
+            STORMS_ACTIVE.set(len(self._active))
+        STORM_EVENTS.inc(outcome="opened" if opened else "aggregated")
+        return update
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(self._clock())
+            STORMS_ACTIVE.set(len(self._active))
+            return {
+                "window_seconds": self.window_seconds,
+                "active": [storm.to_dict() for storm in reversed(self._active.values())],
+                "recent": [storm.to_dict() for storm in reversed(self._recent)],
+            }
+
+    def _expire(self, now: float) -> None:
+        while self._active:
+            storm = next(iter(self._active.values()))
+            if now - storm.last_seen < self.window_seconds:
+                break
+            self._close(storm)
+
+    def _evict_over_capacity(self) -> None:
+        while len(self._active) > self.max_active:
+            storm = next(iter(self._active.values()))
+            logger.warning("Too many concurrent storms; closing %s early.", storm.storm_id)
+            self._close(storm)
+
+    def _close(self, storm: Storm) -> None:
+        del self._active[(storm.rule, storm.component)]
+        self._recent.append(storm)
+        if storm.count > 1:
+            logger.info(
+                "Storm %s closed: %d issues for %s / %s in %.0fs.",
+                storm.storm_id,
+                storm.count,
+                storm.rule,
+                storm.component,
+                storm.last_seen - storm.started_at,
+            )
+
+
+_aggregator: Optional[StormAggregator] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_storm_aggregator() -> Optional[StormAggregator]:
+    """Return the process-wide aggregator, or None when STORM_AGGREGATION_ENABLED is off."""
+    global _aggregator
+    settings = get_settings()
+    if not settings.STORM_AGGREGATION_ENABLED:
+        return None
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = StormAggregator(
+                window_seconds=settings.STORM_WINDOW_SECONDS,
+                max_active=settings.STORM_MAX_ACTIVE,
+                max_issues=settings.STORM_MAX_ISSUES,
+            )
+        return _aggregator
+
+
+def reset_storm_aggregator() -> None:
+    global _aggregator
+    with _aggregator_lock:
+        _aggregator = None
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from .rules import RuleEngine
+
+# Typical characters per token for English prose and logs under OpenAI tokenizers.
+CHARS_PER_TOKEN = 4.0
+
+# Share of a compacted body's budget given to its first and last lines; keyword lines from the
+# middle get the rest.
+HEAD_SHARE = 0.4
+TAIL_SHARE = 0.25
+
+_VOLATILE = re.compile(r"0x[0-9a-f]+|[0-9a-f]{8,}|\d+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Exact count with `tiktoken` when it is installed, otherwise a characters-per-token estimate."""
+    encoder = _encoder(model or "")
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class CompactedText:
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def compacted(self) -> bool:
+        return self.tokens != self.original_tokens
+
+
+def compact_text(
+    text: str, budget_tokens: int, keywords: Optional[RuleEngine] = None, model: Optional[str] = None
+) -> CompactedText:
+    """Shrink `text` to about `budget_tokens`, keeping what matters for triage.
+
+    Text within budget is returned unchanged. Otherwise repeated lines (equal once numbers, hex ids
+    and timestamps are masked) are collapsed into their first occurrence with a repeat count; if that
+    is not enough, the head and tail are kept along with middle lines that match `keywords`, and the
+    gaps are replaced by omission markers.
+    """
+    original = count_tokens(text, model)
+    if original <= budget_tokens:
+        return CompactedText(text, original, original)
+
+    lines = _dedupe_lines(text.splitlines())
+    deduped = "\n".join(lines)
+    tokens = count_tokens(deduped, model)
+    if tokens > budget_tokens:
+        deduped = _select_lines(lines, budget_tokens, keywords, model)
+        tokens = count_tokens(deduped, model)
+        if tokens > budget_tokens:
+            deduped = _truncate(deduped, budget_tokens)
+            tokens = count_tokens(deduped, model)
+    return CompactedText(deduped, original, tokens)
+
+
+def _dedupe_lines(lines: List[str]) -> List[str]:
+    keys = [_VOLATILE.sub("#", line.strip()) for line in lines]
+    counts = Counter(key for key in keys if key)
+    seen: set[str] = set()
+    kept = []
+    for line, key in zip(lines, keys):
+        if not key:
+            if kept and kept[-1].strip():
+                kept.append(line)
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        repeats = counts[key] - 1
+        kept.append(f"{line} [repeated {repeats} more times]" if repeats else line)
+    return kept
+
+
+def _select_lines(lines: List[str], budget_tokens: int, keywords: Optional[RuleEngine], model: Optional[str]) -> str:
+    costs = [count_tokens(line, model) + 1 for line in lines]
+    keep = [False] * len(lines)
+    overrides: dict[int, str] = {}
+
+    def take(indexes: range, allowance: float, from_end: bool = False) -> float:
+        for index in indexes:
+            if keep[index]:
+                continue
+            if costs[index] > allowance:
+                if allowance >= 16:  # room for a useful fragment of an oversized line
+                    keep[index] = True
+                    overrides[index] = _truncate(lines[index], int(allowance) - 4, from_end=from_end)
+                    allowance = 0
+                break
+            keep[index] = True
+            allowance -= costs[index]
+        return allowance
+
+    # Every gap costs an omission marker; reserve room for a few of them.
+    usable = max(0, budget_tokens - 48)
+    spare = take(range(len(lines)), usable * HEAD_SHARE)
+    spare = take(range(len(lines) - 1, -1, -1), usable * TAIL_SHARE + spare, from_end=True)
+    allowance = usable * (1 - HEAD_SHARE - TAIL_SHARE) + spare
+    if keywords is not None and keywords.keywords:
+        for index, line in enumerate(lines):
+            if allowance <= 0:
+                break
+            if not keep[index] and costs[index] <= allowance and keywords.match(line):
+                keep[index] = True
+                allowance -= costs[index]
+    # Whatever the keyword lines did not use extends the head, then the tail.
+    allowance = take(range(len(lines)), allowance / 2) + allowance / 2
+    take(range(len(lines) - 1, -1, -1), allowance, from_end=True)
+
+    out: List[str] = []
+    omitted = 0
+    for index, line in enumerate(lines):
+        if not keep[index]:
+            omitted += 1
+            continue
+        if omitted:
+            out.append(f"[... {omitted} lines omitted ...]")
+            omitted = 0
+        out.append(overrides.get(index, line))
+    if omitted:
+        out.append(f"[... {omitted} lines omitted ...]")
+    return "\n".join(out)
+
+
+def _truncate(text: str, budget_tokens: int, from_end: bool = False) -> str:
+    limit = max(0, int(budget_tokens * CHARS_PER_TOKEN) - 16)
+    if from_end:
+        return "[truncated] " + text[-limit:] if limit else "[truncated]"
+    return text[:limit] + " [truncated]"
+
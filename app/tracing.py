@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from .config import get_settings
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+TRACING_EXPORTERS = ("none", "stdout", "file", "otel")
+
+
+class Span:
+    """One timed stage. Unsampled spans only carry ids so children inherit the sampling decision."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "attributes", "start_ns", "status")
+
+    def __init__(self, name: str, trace_id: str, span_id: str, parent_id: Optional[str], sampled: bool):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = {}
+        self.start_ns = time.time_ns() if sampled else 0
+        self.status = "ok"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attributes(self, **attributes: Any) -> None:
+        if self.sampled:
+            self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def record_exception(self, exc: BaseException) -> None:
+        if self.sampled:
+            self.status = "error"
+            self.attributes["error"] = f"{exc.__class__.__name__}: {exc}"
+
+    def to_dict(self, end_ns: int) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_DISABLED_SPAN = Span("disabled", "0" * 32, "0" * 16, None, False)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Span]:
+    """Turn a W3C `traceparent` header into a remote parent, or None when it is malformed."""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return Span("remote", parts[1], parts[2], None, sampled)
+
+
+class SpanExporter:
+    """Writes finished spans as JSON lines to a stream."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream not in (sys.stdout, sys.stderr):
+            self._stream.close()
+
+
+class Tracer:
+    """Opens nested spans through a context variable, so async tasks and threads inherit the parent.
+
+    The sampling decision is made once per trace at the root (`sample_ratio`) and inherited by every
+    child, including work that resumes from a propagated `traceparent`.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_ratio: float):
+        self.exporter = exporter
+        self.sample_ratio = min(1.0, max(0.0, sample_ratio))
+        self._random = random.Random()
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        if self.exporter is None:
+            # Tracing is off: no ids, no context switch, nothing to propagate.
+            yield _DISABLED_SPAN
+            return
+        parent = _current_span.get() or parse_traceparent(traceparent)
+        if parent is None:
+            trace_id = f"{self._random.getrandbits(128):032x}"
+            sampled = self._random.random() < self.sample_ratio
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        span = Span(name, trace_id, f"{self._random.getrandbits(64):016x}", parent.span_id if parent else None, sampled)
+        span.set_attributes(**attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            if sampled:
+                self.exporter.export(span.to_dict(time.time_ns()))
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def current_traceparent(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.traceparent if span is not None else None
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+class OTelTracer(Tracer):
+    """Delegates to the OpenTelemetry API; exporters and sampling come from the OpenTelemetry SDK setup."""
+
+    def __init__(self) -> None:
+        from opentelemetry import propagate, trace
+
+        super().__init__(None, 1.0)
+        self._propagate = propagate
+        self._tracer = trace.get_tracer("issue-triager")
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Any]:
+        from opentelemetry import trace
+
+        context = None
+        if traceparent and not trace.get_current_span().get_span_context().is_valid:
+            context = self._propagate.extract({"traceparent": traceparent})
+        attrs = {key: value for key, value in attributes.items() if value is not None}
+        with self._tracer.start_as_current_span(name, context=context, attributes=attrs) as span:
+            yield _OTelSpan(span)
+
+    def current(self) -> Optional[Any]:
+        from opentelemetry import trace
+
+        span = trace.get_current_span()
+        return _OTelSpan(span) if span.get_span_context().is_valid else None
+
+    def current_traceparent(self) -> Optional[str]:
+        carrier: Dict[str, str] = {}
+        self._propagate.inject(carrier)
+        return carrier.get("traceparent")
+
+
+class _OTelSpan:
+    def __init__(self, span: Any):
+        self._span = span
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self._span.set_attributes({key: value for key, value in attributes.items() if value is not None})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self._span.record_exception(exc)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_key: Optional[tuple] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer, _tracer_key
+    settings = get_settings()
+    key = (settings.TRACING_EXPORTER, settings.TRACING_FILE_PATH, settings.TRACING_SAMPLE_RATIO)
+    with _tracer_lock:
+        if _tracer is None or _tracer_key != key:
+            if _tracer is not None:
+                _tracer.close()
+            _tracer, _tracer_key = _build_tracer(*key), key
+        return _tracer
+
+
+def _build_tracer(exporter: str, file_path: str, sample_ratio: float) -> Tracer:
+    exporter = exporter.lower()
+    if exporter not in TRACING_EXPORTERS:
+        raise ValueError(f"TRACING_EXPORTER must be one of {TRACING_EXPORTERS}, got {exporter!r}")
+    if exporter == "otel":
+        try:
+            return OTelTracer()
+        except ImportError:
+            logger.warning("opentelemetry is not installed; writing spans to stdout instead.")
+            exporter = "stdout"
+    if exporter == "stdout":
+        return Tracer(SpanExporter(sys.stdout), sample_ratio)
+    if exporter == "file":
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return Tracer(SpanExporter(path.open("a", encoding="utf-8")), sample_ratio)
+    return Tracer(None, sample_ratio)
+
+
+def reset_tracer() -> None:
+    global _tracer, _tracer_key
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer, _tracer_key = None, None
+
+
+def span(name: str, traceparent: Optional[str] = None, **attributes: Any):
+    """Open a span on the process tracer: `with span("llm", model=...) as s: ...`."""
+    return get_tracer().span(name, traceparent=traceparent, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return get_tracer().current()
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Attach attributes to the active span, if any."""
+    span = current_span()
+    if span is not None:
+        span.set_attributes(**attributes)
+
+
+def current_traceparent() -> Optional[str]:
+    return get_tracer().current_traceparent()
@@ -1,16 +1,143 @@
 from __future__ import annotations
 
-from functools import lru_cache
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .config import get_settings
+from .logging_utils import get_logger
+from .policy import PolicyMatchers, TriagePolicy, compile_matchers, parse_policy
+from .prompt_builder import build_system_prompt
+
+logger = get_logger(__name__)
+
+RULE_C = "Rule C: Critical Infrastructure Protection"
+RULE_D = "Rule D: Insufficient Information"
+
+_TABLE_SEPARATOR_CELL = re.compile(r"^(:?)-+(:?)$")
 
 
 def get_repo_root() -> Path:
     return Path(__file__).resolve().parent.parent
 
 
-@lru_cache(maxsize=1)
+@dataclass(frozen=True)
+class CriteriaSnapshot:
+    """One immutable version of the criteria with everything derived from it.
+
+    The system prompt is built from the file text itself, so every edit reaches the model; the parsed
+    policy only drives the matchers. `version` hashes the text with whitespace and table padding
+    normalised, so purely cosmetic edits do not invalidate cached triage answers.
+    """
+
+    text: str
+    version: str
+    system_prompt: str
+    loaded_at: float
+    policy: TriagePolicy
+    matchers: PolicyMatchers
+
+
+class CriteriaProvider:
+    """Serves the current TRIAGE_CRITERIA.md snapshot and swaps in a new one when the file changes.
+
+    The file is stat-ed at most once per `check_interval_seconds`; a changed mtime, inode or size
+    triggers a re-read. Callers keep whichever snapshot they obtained, so in-flight requests finish
+    with the version they started with.
+    """
+
+    def __init__(self, path: Path, check_interval_seconds: float):
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._snapshot: Optional[CriteriaSnapshot] = None
+        self._next_check = 0.0
+
+    def current(self) -> CriteriaSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+        with self._lock:
+            self._refresh()
+            assert self._snapshot is not None
+            return self._snapshot
+
+    def _refresh(self) -> None:
+        self._next_check = time.monotonic() + self.check_interval_seconds
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._snapshot is None:
+                raise FileNotFoundError("TRIAGE_CRITERIA.md not found at repository root")
+            logger.warning("Criteria file %s disappeared; keeping version %s.", self.path, self._snapshot.version)
+            return
+
+        signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        if signature == self._signature and self._snapshot is not None:
+            return
+
+        text = self.path.read_text(encoding="utf-8")
+        policy = parse_policy(text)
+        version = hashlib.sha256(canonical_text(text).encode("utf-8")).hexdigest()[:12]
+        self._signature = signature
+        if self._snapshot is not None and self._snapshot.version == version:
+            return
+
+        previous = self._snapshot.version if self._snapshot else None
+        self._snapshot = CriteriaSnapshot(
+            text=text,
+            version=version,
+            system_prompt=build_system_prompt(text),
+            loaded_at=time.time(),
+            policy=policy,
+            matchers=compile_matchers(policy),
+        )
+        if previous:
+            logger.info("Reloaded triage criteria: %s -> %s", previous, version)
+
+
+def canonical_text(text: str) -> str:
+    """The criteria text with whitespace runs, blank-line runs and table padding normalised."""
+    lines: List[str] = []
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if line.startswith("|"):
+            cells = [cell.strip() for cell in line.strip("|").split("|")]
+            cells = [_separator_cell(cell) for cell in cells]
+            line = "| " + " | ".join(cells) + " |"
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip() + "\n"
+
+
+def _separator_cell(cell: str) -> str:
+    found = _TABLE_SEPARATOR_CELL.match(cell)
+    return f"{found.group(1)}---{found.group(2)}" if found else cell
+
+
+_provider: Optional[CriteriaProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_criteria_provider() -> CriteriaProvider:
+    global _provider
+    settings = get_settings()
+    path = Path(settings.CRITERIA_PATH) if settings.CRITERIA_PATH else get_repo_root() / "TRIAGE_CRITERIA.md"
+    with _provider_lock:
+        if _provider is None or _provider.path != path:
+            _provider = CriteriaProvider(path, settings.CRITERIA_RELOAD_INTERVAL_SECONDS)
+        return _provider
+
+
+def current_criteria() -> CriteriaSnapshot:
+    return get_criteria_provider().current()
+
+
 def load_triage_criteria() -> str:
-    path = get_repo_root() / "TRIAGE_CRITERIA.md"
-    if not path.exists():
-        raise FileNotFoundError("TRIAGE_CRITERIA.md not found at repository root")
-    return path.read_text(encoding="utf-8")
+    return current_criteria().text
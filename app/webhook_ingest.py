@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from pydantic import ValidationError
+
+from .schemas import GitHubPayload
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+
+class PayloadTooLarge(ValueError):
+    """The webhook body exceeds WEBHOOK_MAX_BODY_BYTES."""
+
+
+class InvalidPayload(ValueError):
+    """The webhook body is not JSON or lacks the fields triage needs."""
+
+
+@dataclass
+class ReceivedBody:
+    raw: bytes
+    # Hex HMAC-SHA256 of `raw` under the webhook secret, or None when no secret was given.
+    digest: Optional[str]
+    hash_seconds: float
+
+
+async def read_body(
+    chunks: AsyncIterator[bytes], max_bytes: int, secret: Optional[str] = None, content_length: Optional[str] = None
+) -> ReceivedBody:
+    """Read a request body chunk by chunk, hashing as it arrives and stopping once it grows past `max_bytes`.
+
+    A declared `Content-Length` over the limit is rejected before anything is read.
+    """
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise PayloadTooLarge(f"Payload of {content_length} bytes exceeds the {max_bytes} byte limit")
+    mac = hmac.new(secret.encode(), digestmod=hashlib.sha256) if secret else None
+    parts = []
+    size = 0
+    hash_seconds = 0.0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        size += len(chunk)
+        if size > max_bytes:
+            raise PayloadTooLarge(f"Payload exceeds the {max_bytes} byte limit")
+        parts.append(chunk)
+        if mac is not None:
+            started = time.perf_counter()
+            mac.update(chunk)
+            hash_seconds += time.perf_counter() - started
+    raw = parts[0] if len(parts) == 1 else b"".join(parts)
+    return ReceivedBody(raw, mac.hexdigest() if mac is not None else None, hash_seconds)
+
+
+def loads(raw: bytes) -> Any:
+    """Decode JSON with orjson when installed, else the standard library."""
+    try:
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError as exc:  # both decoders raise JSONDecodeError, a ValueError
+        raise InvalidPayload(f"Invalid JSON payload: {exc}") from exc
+
+
+def payload_action(data: Any) -> Optional[str]:
+    action = data.get("action") if isinstance(data, dict) else None
+    return action if isinstance(action, str) and action else None
+
+
+def extract_issue_payload(data: Dict[str, Any]) -> GitHubPayload:
+    """Validate only the fields triage uses; the large `repository`, `sender` and `issue` objects are not copied."""
+    repository = data.get("repository")
+    issue = data.get("issue")
+    installation = data.get("installation")
+    if not isinstance(repository, dict) or not isinstance(issue, dict):
+        raise InvalidPayload("Missing required issue fields")
+    fields = {
+        "action": data.get("action"),
+        "repository": {"full_name": repository.get("full_name")},
+        "issue": {
+            "number": issue.get("number"),
+            "title": issue.get("title"),
+            "body": issue.get("body"),
+            "html_url": issue.get("html_url"),
+        },
+    }
+    if isinstance(installation, dict) and installation.get("id") is not None:
+        fields["installation"] = {"id": installation["id"]}
+    try:
+        return GitHubPayload.model_validate(fields)
+    except ValidationError as exc:
+        raise InvalidPayload("Missing required issue fields") from exc
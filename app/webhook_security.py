@@ -6,15 +6,16 @@ from typing import Iterable
 
 
 def verify_signature(raw_body: bytes, secret: str, header_signature: str) -> bool:
+    return signature_matches(hmac.new(secret.encode(), raw_body, hashlib.sha256).hexdigest(), header_signature)
+
+
+def signature_matches(digest: str, header_signature: str | None) -> bool:
+    """Compare an already computed HMAC-SHA256 hex digest with an `X-Hub-Signature-256` header."""
     if not header_signature or "=" not in header_signature:
         return False
-    try:
-        algo, provided_sig = header_signature.split("=", 1)
-    except ValueError:
-        return False
+    algo, provided_sig = header_signature.split("=", 1)
     if algo != "sha256":
         return False
-    digest = hmac.new(secret.encode(), raw_body, hashlib.sha256).hexdigest()
     return hmac.compare_digest(digest, provided_sig)
 
 
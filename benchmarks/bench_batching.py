@@ -0,0 +1,97 @@
+"""Throughput/latency of unbatched vs micro-batched LLM triage under an issue burst.
+
+The backend is MockLLM behind a simulated provider: every request pays a fixed round-trip cost plus a
+per-issue cost, and at most `--connections` requests are in flight at once.
+
+    python benchmarks/bench_batching.py --issues 200 --base-ms 400 --per-issue-ms 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from app.llm.base import BaseLLM
+from app.llm.batching import BATCH_ISSUE_HEADER, BatchingLLM
+from app.llm.mock import MockLLM
+
+
+class SimulatedProviderLLM(MockLLM):
+    def __init__(self, base_ms: float, per_issue_ms: float, connections: int):
+        self.base_seconds = base_ms / 1000
+        self.per_issue_seconds = per_issue_ms / 1000
+        self.connections = connections
+        self.requests = 0
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.connections)
+        issues = max(1, user_prompt.count(BATCH_ISSUE_HEADER))
+        async with self._semaphore:
+            self.requests += 1
+            await asyncio.sleep(self.base_seconds + self.per_issue_seconds * issues)
+        return self.generate(system_prompt, user_prompt)
+
+
+def _user_prompt(index: int) -> str:
+    return (
+        f"Issue Title: Checkout 504s in prod #{index}\n"
+        "Issue Body: Customers report checkout timing out with 504 from the production gateway.\n"
+        "Repository: demo/shop\n"
+        f"Issue URL: https://github.com/demo/shop/issues/{index}"
+    )
+
+
+async def _run(llm: BaseLLM, issues: int) -> Dict[str, float]:
+    latencies: List[float] = []
+
+    async def one(index: int) -> None:
+        started = time.perf_counter()
+        await llm.agenerate("system prompt", _user_prompt(index))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(issues)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "issues_per_second": round(issues / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--base-ms", type=float, default=400.0, help="Simulated per-request round trip")
+    parser.add_argument("--per-issue-ms", type=float, default=30.0, help="Simulated cost per issue in a request")
+    parser.add_argument("--connections", type=int, default=16, help="Max concurrent provider requests")
+    parser.add_argument("--window-ms", type=float, default=50.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("unbatched", "parallel", "prompt"):
+        backend = SimulatedProviderLLM(args.base_ms, args.per_issue_ms, args.connections)
+        llm: BaseLLM = backend
+        if mode != "unbatched":
+            llm = BatchingLLM(backend, window_ms=args.window_ms, max_batch_size=args.batch_size, mode=mode)
+        stats = asyncio.run(_run(llm, args.issues))
+        stats["provider_requests"] = backend.requests
+        results[mode] = stats
+        print(f"{mode:>10}: {stats}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+"""Per-issue latency of the local classifier tier, scoring one issue at a time versus in batches.
+
+Trains a model on synthetic labelled issues (random text over a DevOps vocabulary, with each priority
+drawing more often from its own slice of the vocabulary), memory-maps it the way the service does, and
+times `LocalClassifier.predict` for single issues and for batches of `--batch` issues.
+
+    python benchmarks/bench_classifier.py --examples 1000,10000 --batch 256
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from app.classifier import PRIORITIES, LocalClassifier, issue_text, train
+from app.evaluation import percentile
+
+VOCABULARY = (
+    "checkout payment api gateway timeout production staging deploy rollback database replica lag queue worker "
+    "latency error rate spike customers login session token cache redis kafka consumer disk full node pod crash "
+    "loop memory leak cpu throttling dns certificate expired webhook retry upstream downstream service outage "
+    "dashboard alert pager incident region cluster network packet loss build pipeline flaky test release typo "
+    "docs readme button colour tooltip spacing feature request nice to have refactor lint warning deprecation"
+).split()
+
+
+def _issue(rng: random.Random, priority: str, words: int) -> Tuple[str, str]:
+    third = len(VOCABULARY) // 3
+    start = PRIORITIES.index(priority) * third
+    topical = VOCABULARY[start : start + third]
+
+    def word() -> str:
+        return rng.choice(topical) if rng.random() < 0.6 else rng.choice(VOCABULARY)
+
+    return " ".join(word() for _ in range(8)), " ".join(word() for _ in range(words))
+
+
+def _micros(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {f"p{q}_us": round(percentile(ordered, q) * 1e6, 1) for q in (50, 99)}
+
+
+def run(examples: int, words: int, probes: int, batch: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    labelled = []
+    for number in range(examples):
+        priority = rng.choice(PRIORITIES)
+        labelled.append((f"issue-{number}", issue_text(*_issue(rng, priority, words)), priority))
+    queries = [issue_text(*_issue(rng, rng.choice(PRIORITIES), words)) for _ in range(probes)]
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        train(labelled, Path(model_dir))
+        started = time.perf_counter()
+        classifier = LocalClassifier.load(Path(model_dir))
+        load_ms = (time.perf_counter() - started) * 1e3
+        classifier.predict(queries[:8])  # warm-up
+
+        single = []
+        for text in queries:
+            started = time.perf_counter()
+            classifier.predict([text])
+            single.append(time.perf_counter() - started)
+
+        batched = []
+        for offset in range(0, len(queries), batch):
+            chunk = queries[offset : offset + batch]
+            started = time.perf_counter()
+            classifier.predict(chunk)
+            batched.append((time.perf_counter() - started) / len(chunk))
+
+    return {
+        "examples": examples,
+        "load_ms": round(load_ms, 2),
+        "single": _micros(single),
+        "batched_per_issue_us": round(sum(batched) / len(batched) * 1e6, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", default="1000,10000", help="Comma-separated training set sizes")
+    parser.add_argument("--words", type=int, default=120, help="Words per synthetic issue body")
+    parser.add_argument("--probes", type=int, default=1024, help="Issues scored per case")
+    parser.add_argument("--batch", type=int, default=256, help="Issues per batched predict call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=Path("var/bench/classifier.json"))
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    for examples in [int(size) for size in args.examples.split(",") if size]:
+        case = run(examples, args.words, args.probes, args.batch, args.seed)
+        results[f"examples_{examples}"] = case
+        print(
+            f"{examples:>7} examples: load={case['load_ms']:.2f} ms"
+            f"  single p50={case['single']['p50_us']:>7.1f} us p99={case['single']['p99_us']:>7.1f} us"
+            f"  batch of {args.batch}={case['batched_per_issue_us']:>6.1f} us/issue"
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""Cost of triage history on the request path, writer throughput, and /stats latency as history grows.
+
+Submits synthetic decisions through `HistoryWriter` (what the webhook path pays), waits for the
+background writer to commit them, and times `HistoryStore.stats()` after each round. Because stats
+come from the aggregate tables, their latency should stay flat while the history table grows.
+
+    python benchmarks/bench_history.py --records 10000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.evaluation import percentile
+from app.history import HistoryRecord, HistoryStore, HistoryWriter
+
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+STAGES = ("rules", "cache", "llm", "llm", "llm", "fallback", "near_duplicate")
+
+
+def _micros(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {f"p{q}_us": round(percentile(ordered, q) * 1e6, 1) for q in (50, 99)}
+
+
+def _record(rng: random.Random, now: float) -> HistoryRecord:
+    repo = f"org/repo-{rng.randrange(50)}"
+    return HistoryRecord(
+        recorded_at=now - rng.uniform(0, 30 * 86400),
+        repo=repo,
+        issue_number=rng.randrange(1, 100000),
+        url=None,
+        priority=rng.choice(PRIORITIES),
+        notify_on_call=False,
+        confidence=0.9,
+        decided_by=rng.choice(STAGES),
+        latency_ms=rng.lognormvariate(5, 1),
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", default="10000,100000", help="Cumulative history sizes to measure at")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=Path("var/bench/history.json"))
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(str(Path(directory) / "history.sqlite3"))
+        writer = HistoryWriter(store, batch_size=args.batch_size, flush_interval_seconds=0.05, max_queue=1_000_000)
+        written = 0
+        for target in [int(size) for size in args.records.split(",") if size]:
+            now = time.time()
+            records = [_record(rng, now) for _ in range(target - written)]
+            submit = []
+            started = time.perf_counter()
+            for record in records:
+                before = time.perf_counter()
+                writer.submit(record)
+                submit.append(time.perf_counter() - before)
+            writer.flush()
+            elapsed = time.perf_counter() - started
+            written = target
+
+            stats_times = []
+            for _ in range(50):
+                before = time.perf_counter()
+                store.stats()
+                stats_times.append(time.perf_counter() - before)
+            case = {
+                "records": written,
+                "submit": _micros(submit),
+                "writer_records_per_second": round(len(records) / elapsed),
+                "stats": _micros(stats_times),
+            }
+            results[f"records_{written}"] = case
+            print(
+                f"{written:>8} records:"
+                f"  submit p50={case['submit']['p50_us']:>5.1f} us p99={case['submit']['p99_us']:>6.1f} us"
+                f"  writer={case['writer_records_per_second']:>7}/s"
+                f"  stats p50={case['stats']['p50_us']:>7.1f} us p99={case['stats']['p99_us']:>7.1f} us"
+            )
+        writer.close()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
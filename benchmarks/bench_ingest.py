@@ -0,0 +1,168 @@
+"""Per-request time and allocation of webhook body ingestion: buffered vs streaming.
+
+`buffered` is the previous path: read the whole body, HMAC it in one shot, decode it with the
+standard library and pick fields out of the dicts. `streaming` is `app.webhook_ingest`: the HMAC is
+updated per ASGI chunk, the JSON is decoded once (orjson when installed) and only the fields triage
+uses are validated into `GitHubPayload`. `streaming-stdlib` isolates the decoder's share.
+
+    python benchmarks/bench_ingest.py --body-kb 1,16,64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import hashlib
+import hmac
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app import webhook_ingest
+from app.webhook_ingest import extract_issue_payload, loads, payload_action, read_body
+from app.webhook_security import signature_matches, verify_signature
+
+SECRET = "bench-secret"
+# Starlette hands the body over in chunks of at most this size.
+ASGI_CHUNK = 65536
+
+
+def _user(login: str) -> Dict[str, Any]:
+    base = f"https://api.github.com/users/{login}"
+    return {
+        "login": login,
+        "id": 583231,
+        "node_id": "MDQ6VXNlcjU4MzIzMQ==",
+        "avatar_url": "https://avatars.githubusercontent.com/u/583231?v=4",
+        "type": "User",
+        "site_admin": False,
+        **{f"{name}_url": f"{base}/{name}" for name in ("followers", "following", "gists", "repos", "events")},
+    }
+
+
+def github_payload(body_kb: int) -> bytes:
+    """An `issues.opened` delivery shaped like GitHub's, with a `body_kb` KiB issue body."""
+    repo_api = "https://api.github.com/repos/demo/example"
+    line = "2024-05-01T10:00:00Z ERROR request to upstream failed: connection reset by peer\n"
+    issue = {
+        "url": f"{repo_api}/issues/7",
+        "html_url": "https://github.com/demo/example/issues/7",
+        "id": 2271234567,
+        "number": 7,
+        "title": "Checkout API returning 504 in production",
+        "user": _user("octocat"),
+        "labels": [{"id": i, "name": f"label-{i}", "color": "ededed", "default": False} for i in range(5)],
+        "state": "open",
+        "assignees": [_user("hubot")],
+        "comments": 0,
+        "created_at": "2024-05-01T10:00:00Z",
+        "author_association": "MEMBER",
+        "body": (line * (body_kb * 1024 // len(line) + 1))[: body_kb * 1024],
+        "reactions": {key: 0 for key in ("+1", "-1", "laugh", "hooray", "confused", "heart", "rocket", "eyes")},
+    }
+    repository = {
+        "id": 1296269,
+        "name": "example",
+        "full_name": "demo/example",
+        "private": False,
+        "owner": _user("demo"),
+        "description": "Example repository",
+        "topics": ["infra", "payments", "checkout"],
+        **{f"{name}_url": f"{repo_api}/{name}" for name in ("issues", "pulls", "labels", "hooks", "commits", "tags")},
+        **{key: 0 for key in ("forks_count", "stargazers_count", "watchers_count", "open_issues_count", "size")},
+    }
+    payload = {
+        "action": "opened",
+        "issue": issue,
+        "repository": repository,
+        "sender": _user("octocat"),
+        "installation": {"id": 4242, "node_id": "MDIzOkludGVncmF0aW9uSW5zdGFsbGF0aW9uNDI0Mg=="},
+    }
+    return json.dumps(payload).encode("utf-8")
+
+
+def _signature(body: bytes) -> str:
+    return "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def _chunks(body: bytes):
+    for start in range(0, len(body), ASGI_CHUNK):
+        yield body[start : start + ASGI_CHUNK]
+
+
+async def buffered(body: bytes, signature: str) -> Any:
+    raw = b"".join([chunk async for chunk in _chunks(body)])
+    assert verify_signature(raw, SECRET, signature)
+    data = json.loads(raw)
+    issue = data.get("issue") or {}
+    return (data.get("repository") or {}).get("full_name"), issue.get("number"), issue.get("title"), issue.get("body")
+
+
+async def streaming(body: bytes, signature: str) -> Any:
+    received = await read_body(_chunks(body), 1 << 24, SECRET, str(len(body)))
+    assert signature_matches(received.digest, signature)
+    data = loads(received.raw)
+    assert payload_action(data) == "opened"
+    return extract_issue_payload(data)
+
+
+def _measure(func: Callable[[bytes, str], Any], body: bytes, min_seconds: float) -> Dict[str, float]:
+    signature = _signature(body)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(func(body, signature))
+        iterations, elapsed = 0, 0.0
+        started = time.perf_counter()
+        while elapsed < min_seconds:
+            for _ in range(20):
+                loop.run_until_complete(func(body, signature))
+            iterations += 20
+            elapsed = time.perf_counter() - started
+
+        gc.collect()
+        tracemalloc.start()
+        loop.run_until_complete(func(body, signature))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        loop.close()
+    return {"us_per_request": round(elapsed / iterations * 1e6, 2), "peak_kib_per_request": round(peak / 1024, 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--body-kb", default="1,16,64", help="Comma-separated issue body sizes in KiB")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Minimum timing window per case")
+    parser.add_argument("--output", type=Path, default=Path("var/bench/ingest.json"))
+    args = parser.parse_args()
+
+    fast_decoder = webhook_ingest.orjson
+    print(f"decoder: {'orjson' if fast_decoder is not None else 'json (orjson not installed)'}")
+    results: Dict[str, Dict[str, Any]] = {}
+    sizes: List[int] = [int(size) for size in args.body_kb.split(",") if size]
+    for size in sizes:
+        body = github_payload(size)
+        case: Dict[str, Any] = {"payload_kib": round(len(body) / 1024, 1)}
+        case["buffered"] = _measure(buffered, body, args.min_seconds)
+        case["streaming"] = _measure(streaming, body, args.min_seconds)
+        webhook_ingest.orjson = None
+        try:
+            case["streaming-stdlib"] = _measure(streaming, body, args.min_seconds)
+        finally:
+            webhook_ingest.orjson = fast_decoder
+        results[f"body_{size}kib"] = case
+        print(f"body {size:>4} KiB (payload {case['payload_kib']} KiB)")
+        for name in ("buffered", "streaming", "streaming-stdlib"):
+            stats = case[name]
+            print(f"  {name:>16}: {stats['us_per_request']:>10.2f} us  {stats['peak_kib_per_request']:>9.2f} KiB")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+"""Lookup latency and memory of the near-duplicate index as it fills up.
+
+Indexes synthetic issues (random titles and bodies drawn from a DevOps vocabulary), then times
+`minhash_signature` plus `NearDuplicateIndex.lookup` for fresh issues (misses) and for lightly edited
+copies of indexed ones (hits). The probe alone is reported separately, since signing cost depends on
+the issue's length and not on the index size.
+
+    python benchmarks/bench_near_duplicate.py --entries 1000,10000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.evaluation import percentile
+from app.schemas import TriageResult
+from app.similarity import NearDuplicateIndex, minhash_signature
+
+VOCABULARY = (
+    "checkout payment api gateway timeout production staging deploy rollback database replica lag queue worker "
+    "latency error rate spike customers login session token cache redis kafka consumer disk full node pod crash "
+    "loop memory leak cpu throttling dns certificate expired webhook retry upstream downstream service outage "
+    "dashboard alert pager incident region cluster network packet loss build pipeline flaky test release"
+).split()
+SCOPE = ("demo/example", "criteria-v1")
+RESULT = TriageResult(
+    priority="MEDIUM", notify_on_call=False, labels=["priority:medium"], reasoning="synthetic", confidence=0.5
+)
+
+
+def _issue(rng: random.Random, words: int) -> str:
+    title = " ".join(rng.choice(VOCABULARY) for _ in range(8))
+    return title + "\n" + " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def _edit(rng: random.Random, text: str) -> str:
+    words = text.split(" ")
+    for _ in range(max(1, len(words) // 40)):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def _micros(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {f"p{q}_us": round(percentile(ordered, q) * 1e6, 1) for q in (50, 99)}
+
+
+def run(entries: int, words: int, probes: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    index = NearDuplicateIndex(threshold=0.7, max_entries=entries, window_seconds=1e9)
+    indexed: List[str] = []
+    tracemalloc.start()
+    for number in range(entries):
+        text = _issue(rng, words)
+        index.add(minhash_signature(text), SCOPE, RESULT, f"https://github.com/demo/example/issues/{number}")
+        if len(indexed) < probes:
+            indexed.append(text)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    case: Dict[str, Any] = {"entries": len(index), "index_mib": round(memory / 2**20, 1)}
+    fresh = [_issue(rng, words) for _ in range(probes)]
+    for name, texts in (("miss", fresh), ("hit", [_edit(rng, text) for text in indexed])):
+        total, probe_only, found = [], [], 0
+        for text in texts:
+            started = time.perf_counter()
+            signature = minhash_signature(text)
+            signed = time.perf_counter()
+            match = index.lookup(signature, SCOPE)
+            done = time.perf_counter()
+            total.append(done - started)
+            probe_only.append(done - signed)
+            found += match is not None
+        case[name] = {"lookup": _micros(total), "probe": _micros(probe_only), "matched": found / len(texts)}
+    return case
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", default="1000,10000,100000", help="Comma-separated index sizes")
+    parser.add_argument("--words", type=int, default=120, help="Words per synthetic issue body")
+    parser.add_argument("--probes", type=int, default=500, help="Lookups timed per case")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=Path("var/bench/near_duplicate.json"))
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    for entries in [int(size) for size in args.entries.split(",") if size]:
+        case = run(entries, args.words, args.probes, args.seed)
+        results[f"entries_{entries}"] = case
+        print(f"{entries:>7} issues indexed ({case['index_mib']} MiB)")
+        for name in ("miss", "hit"):
+            stats = case[name]
+            print(
+                f"  {name:>4}: lookup p50={stats['lookup']['p50_us']:>7.1f} us p99={stats['lookup']['p99_us']:>7.1f} us"
+                f"  probe p50={stats['probe']['p50_us']:>6.1f} us p99={stats['probe']['p99_us']:>6.1f} us"
+                f"  matched={stats['matched']:.0%}"
+            )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,242 @@
+"""Latency, throughput and memory of the full webhook pipeline, plus per-stage microbenchmarks.
+
+Requests are sent in-process to `app.main.app` over httpx's ASGI transport (no sockets), signed,
+with DRY_RUN on. The LLM is MockLLM behind a simulated provider with log-normally distributed
+latency. Results go to a JSON file that can be compared against a stored baseline:
+
+    python benchmarks/bench_pipeline.py --output var/bench/pipeline.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+from __future__ import annotations
+
+import os
+
+# Configure before any app module reads settings.
+os.environ.update(
+    {
+        "APP_ENV": "test",
+        "OPENAI_API_KEY": "",
+        "DRY_RUN": "true",
+        "WEBHOOK_SECRET": "bench-secret",
+        "WEBHOOK_ASYNC_MODE": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+)
+
+import argparse
+import asyncio
+import gc
+import hashlib
+import hmac
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from app.agent import _parse_llm_output
+from app.clients import get_client_registry
+from app.demo_payloads import sample_issue_payload
+from app.evaluation import percentile
+from app.llm.mock import MockLLM
+from app.main import app
+from app.prompt_builder import build_prompts
+from app.triage_criteria import load_triage_criteria
+from app.webhook_security import verify_signature
+
+SECRET = os.environ["WEBHOOK_SECRET"]
+
+
+class SimulatedLatencyLLM(MockLLM):
+    """MockLLM answers after a log-normal delay around `median_ms`."""
+
+    def __init__(self, median_ms: float, sigma: float, seed: int = 7):
+        self.median_seconds = median_ms / 1000
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        if self.median_seconds > 0:
+            await asyncio.sleep(self.median_seconds * self._random.lognormvariate(0, self.sigma))
+        return self.generate(system_prompt, user_prompt)
+
+
+def _payload(index: int) -> bytes:
+    # Unique, non-golden text so neither the cache nor the golden shortcut short-circuits the LLM.
+    payload = sample_issue_payload(
+        title=f"Checkout API returning 504 in production for region {index}",
+        body=f"Customers in region {index} see gateway timeouts on checkout since the last deploy; revenue impact.",
+        issue_number=index,
+    )
+    return json.dumps(payload).encode("utf-8")
+
+
+def _headers(body: bytes) -> Dict[str, str]:
+    digest = hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": "issues",
+        "X-Hub-Signature-256": f"sha256={digest}",
+    }
+
+
+async def _drive(client: httpx.AsyncClient, requests: int, concurrency: int, offset: int) -> List[float]:
+    latencies: List[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        body = _payload(offset + index)
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post("/webhook/github", content=body, headers=_headers(body))
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"webhook returned {response.status_code}: {response.text}")
+
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return latencies
+
+
+async def bench_pipeline(levels: List[int], requests: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Any] = {}
+    offset = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _drive(client, 20, 4, offset)  # warm-up: imports, criteria load, client creation
+        offset += 20
+        for concurrency in levels:
+            started = time.perf_counter()
+            latencies = sorted(await _drive(client, requests, concurrency, offset))
+            elapsed = time.perf_counter() - started
+            offset += requests
+
+            # Memory is measured on a separate pass because tracemalloc slows everything down.
+            gc.collect()
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await _drive(client, concurrency, concurrency, offset)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            offset += concurrency
+
+            results[f"c{concurrency}"] = {
+                "requests_per_second": round(requests / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "peak_kib_per_request": round((peak - baseline) / 1024 / concurrency, 2),
+            }
+            print(f"pipeline c={concurrency:>4}: {results[f'c{concurrency}']}")
+    return results
+
+
+def _time_stage(func: Callable[[], Any], min_seconds: float = 0.2) -> float:
+    """Microseconds per call, repeating until at least `min_seconds` has elapsed."""
+    func()
+    iterations, elapsed = 0, 0.0
+    started = time.perf_counter()
+    while elapsed < min_seconds:
+        for _ in range(100):
+            func()
+        iterations += 100
+        elapsed = time.perf_counter() - started
+    return elapsed / iterations * 1e6
+
+
+def bench_stages() -> Dict[str, float]:
+    body = _payload(1)
+    signature = _headers(body)["X-Hub-Signature-256"]
+    payload = json.loads(body)
+    issue = payload["issue"]
+    criteria = load_triage_criteria()
+    system_prompt, user_prompt = build_prompts(
+        criteria, issue["title"], issue["body"], payload["repository"]["full_name"], issue["html_url"]
+    )
+    mock = MockLLM()
+    raw_output = mock.generate(system_prompt, user_prompt)
+
+    stages = {
+        "verify_signature": lambda: verify_signature(body, SECRET, signature),
+        "json_parse": lambda: json.loads(body),
+        "build_prompts": lambda: build_prompts(
+            criteria, issue["title"], issue["body"], payload["repository"]["full_name"], issue["html_url"]
+        ),
+        "parse_llm_output": lambda: _parse_llm_output(raw_output, issue["title"], issue["body"]),
+        "mock_generate": lambda: mock.generate(system_prompt, user_prompt),
+    }
+    results = {}
+    for name, func in stages.items():
+        results[name] = round(_time_stage(func), 3)
+        print(f"stage {name:>18}: {results[name]:.3f} us/op")
+    return results
+
+
+# Metrics where a larger value is better; everything else is a cost.
+_HIGHER_IS_BETTER = ("requests_per_second",)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a line per metric that regressed by more than `tolerance` (a fraction)."""
+    regressions = []
+
+    def walk(cur: Any, base: Any, path: str) -> None:
+        if isinstance(cur, dict) and isinstance(base, dict):
+            for key in cur.keys() & base.keys():
+                walk(cur[key], base[key], f"{path}.{key}" if path else key)
+            return
+        if not isinstance(cur, (int, float)) or not isinstance(base, (int, float)) or base == 0:
+            return
+        change = (cur - base) / base
+        worse = -change if path.rsplit(".", 1)[-1] in _HIGHER_IS_BETTER else change
+        if worse > tolerance:
+            regressions.append(f"{path}: {base} -> {cur} ({change:+.1%})")
+
+    walk({k: v for k, v in current.items() if k != "config"}, baseline, "")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,8,32,128", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--llm-median-ms", type=float, default=5.0, help="Median simulated LLM latency")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Log-normal sigma of the LLM latency")
+    parser.add_argument("--output", type=Path, default=Path("var/bench/pipeline.json"))
+    parser.add_argument("--baseline", type=Path, help="Earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression before failing")
+    args = parser.parse_args()
+
+    get_client_registry()._mock = SimulatedLatencyLLM(args.llm_median_ms, args.llm_sigma)
+    levels = [int(level) for level in args.levels.split(",") if level]
+
+    results = {
+        "config": {
+            "levels": levels,
+            "requests": args.requests,
+            "llm_median_ms": args.llm_median_ms,
+            "llm_sigma": args.llm_sigma,
+            "python": sys.version.split()[0],
+        },
+        "pipeline": asyncio.run(bench_pipeline(levels, args.requests)),
+        "stages_us": bench_stages(),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Per-issue cost of the deterministic rule engine and MockLLM on large issue bodies.
+
+Compares the two RuleEngine strategies on the MockLLM rule set and on a synthetic large keyword set,
+which is where the single-pass regex overtakes per-keyword substring scans.
+
+    python benchmarks/bench_rules.py --body-kb 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict
+
+from app.llm.mock import MOCK_RULES, MockLLM
+from app.rules import KeywordRule, RuleEngine
+
+FILLER = (
+    "request failed after retry connection reset by peer worker queue drained cache miss upstream "
+    "host responded with error while processing payload for tenant account token refreshed"
+).split()
+
+
+def _body(size_kb: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_kb * 1024:
+        word = rng.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _time_ms(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def _synthetic_rules(count: int) -> tuple[KeywordRule, ...]:
+    rng = random.Random(11)
+    alphabet = "abcdefghijklmnopqrstuvwxyz-"
+    keywords = {"".join(rng.choice(alphabet) for _ in range(rng.randint(5, 14))) for _ in range(count)}
+    ordered = sorted(keywords)
+    return tuple(KeywordRule(f"rule_{index}", tuple(ordered[index::20])) for index in range(20))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--body-kb", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--synthetic-keywords", type=int, default=300)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    body = _body(args.body_kb)
+    user_prompt = f"Issue Title: Upstream errors\nIssue Body: {body}\nRepository: demo/repo\nIssue URL: unknown"
+    mock = MockLLM()
+    synthetic = _synthetic_rules(args.synthetic_keywords)
+
+    results: Dict[str, float] = {
+        "mock_generate_ms": _time_ms(lambda: mock.generate("system", user_prompt), args.repeat),
+    }
+    for label, rules in (("mock_rules", MOCK_RULES), ("synthetic_rules", synthetic)):
+        for strategy in ("scan", "regex"):
+            engine = RuleEngine(rules, strategy=strategy)
+            results[f"{label}_{strategy}_ms"] = _time_ms(lambda: engine.match(body), args.repeat)
+        results[f"{label}_auto_strategy"] = RuleEngine(rules).strategy
+
+    print(f"Issue body: {args.body_kb} KB, {len(body.split())} words")
+    for name, value in results.items():
+        print(f"{name:>28}: {value:.3f}" if isinstance(value, float) else f"{name:>28}: {value}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"body_kb": args.body_kb, **results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
 import json
 import os
 import sys
-from collections import Counter, defaultdict
 from pathlib import Path
 
-from app.agent import triage_issue
 from app.config import get_settings
+from app.evaluation import EvalReport, iter_dataset, run_eval
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
 
 
 def ensure_mock_llm() -> None:
@@ -22,49 +25,94 @@ def ensure_mock_llm() -> None:
         pass
 
 
-def load_dataset() -> list[dict]:
-    path = Path(__file__).resolve().parent.parent / "data" / "golden_dataset.json"
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def main() -> int:
-    ensure_mock_llm()
-    dataset = load_dataset()
-    results = []
-    confusion: dict[str, Counter] = defaultdict(Counter)
-
-    for case in dataset:
-        predicted = triage_issue(case["title"], case["description"], repo=None, url=None)
-        expected = case["expected_priority"]
-        confusion[expected][predicted.priority] += 1
-        results.append(
-            {
-                "id": case["id"],
-                "expected": expected,
-                "predicted": predicted.priority,
-                "pass": expected == predicted.priority,
-                "matched_rules": predicted.matched_rules,
-            }
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate triage accuracy, latency and cost on a labelled dataset.")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=REPO_ROOT / "data" / "golden_dataset.json",
+        help="JSON array or .jsonl of cases (id, title, description, expected_priority); streamed, not loaded.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Cases triaged concurrently (default: 8).")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=REPO_ROOT / "var" / "eval" / "results.jsonl",
+        help="Per-case results, written as they complete.",
+    )
+    parser.add_argument("--summary", type=Path, help="Also write the summary as JSON to this path.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print per-case results.")
+    return parser.parse_args(argv)
+
+
+def print_case(record: dict) -> None:
+    status = "PASS" if record["pass"] else "FAIL"
+    print(
+        f"{record['id']}: expected={record['expected']}, predicted={record['predicted']} "
+        f"[{status}] rules={record['matched_rules']}"
+    )
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\nAccuracy: {summary['accuracy']:.2%} over {summary['cases']} cases in {summary['wall_seconds']:.2f}s")
+    latency, llm_latency = summary["latency_ms"], summary["llm_latency_ms"]
+    print(f"Latency ms: p50={latency['p50']:.1f} p95={latency['p95']:.1f} p99={latency['p99']:.1f}")
+    print(f"LLM latency ms: p50={llm_latency['p50']:.1f} p95={llm_latency['p95']:.1f} p99={llm_latency['p99']:.1f}")
+    tokens = summary["tokens_per_case"]
+    print(
+        f"LLM calls/case: {summary['llm_calls_per_case']:.2f}; tokens/case: prompt={tokens['prompt']:.1f} "
+        f"completion={tokens['completion']:.1f} cached={tokens['cached']:.1f}; cost: ${summary['cost_usd']:.4f}"
+    )
+    print(
+        f"Prefix cache: {summary['cached_prompt_ratio']:.1%} of prompt tokens cached; "
+        f"saved ${summary['prefix_cache_savings_usd']:.4f}"
+    )
+
+    print("\nPer-class precision / recall:")
+    for label, metrics in summary["per_class"].items():
+        print(
+            f"{label}: precision={metrics['precision']:.2%} recall={metrics['recall']:.2%} "
+            f"support={metrics['support']}"
         )
 
-    accuracy = sum(1 for r in results if r["pass"]) / len(results)
-
-    print(f"Accuracy: {accuracy:.2%}")
     print("\nConfusion Matrix (expected -> predicted):")
-    for expected, row in confusion.items():
-        print(f"{expected}: {dict(row)}")
+    for expected, row in summary["confusion"].items():
+        print(f"{expected}: {row}")
+
 
-    print("\nPer-case results:")
-    for r in results:
-        status = "PASS" if r["pass"] else "FAIL"
-        print(f"{r['id']}: expected={r['expected']}, predicted={r['predicted']} [{status}] rules={r['matched_rules']}")
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    ensure_mock_llm()
+    settings = get_settings()
+    report = EvalReport(
+        input_price_per_mtok=settings.LLM_PRICE_INPUT_PER_MTOK,
+        output_price_per_mtok=settings.LLM_PRICE_OUTPUT_PER_MTOK,
+        cached_input_price_per_mtok=settings.LLM_PRICE_CACHED_INPUT_PER_MTOK,
+    )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    if not args.quiet:
+        print("Per-case results:")
+    with args.output.open("w", encoding="utf-8") as out:
+        on_result = None if args.quiet else print_case
+        asyncio.run(run_eval(iter_dataset(args.dataset), args.concurrency, out, report, on_result))
+
+    summary = report.summary()
+    print_summary(summary)
+    print(f"\nPer-case results written to {args.output}")
+    if args.summary:
+        args.summary.parent.mkdir(parents=True, exist_ok=True)
+        args.summary.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    if report.cases == 0:
+        print("\nERROR: dataset is empty.")
+        return 1
 
     enforce_perfect = not bool(os.getenv("USE_CHATGPT_FOR_EVAL"))
     if enforce_perfect:
-        return 0 if accuracy == 1.0 else 1
+        return 0 if report.accuracy == 1.0 else 1
 
-    if accuracy < 1.0:
+    if report.accuracy < 1.0:
         print("\nWARNING: Accuracy below 100%; tolerated because USE_CHATGPT_FOR_EVAL is set.")
     return 0
 
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from app.agent import FALLBACK_RULE, LOCAL_CLASSIFIER_RULE
+from app.backlog import read_jsonl_issues
+from app.classifier import DEFAULT_FEATURES, DEFAULT_NEIGHBOURS, issue_text, train
+from app.evaluation import iter_dataset
+from app.triage_criteria import current_criteria
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+Example = Tuple[str, str, str]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the local classifier tier from labelled issues.")
+    parser.add_argument(
+        "datasets",
+        type=Path,
+        nargs="*",
+        default=[REPO_ROOT / "data" / "golden_dataset.json"],
+        help="Golden-format datasets (JSON array or .jsonl with id, title, description, expected_priority).",
+    )
+    parser.add_argument(
+        "--history",
+        type=Path,
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("ISSUES", "RESULTS"),
+        help="A triage-backlog input file and its results; successful triages become examples. Repeatable.",
+    )
+    parser.add_argument("--output", type=Path, default=REPO_ROOT / "var" / "classifier", help="Model directory.")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="Hashed features (power of two).")
+    parser.add_argument("--neighbours", type=int, default=DEFAULT_NEIGHBOURS, help="Neighbours that vote.")
+    return parser.parse_args(argv)
+
+
+def dataset_examples(path: Path) -> Iterator[Example]:
+    for case in iter_dataset(path):
+        priority = case.get("expected_priority") or case.get("priority")
+        if priority:
+            yield str(case["id"]), issue_text(case.get("title") or "", case.get("description")), priority
+
+
+def history_examples(issues: Path, results: Path) -> Iterator[Example]:
+    priorities = {}
+    with results.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not record.get("ok"):
+                continue
+            # Fallbacks are not labels, and the classifier's own answers would only reinforce its mistakes.
+            rules = " ".join(record["triage"].get("matched_rules", []))
+            if FALLBACK_RULE not in rules and LOCAL_CLASSIFIER_RULE not in rules:
+                priorities[record["key"]] = record["triage"]["priority"]
+    for issue in read_jsonl_issues(issues):
+        if issue.key in priorities:
+            yield issue.url or issue.key, issue_text(issue.title, issue.body), priorities[issue.key]
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    examples: List[Example] = []
+    for path in args.datasets:
+        examples.extend(dataset_examples(path))
+    for issues, results in args.history:
+        examples.extend(history_examples(issues, results))
+
+    # The labels follow the criteria in force now (CRITERIA_PATH); the agent ignores the model after an edit.
+    version = current_criteria().version
+    meta = train(examples, args.output, features=args.features, neighbours=args.neighbours, criteria_version=version)
+    counts = ", ".join(f"{label}={count}" for label, count in meta["class_counts"].items())
+    print(f"Trained on {len(meta['example_ids'])} examples ({counts}) for criteria {version}.")
+    print(f"Model written to {args.output}")
+    print(f"Enable it with LOCAL_CLASSIFIER_MODEL_DIR={args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
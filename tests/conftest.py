@@ -2,13 +2,40 @@ import os
 
 import pytest
 
+from app import agent
+from app.cache import reset_triage_cache
+from app.classifier import reset_local_classifier
 from app.config import get_settings
+from app.dedup import reset_delivery_store
+from app.history import reset_history_writer
+from app.llm.mock import MockLLM
+from app.similarity import reset_near_duplicate_index
+from app.storms import reset_storm_aggregator
+from app.tracing import reset_tracer
 
 # Force tests to use the mock LLM even if OPENAI_API_KEY is set in the user's .env.
 os.environ["OPENAI_API_KEY"] = ""
 os.environ["APP_ENV"] = "test"
 
 
+class CountingLLM(MockLLM):
+    def __init__(self, model: str = "mock") -> None:
+        self.model = model
+        self.calls = 0
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        return super().generate(system_prompt, user_prompt)
+
+
+@pytest.fixture
+def counting_llm(monkeypatch):
+    """A mock LLM that counts its calls, used by the agent for the rest of the test."""
+    llm = CountingLLM()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: llm)
+    return llm
+
+
 @pytest.fixture(autouse=True)
 def reset_settings():
     os.environ["OPENAI_API_KEY"] = ""
@@ -17,8 +44,22 @@ def reset_settings():
         get_settings.cache_clear()  # type: ignore[attr-defined]
     except Exception:
         pass
+    reset_triage_cache()
+    reset_delivery_store()
+    reset_near_duplicate_index()
+    reset_storm_aggregator()
+    reset_local_classifier()
+    reset_history_writer()
+    reset_tracer()
     yield
     try:
         get_settings.cache_clear()  # type: ignore[attr-defined]
     except Exception:
         pass
+    reset_triage_cache()
+    reset_delivery_store()
+    reset_near_duplicate_index()
+    reset_storm_aggregator()
+    reset_local_classifier()
+    reset_history_writer()
+    reset_tracer()
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from pathlib import Path
+
+from app import agent
+from app.agent import triage_issue, triage_issue_async
+from app.config import get_settings
+from app.llm.base import BaseLLM
+
+
+class SlowLLM(BaseLLM):
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return json.dumps(
+            {
+                "priority": "MEDIUM",
+                "notify_on_call": False,
+                "labels": ["priority:medium"],
+                "reasoning": "Slow backend.",
+                "confidence": 0.5,
+                "matched_rules": [],
+            }
+        )
+
+
+def test_async_triage_matches_sync_on_golden_dataset():
+    dataset_path = Path(__file__).resolve().parent.parent / "data" / "golden_dataset.json"
+    cases = json.loads(dataset_path.read_text())
+
+    async def run_all():
+        return await asyncio.gather(
+            *(triage_issue_async(case["title"], case["description"], repo=None, url=None) for case in cases)
+        )
+
+    async_results = asyncio.run(run_all())
+    for case, result in zip(cases, async_results):
+        assert result == triage_issue(case["title"], case["description"], repo=None, url=None)
+
+
+def test_async_triage_caps_in_flight_llm_calls(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "3")
+    get_settings.cache_clear()
+    slow = SlowLLM()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: slow)
+    body = "Terraform apply is failing in the staging pipeline since this morning."
+
+    async def run_all():
+        return await asyncio.gather(*(triage_issue_async("Staging pipeline", body, None, None) for _ in range(10)))
+
+    results = asyncio.run(run_all())
+    assert all(result.priority == "MEDIUM" for result in results)
+    assert slow.peak == 3
@@ -0,0 +1,67 @@
+import json
+
+from app.backlog import completed_keys, main
+
+
+def _write_issues(path, count):
+    with path.open("w", encoding="utf-8") as f:
+        for number in range(1, count + 1):
+            f.write(
+                json.dumps(
+                    {
+                        "repo": "org/repo",
+                        "number": number,
+                        "title": f"Staging deploy pipeline failing on step {number}",
+                        "body": "The terraform plan for the staging cluster errors out on every run since Monday.",
+                    }
+                )
+                + "\n"
+            )
+
+
+def _records(path):
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    return records
+
+
+def test_backlog_triages_jsonl_and_resumes(tmp_path, capsys):
+    issues = tmp_path / "issues.jsonl"
+    output = tmp_path / "out" / "results.jsonl"
+    _write_issues(issues, 5)
+    # Simulate a crash: two finished records and a torn third line.
+    output.parent.mkdir()
+    output.write_text(
+        json.dumps({"key": "org/repo#1", "ok": True}) + "\n"
+        + json.dumps({"key": "org/repo#2", "ok": False, "error": "boom"}) + "\n"
+        + '{"key": "org/re',
+        encoding="utf-8",
+    )
+
+    assert main(["--input", str(issues), "--output", str(output), "--workers", "3"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats == {"triaged": 4, "skipped": 1, "failed": 0}
+
+    records = [r for r in _records(output) if "triage" in r]
+    assert sorted(r["issue_number"] for r in records) == [2, 3, 4, 5]
+    assert all(r["triage"]["priority"] == "MEDIUM" for r in records)
+    assert completed_keys(output) == {f"org/repo#{n}" for n in range(1, 6)}
+
+    assert main(["--input", str(issues), "--output", str(output)]) == 0
+    assert json.loads(capsys.readouterr().out) == {"triaged": 0, "skipped": 5, "failed": 0}
+
+
+def test_backlog_apply_uses_execute_actions_in_process_mode(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "true")
+    issues = tmp_path / "issues.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_issues(issues, 2)
+
+    assert main(["--input", str(issues), "--output", str(output), "--mode", "process", "--workers", "2", "--apply"]) == 0
+    records = _records(output)
+    assert {r["actions"]["mode"] for r in records} == {"dry_run"}
+    assert records[0]["actions"]["planned"][0]["label"] == "priority:medium"
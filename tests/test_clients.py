@@ -0,0 +1,41 @@
+import asyncio
+
+from app.clients import ClientRegistry
+from app.config import get_settings
+from app.llm.chatgpt import ChatGPTLLM
+from app.llm.mock import MockLLM
+
+
+def test_registry_reuses_pooled_chatgpt_client(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "local")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_POOL_MAX_CONNECTIONS", "7")
+    get_settings.cache_clear()
+
+    registry = ClientRegistry()
+    first = registry.llm()
+    assert isinstance(first, ChatGPTLLM)
+    assert registry.llm() is first
+
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-4o")
+    get_settings.cache_clear()
+    other_model = registry.llm()
+    assert other_model is not first
+    assert other_model.model == "gpt-4o"
+
+    asyncio.run(registry.aclose())
+    assert registry.llm() is not other_model
+
+
+def test_registry_uses_shared_mock_in_test_env():
+    registry = ClientRegistry()
+    assert isinstance(registry.llm(), MockLLM)
+    assert registry.llm() is registry.llm()
+
+
+def test_registry_reuses_github_client_per_base_url():
+    registry = ClientRegistry()
+    gh = registry.github("https://api.github.com", "token")
+    assert registry.github("https://api.github.com", "token") is gh
+    assert registry.github("https://ghe.example.com/api/v3", "token") is not gh
+    asyncio.run(registry.aclose())
@@ -0,0 +1,65 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.triage_criteria import CriteriaProvider, current_criteria
+
+
+def _write(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_provider_swaps_snapshot_when_file_changes(tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    _write(path, "# Policy v1\nEverything is LOW.", 1_000_000_000)
+    provider = CriteriaProvider(path, check_interval_seconds=0)
+
+    first = provider.current()
+    assert provider.current() is first
+    assert "Everything is LOW." in first.system_prompt
+
+    _write(path, "# Policy v2\nEverything is HIGH.", 2_000_000_000)
+    second = provider.current()
+
+    assert second.version != first.version
+    assert "Everything is HIGH." in second.system_prompt
+    # A request holding the earlier snapshot keeps seeing the version it started with.
+    assert "Everything is LOW." in first.text
+
+
+def test_provider_keeps_last_version_if_file_disappears(tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    _write(path, "# Policy v1", 1_000_000_000)
+    provider = CriteriaProvider(path, check_interval_seconds=0)
+    first = provider.current()
+
+    path.unlink()
+    assert provider.current() is first
+
+
+def test_provider_throttles_stat_checks(tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    _write(path, "# Policy v1", 1_000_000_000)
+    provider = CriteriaProvider(path, check_interval_seconds=3600)
+    first = provider.current()
+
+    _write(path, "# Policy v2 with more text", 2_000_000_000)
+    assert provider.current() is first
+
+
+def test_health_reports_active_criteria_version(monkeypatch, tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    _write(path, "# Policy v1", 1_000_000_000)
+    monkeypatch.setenv("CRITERIA_PATH", str(path))
+    monkeypatch.setenv("CRITERIA_RELOAD_INTERVAL_SECONDS", "0")
+    get_settings.cache_clear()
+
+    client = TestClient(app)
+    version = client.get("/health").json()["criteria_version"]
+    assert version == current_criteria().version
+
+    _write(path, "# Policy v2", 2_000_000_000)
+    assert client.get("/health").json()["criteria_version"] != version
@@ -0,0 +1,80 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import get_settings
+from app.dedup import DeliveryStore, InFlightCoalescer
+from app.main import app
+
+PAYLOAD = {
+    "action": "opened",
+    "repository": {"full_name": "demo/repo"},
+    "issue": {
+        "number": 3,
+        "title": "Staging pipeline failing",
+        "body": "Terraform apply failing in staging environment since the last merge.",
+        "html_url": "https://github.com/demo/repo/issues/3",
+    },
+}
+
+
+def test_redelivery_replays_stored_response(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "true")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    get_settings.cache_clear()
+
+    calls = []
+    original = main.triage_issue_async
+
+    async def counting_triage(*args):
+        calls.append(args)
+        return await original(*args)
+
+    monkeypatch.setattr(main, "triage_issue_async", counting_triage)
+    client = TestClient(app)
+
+    first = client.post("/webhook/github", json=PAYLOAD, headers={"X-GitHub-Delivery": "abc-123"})
+    second = client.post("/webhook/github", json=PAYLOAD, headers={"X-GitHub-Delivery": "abc-123"})
+
+    assert first.status_code == second.status_code == 200
+    assert len(calls) == 1
+    assert second.json()["replayed"] is True
+    assert second.json()["triage"] == first.json()["triage"]
+
+
+def test_concurrent_requests_for_same_key_share_one_run():
+    coalescer = InFlightCoalescer()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def run_all():
+        return await asyncio.gather(
+            coalescer.run(["delivery:a", "issue:demo/repo#1"], work),
+            coalescer.run(["delivery:b", "issue:demo/repo#1"], work),
+        )
+
+    results = asyncio.run(run_all())
+    assert len(runs) == 1
+    assert [coalesced for _, coalesced in results] == [False, True]
+    assert results[0][0] is results[1][0]
+
+
+def test_sqlite_store_shares_claims_and_responses_between_workers(tmp_path):
+    db_path = str(tmp_path / "deliveries.sqlite3")
+    worker_a = DeliveryStore(window_seconds=60, max_entries=10, db_path=db_path)
+    worker_b = DeliveryStore(window_seconds=60, max_entries=10, db_path=db_path)
+
+    assert worker_a.claim("d-1") is True
+    assert worker_b.claim("d-1") is False
+    assert worker_b.lookup("d-1") is None
+
+    worker_a.store("d-1", {"ok": True, "issue_number": 1})
+    assert worker_b.lookup("d-1") == {"ok": True, "issue_number": 1}
+
+    worker_a.close()
+    worker_b.close()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import app.evaluation as evaluation
+from app.evaluation import iter_dataset, percentile, run_eval
+from app.llm.base import BaseLLM
+from app.llm.batching import BatchingLLM
+from app.llm.usage import record_tokens, track_usage
+from app.triage_criteria import get_repo_root
+
+GOLDEN = get_repo_root() / "data" / "golden_dataset.json"
+
+
+def test_iter_dataset_streams_json_array_in_small_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(evaluation, "_CHUNK_SIZE", 7)
+    expected = json.loads(GOLDEN.read_text(encoding="utf-8"))
+    assert list(iter_dataset(GOLDEN)) == expected
+
+    jsonl = tmp_path / "cases.jsonl"
+    jsonl.write_text("\n".join(json.dumps(case) for case in expected[:3]) + "\n", encoding="utf-8")
+    assert list(iter_dataset(jsonl)) == expected[:3]
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_run_eval_reports_accuracy_and_class_metrics(tmp_path):
+    out_path = tmp_path / "results.jsonl"
+    with out_path.open("w", encoding="utf-8") as out:
+        report = asyncio.run(run_eval(iter_dataset(GOLDEN), concurrency=4, out=out))
+
+    summary = report.summary()
+    assert summary["cases"] == 30
+    assert summary["accuracy"] == 1.0
+    assert summary["per_class"]["HIGH"]["recall"] == 1.0
+    assert summary["latency_ms"]["p99"] >= summary["latency_ms"]["p50"]
+    assert len(out_path.read_text(encoding="utf-8").splitlines()) == 30
+
+
+class _MeteredLLM(BaseLLM):
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        record_tokens(prompt_tokens=100, completion_tokens=20)
+        return json.dumps({"results": [{"priority": "LOW", "index": 0}, {"priority": "LOW", "index": 1}]})
+
+
+def test_batched_usage_is_split_across_callers():
+    llm = BatchingLLM(_MeteredLLM(), window_ms=50, max_batch_size=2, mode="prompt")
+
+    async def one(prompt):
+        with track_usage() as usage:
+            await llm.agenerate("sys", prompt)
+        return usage
+
+    async def main():
+        return await asyncio.gather(one("a"), one("b"))
+
+    first, second = asyncio.run(main())
+    assert first.prompt_tokens == second.prompt_tokens == 50
+    assert first.completion_tokens == 10
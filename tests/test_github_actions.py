@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import httpx
+
+from app.agent import execute_actions
+from app.clients import ClientRegistry
+from app.config import get_settings
+from app.github_client import GitHubAPIError, GitHubClient
+from app.github_ratelimit import GitHubWriteScheduler, TokenBucket
+from app.metrics import GITHUB_WRITE_RETRIES, GITHUB_WRITES
+from app.schemas import TriageResult
+
+
+def _result(priority="HIGH"):
+    return TriageResult(
+        priority=priority,
+        notify_on_call=priority == "HIGH",
+        labels=[f"priority:{priority.lower()}"],
+        reasoning="Production outage.",
+        confidence=0.9,
+        matched_rules=["HIGH: Production impact"],
+    )
+
+
+def _fake_github(handler):
+    transport = httpx.MockTransport(handler)
+    return GitHubClient("https://api.github.test", "tkn", httpx.AsyncClient(transport=transport))
+
+
+def test_live_actions_write_label_and_comment_without_lookups(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "false")
+    monkeypatch.setenv("GITHUB_TOKEN", "tkn")
+    get_settings.cache_clear()
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path, json.loads(request.content or b"null")))
+        assert request.headers["Authorization"] == "Bearer tkn"
+        if request.method == "GET":
+            return httpx.Response(200, json=[])
+        if request.url.path.endswith("/comments"):
+            return httpx.Response(201, json={"id": 7, "html_url": "https://github.test/c/7"})
+        return httpx.Response(200, json=[{"name": "priority:high"}])
+
+    client = _fake_github(handler)
+    monkeypatch.setattr(ClientRegistry, "github", lambda self, base_url, token: client)
+
+    actions = asyncio.run(execute_actions(_result(), "org/repo", 42, "https://github.test/org/repo/issues/42"))
+
+    assert sorted((method, path) for method, path, _ in requests) == [
+        ("GET", "/repos/org/repo/issues/42/comments"),
+        ("POST", "/repos/org/repo/issues/42/comments"),
+        ("POST", "/repos/org/repo/issues/42/labels"),
+    ]
+    assert {"labels": ["priority:high"]} in [payload for _, _, payload in requests]
+    assert actions["applied_label"] == {"label": "priority:high"}
+    assert actions["comment"] == {"id": 7, "url": "https://github.test/c/7"}
+    assert actions["notification"] == "sent"
+
+
+def test_partial_failure_does_not_post_the_comment_twice(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "false")
+    monkeypatch.setenv("GITHUB_TOKEN", "tkn")
+    get_settings.cache_clear()
+    comments = []
+    label_failures = [1]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/labels"):
+            if label_failures:
+                label_failures.pop()
+                return httpx.Response(502, json={"message": "Bad Gateway"})
+            return httpx.Response(200, json=[{"name": "priority:high"}])
+        if request.method == "GET":
+            return httpx.Response(200, json=comments)
+        comment = {"id": len(comments) + 1, "html_url": "u", "body": json.loads(request.content)["body"]}
+        comments.append(comment)
+        return httpx.Response(201, json=comment)
+
+    client = _fake_github(handler)
+    monkeypatch.setattr(ClientRegistry, "github", lambda self, base_url, token: client)
+    url = "https://github.test/org/repo/issues/42"
+
+    try:
+        asyncio.run(execute_actions(_result(), "org/repo", 42, url))
+    except GitHubAPIError as exc:
+        assert exc.status_code == 502
+    else:
+        raise AssertionError("expected the failed label write to raise")
+    assert len(comments) == 1
+
+    retried = asyncio.run(execute_actions(_result(), "org/repo", 42, url))
+
+    assert len(comments) == 1
+    assert retried["comment"]["id"] == 1
+    assert retried["applied_label"] == {"label": "priority:high"}
+
+
+def test_github_error_status_raises():
+    client = _fake_github(lambda request: httpx.Response(404, json={"message": "Not Found"}))
+    try:
+        asyncio.run(client.add_labels("org/missing", 1, ["priority:low"]))
+    except GitHubAPIError as exc:
+        assert exc.status_code == 404
+        assert "Not Found" in str(exc)
+    else:
+        raise AssertionError("expected GitHubAPIError")
+
+
+def test_rate_limited_write_is_retried_and_counted():
+    scheduler = GitHubWriteScheduler(
+        rate_per_minute=6000, burst=5, max_retries=3, backoff_seconds=0.001, backoff_max_seconds=0.01
+    )
+    calls = []
+    retries_before = GITHUB_WRITE_RETRIES.value()
+    limited_before = GITHUB_WRITES.value(status="429")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"message": "secondary rate limit"})
+        return httpx.Response(201, json={"id": 1, "html_url": "u"}, headers={"X-RateLimit-Remaining": "4000"})
+
+    client = GitHubClient(
+        "https://api.github.test", "tkn", httpx.AsyncClient(transport=httpx.MockTransport(handler)), scheduler
+    )
+    comment = asyncio.run(client.create_comment("org/repo", 1, "hi", installation_id=99))
+
+    assert comment["id"] == 1
+    assert len(calls) == 2
+    assert GITHUB_WRITE_RETRIES.value() == retries_before + 1
+    assert GITHUB_WRITES.value(status="429") == limited_before + 1
+    assert "installation:99" in scheduler._buckets
+
+
+def test_token_bucket_paces_and_pauses():
+    bucket = TokenBucket(rate_per_second=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.05 < waits[2] <= 0.1 < waits[3] <= 0.2
+
+    bucket.observe(remaining=0, reset_in=30)
+    assert bucket.reserve() > 29
+
+    other = TokenBucket(rate_per_second=10, capacity=2)
+    other.observe(remaining=100, reset_in=1000)
+    assert other.rate == 0.1
@@ -0,0 +1,120 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.history import HistoryRecord, HistoryStore, HistoryWriter, bucket_percentile, get_history_writer
+from app.main import app
+from app.metrics import HISTORY_RECORDS
+
+
+def _record(repo="demo/example", number=1, priority="LOW", decided_by="llm", latency_ms=40.0, at=1_700_000_000.0):
+    return HistoryRecord(
+        recorded_at=at,
+        repo=repo,
+        issue_number=number,
+        url=f"https://github.com/{repo}/issues/{number}",
+        priority=priority,
+        notify_on_call=priority == "HIGH",
+        confidence=0.9,
+        decided_by=decided_by,
+        latency_ms=latency_ms,
+    )
+
+
+def test_aggregates_are_maintained_per_batch(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.write_batch([_record(priority="HIGH", decided_by="rules", latency_ms=3.0), _record(number=2)])
+    store.write_batch(
+        [
+            _record(number=1, priority="MEDIUM", latency_ms=800.0, at=1_700_000_100.0),
+            _record(repo="demo/other", decided_by="fallback", latency_ms=40.0),
+        ]
+    )
+
+    stats = store.stats()
+    assert stats["total"] == 4
+    assert stats["priorities"] == {"HIGH": 1, "LOW": 2, "MEDIUM": 1}
+    assert stats["decided_by"] == {"rules": 1, "llm": 2, "fallback": 1}
+    assert stats["fallback_rate"] == 0.25 and stats["llm_call_rate"] == 0.75
+    assert stats["repos"]["demo/example"]["total"] == 3
+    assert stats["repos"]["demo/other"]["fallback_rate"] == 1.0
+    assert stats["latency_ms"]["mean"] == 220.8
+    assert 25 < stats["latency_ms"]["p50"] <= 50 and 500 < stats["latency_ms"]["p99"] <= 1000
+
+    only_other = store.stats(repo="demo/other")
+    assert only_other["total"] == 1 and list(only_other["repos"]) == ["demo/other"]
+
+    decisions = store.issue_history("demo/example", 1)
+    assert [decision["priority"] for decision in decisions] == ["MEDIUM", "HIGH"]
+    store.close()
+
+
+def test_bucket_percentile_interpolates_within_bucket():
+    counts = [0] * 14
+    counts[1] = 10  # all between 5 and 10 ms
+
+    assert bucket_percentile(counts, 50) == 7.5
+    assert bucket_percentile(counts, 100) == 10.0
+    assert bucket_percentile([0] * 14, 50) is None
+
+
+def test_writer_batches_and_drops_instead_of_blocking(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    release = threading.Event()
+    batches = []
+    write_batch = store.write_batch
+
+    def slow_write(records):
+        release.wait(5)
+        batches.append(len(records))
+        write_batch(records)
+
+    store.write_batch = slow_write
+    writer = HistoryWriter(store, batch_size=1, flush_interval_seconds=0.01, max_queue=2)
+    dropped = HISTORY_RECORDS.value(outcome="dropped")
+
+    accepted = [writer.submit(_record(number=number)) for number in range(1, 5)]
+
+    assert accepted.count(False) >= 1
+    assert HISTORY_RECORDS.value(outcome="dropped") == dropped + accepted.count(False)
+    release.set()
+    assert writer.flush(timeout=5)
+    assert sum(batches) == accepted.count(True) == store.stats()["total"]
+    writer.close()
+
+
+def test_stats_endpoint_serves_recorded_triage(tmp_path, monkeypatch):
+    monkeypatch.setenv("HISTORY_DB_PATH", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setenv("DRY_RUN", "true")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    monkeypatch.setenv("ALLOWED_ACTIONS", "opened")
+    get_settings.cache_clear()
+    client = TestClient(app)
+    bodies = {
+        1: "The shared-vpc-01 network is dropping packets for every service in the production cluster right now.",
+        2: "The staging deploy pipeline fails on the terraform plan step since Monday for every single run.",
+    }
+    for number, body in bodies.items():
+        payload = {
+            "action": "opened",
+            "repository": {"full_name": "demo/example"},
+            "issue": {"number": number, "title": f"Issue {number}", "body": body},
+        }
+        assert client.post("/webhook/github", json=payload).status_code == 200
+    assert get_history_writer().flush(timeout=5)
+
+    stats = client.get("/stats").json()
+    assert stats["total"] == 2
+    assert stats["priorities"]["HIGH"] == 1
+    assert stats["decided_by"]["rules"] == 1
+    assert stats["latency_ms"]["p50"] is not None
+    assert sum(stats["daily"][-1]["priorities"].values()) == 2
+
+    history = client.get("/history/demo/example/1").json()
+    assert history["decisions"][0]["decided_by"] == "rules"
+    assert history["decisions"][0]["notification"] == "on"
+
+
+def test_stats_endpoint_is_off_without_history_db():
+    assert TestClient(app).get("/stats").status_code == 404
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.jobs import JobLeaseLostError, JobQueue
+from app.main import app
+
+
+def test_async_mode_acknowledges_and_completes_job(monkeypatch, tmp_path):
+    monkeypatch.setenv("DRY_RUN", "true")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    monkeypatch.setenv("WEBHOOK_ASYNC_MODE", "true")
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("JOB_POLL_INTERVAL_SECONDS", "0.05")
+    get_settings.cache_clear()
+
+    payload = {
+        "action": "opened",
+        "repository": {"full_name": "demo/repo"},
+        "issue": {
+            "number": 7,
+            "title": "Staging pipeline failing",
+            "body": "Terraform apply failing in staging environment since the last merge.",
+            "html_url": "https://github.com/demo/repo/issues/7",
+        },
+    }
+
+    with TestClient(app) as client:
+        response = client.post("/webhook/github", json=payload, headers={"X-GitHub-Delivery": "delivery-1"})
+        assert response.status_code == 202, response.text
+        assert response.json()["status_url"] == "/jobs/delivery-1"
+
+        redelivery = client.post("/webhook/github", json=payload, headers={"X-GitHub-Delivery": "delivery-1"})
+        assert redelivery.status_code == 202
+        assert redelivery.json()["duplicate"] is True
+
+        deadline = time.monotonic() + 5
+        status = {}
+        while time.monotonic() < deadline:
+            status = client.get("/jobs/delivery-1").json()
+            if status["status"] == "done":
+                break
+            time.sleep(0.02)
+
+    assert status["status"] == "done"
+    assert status["attempts"] == 1
+    assert status["result"]["triage"]["priority"] == "MEDIUM"
+
+
+def test_job_queue_retries_then_dead_letters(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    assert queue.enqueue("d-1", {"title": "x"}) is True
+    assert queue.enqueue("d-1", {"title": "x"}) is False
+
+    job = queue.claim()
+    assert job is not None and job.attempts == 1
+    assert queue.fail(job, "boom", max_attempts=2, retry_delay=0) is False
+    assert queue.get("d-1")["status"] == "queued"
+
+    job = queue.claim()
+    assert job is not None and job.attempts == 2
+    assert queue.fail(job, "boom again", max_attempts=2, retry_delay=0) is True
+    assert queue.get("d-1")["status"] == "dead"
+    assert queue.dead_letters()[0]["last_error"] == "boom again"
+    assert queue.claim() is None
+    queue.close()
+
+
+def test_workers_sharing_a_queue_only_requeue_their_own_or_expired_jobs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobQueue(path, lease_seconds=60, worker_id="first")
+    second = JobQueue(path, lease_seconds=60, worker_id="second")
+    first.enqueue("d-1", {"title": "x"})
+    first.enqueue("d-2", {"title": "y"})
+    assert first.claim().delivery_id == "d-1"
+    assert second.claim().delivery_id == "d-2"
+
+    # The second worker restarting or stopping must not touch the job the first one is running.
+    assert second.requeue_expired() == 0
+    assert second.requeue_owned() == 1
+    assert first.get("d-1")["status"] == "running"
+    assert second.claim().delivery_id == "d-2"
+
+    # Once the first worker stops renewing (crash), its lease lapses and the job can be taken over.
+    crashed = JobQueue(path, lease_seconds=-1, worker_id="first")
+    assert crashed.renew_leases() == 1
+    job = second.claim()
+    assert job is not None and job.delivery_id == "d-1" and job.attempts == 2
+    for queue in (first, second, crashed):
+        queue.close()
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    stalled = JobQueue(path, lease_seconds=-1, worker_id="stalled")
+    healthy = JobQueue(path, lease_seconds=60, worker_id="healthy")
+    stalled.enqueue("d-1", {"title": "x"})
+    stale = stalled.claim()
+    taken_over = healthy.claim()
+    assert taken_over is not None and taken_over.attempts == 2
+
+    with pytest.raises(JobLeaseLostError):
+        stalled.complete(stale, {"ok": True})
+    with pytest.raises(JobLeaseLostError):
+        stalled.fail(stale, "boom", max_attempts=1, retry_delay=0)
+    with pytest.raises(JobLeaseLostError):
+        stalled.fail(stale, "boom", max_attempts=5, retry_delay=0)
+    assert healthy.get("d-1")["status"] == "running"
+    assert healthy.dead_letters() == []
+
+    healthy.complete(taken_over, {"ok": True})
+    assert healthy.get("d-1")["status"] == "done"
+    for queue in (stalled, healthy):
+        queue.close()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from app.agent import _parse_llm_output, triage_issue, triage_issue_async
+from app.config import get_settings
+from app.llm.batching import BatchingLLM, split_batch_output
+from app.llm.mock import MockLLM
+
+ISSUES = [
+    ("Prod checkout down", "Checkout returns 504 in production for all customers since 10:00 UTC."),
+    ("Staging pipeline", "Terraform apply is failing in the staging pipeline since this morning."),
+    ("Wiki typo", "The onboarding documentation page has a broken link to the VPN guide."),
+]
+
+
+class CountingMock(MockLLM):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        return self.generate(system_prompt, user_prompt)
+
+
+def _prompt(title: str, body: str) -> str:
+    return f"Issue Title: {title}\nIssue Body: {body}\nRepository: demo/repo\nIssue URL: unknown"
+
+
+def test_prompt_mode_sends_one_call_per_window():
+    backend = CountingMock()
+    batching = BatchingLLM(backend, window_ms=20, max_batch_size=10, mode="prompt")
+
+    async def run_all():
+        return await asyncio.gather(*(batching.agenerate("system", _prompt(t, b)) for t, b in ISSUES))
+
+    outputs = asyncio.run(run_all())
+    assert backend.calls == 1
+    for (title, body), output in zip(ISSUES, outputs):
+        assert json.loads(output) == json.loads(backend.generate("system", _prompt(title, body)))
+
+
+def test_parallel_mode_flushes_when_batch_is_full():
+    backend = CountingMock()
+    batching = BatchingLLM(backend, window_ms=10_000, max_batch_size=3, mode="parallel")
+
+    async def run_all():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batching.agenerate("system", _prompt(t, b)) for t, b in ISSUES)), timeout=1
+        )
+
+    outputs = asyncio.run(run_all())
+    assert backend.calls == 3
+    assert all(outputs)
+
+
+def test_malformed_item_only_falls_back_for_that_issue():
+    item = {
+        "index": 1,
+        "priority": "MEDIUM",
+        "notify_on_call": False,
+        "labels": ["priority:medium"],
+        "reasoning": "Staging pipeline.",
+        "confidence": 0.8,
+        "matched_rules": [],
+    }
+    raw = json.dumps({"results": [item, "not an object"]})
+    outputs = split_batch_output(raw, 2)
+    assert outputs[0] == ""
+    assert _parse_llm_output(outputs[0], "t", "b").matched_rules == ["Fallback:InvalidLLMOutput"]
+    assert _parse_llm_output(outputs[1], "t", "b").priority == "MEDIUM"
+    assert split_batch_output("not json", 2) is None
+
+
+def test_batched_agent_matches_unbatched(monkeypatch):
+    monkeypatch.setenv("LLM_BATCH_ENABLED", "true")
+    monkeypatch.setenv("LLM_BATCH_WINDOW_MS", "5")
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+    async def run_all():
+        return await asyncio.gather(*(triage_issue_async(t, b, "demo/repo", None) for t, b in ISSUES))
+
+    batched = asyncio.run(run_all())
+    assert batched == [triage_issue(t, b, "demo/repo", None) for t, b in ISSUES]
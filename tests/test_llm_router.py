@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+
+from app import agent
+from app.agent import triage_issue_async
+from app.config import get_settings
+from app.llm.base import BaseLLM
+from app.llm.batching import BatchingLLM
+from app.llm.mock import MockLLM
+from app.llm.router import CircuitBreaker, LLMRouter, RouteBackend, parse_backend_specs, served_by_last_resort
+from app.metrics import LLM_HEDGES
+
+ANSWER = json.dumps(
+    {
+        "priority": "MEDIUM",
+        "notify_on_call": False,
+        "labels": ["priority:medium"],
+        "reasoning": "Answered by a real backend.",
+        "confidence": 0.7,
+        "matched_rules": [],
+    }
+)
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self, output=ANSWER, delay=0.0, error=None):
+        self.output, self.delay, self.error = output, delay, error
+        self.calls = 0
+
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+def _backend(name, llm, timeout=1.0, failures=3, reset=30.0, clock=time.monotonic, last_resort=False):
+    return RouteBackend(name, llm, timeout, CircuitBreaker(failures, reset, clock), last_resort=last_resort)
+
+
+def _route(router):
+    async def run():
+        output = await router.agenerate("system", "user")
+        return output, served_by_last_resort()
+
+    return asyncio.run(run())
+
+
+def test_fails_over_on_errors_and_empty_answers():
+    broken, empty, good = FakeLLM(error=RuntimeError("503")), FakeLLM(output=""), FakeLLM()
+    mock = _backend("mock", MockLLM(), last_resort=True)
+    router = LLMRouter([_backend("a", broken), _backend("b", empty), _backend("c", good), mock])
+
+    output, last_resort = _route(router)
+    assert output == ANSWER and last_resort is False
+    assert (broken.calls, empty.calls, good.calls) == (1, 1, 1)
+
+
+def test_breaker_skips_failing_backend_until_reset():
+    now = [0.0]
+    primary = FakeLLM(error=RuntimeError("down"))
+    router = LLMRouter(
+        [
+            _backend("primary", primary, failures=2, reset=30, clock=lambda: now[0]),
+            _backend("mock", MockLLM(), last_resort=True),
+        ]
+    )
+
+    for _ in range(3):
+        output, last_resort = _route(router)
+        assert output and last_resort is True
+    assert primary.calls == 2  # the third call skipped the open breaker
+
+    now[0] = 31.0
+    primary.error = None
+    output, last_resort = _route(router)
+    assert output == ANSWER and last_resort is False
+    assert router.backends[0].breaker.state == "closed"
+
+
+def test_timeout_bounds_latency_of_a_stalled_backend():
+    router = LLMRouter([_backend("stalled", FakeLLM(delay=5), timeout=0.05), _backend("backup", FakeLLM())])
+    started = time.perf_counter()
+    output, _ = _route(router)
+    assert output == ANSWER
+    assert time.perf_counter() - started < 1
+
+
+def test_hedges_to_next_backend_after_p95():
+    primary, secondary = FakeLLM(delay=0.001), FakeLLM(delay=0.001)
+    router = LLMRouter([_backend("primary", primary, timeout=5), _backend("secondary", secondary)], hedge=True)
+
+    async def run():
+        for _ in range(25):  # learn the primary's latency distribution
+            await router.agenerate("system", "user")
+        # Warm-up calls can be hedged too on a loaded machine; count from here on.
+        primary.delay, secondary.calls = 2.0, 0
+        before = LLM_HEDGES.value(backend="secondary")
+        started = time.perf_counter()
+        output = await router.agenerate("system", "user")
+        return output, time.perf_counter() - started, before
+
+    output, elapsed, before = asyncio.run(run())
+    assert output == ANSWER
+    assert elapsed < 1
+    assert secondary.calls == 1
+    assert LLM_HEDGES.value(backend="secondary") == before + 1
+
+
+def test_hedging_respects_half_open_probes():
+    now = [0.0]
+    primary, secondary = FakeLLM(delay=0.3), FakeLLM()
+    backends = [_backend("primary", primary, failures=1, clock=lambda: now[0]), _backend("secondary", secondary)]
+    for backend in backends:
+        backend.latencies.extend([0.01] * 25)
+    backends[0].breaker.record_failure()
+    now[0] = 31.0  # half-open: the next call to primary is its probe
+
+    alone = LLMRouter(backends[:1], hedge=True)
+    before = LLM_HEDGES.value(backend="primary")
+    assert _route(alone) == (ANSWER, False)
+    assert primary.calls == 1 and LLM_HEDGES.value(backend="primary") == before
+
+    backends[0].breaker.record_failure()
+    now[0] = 62.0
+    router = LLMRouter(backends, hedge=True)
+    assert _route(router) == (ANSWER, False)
+    assert secondary.calls == 1
+    # The cancelled primary attempt held the probe and gave it back.
+    assert backends[0].breaker.admit() == "probe"
+
+
+def test_last_resort_flag_reaches_callers_through_batching():
+    async def triage(llm, user_prompt):
+        output = await llm.agenerate("system", user_prompt)
+        return bool(output), served_by_last_resort()
+
+    async def run(llm):
+        return await asyncio.gather(triage(llm, "first issue"), triage(llm, "second issue"))
+
+    for mode in ("prompt", "parallel"):
+        primary = FakeLLM(error=RuntimeError("down"))
+        router = LLMRouter([_backend("primary", primary), _backend("mock", MockLLM(), last_resort=True)])
+        batching = BatchingLLM(router, window_ms=5, max_batch_size=8, mode=mode)
+        assert asyncio.run(run(batching)) == [(True, True), (True, True)]
+
+        primary.error = None
+        if mode == "prompt":
+            primary.output = json.dumps({"results": [json.loads(ANSWER) | {"index": i} for i in range(2)]})
+        assert asyncio.run(run(batching)) == [(True, False), (True, False)]
+
+
+def test_parse_backend_specs():
+    specs = parse_backend_specs("gpt-4o-mini||8, gpt-4o|https://proxy.example/v1", "unused", 20.0)
+    assert [(s.model, s.base_url, s.timeout_seconds) for s in specs] == [
+        ("gpt-4o-mini", None, 8.0),
+        ("gpt-4o", "https://proxy.example/v1", 20.0),
+    ]
+    assert specs[1].name == "gpt-4o@proxy.example"
+    assert parse_backend_specs("", "gpt-4o-mini", 20.0)[0].model == "gpt-4o-mini"
+
+
+def test_last_resort_answers_are_not_cached(monkeypatch):
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    primary = FakeLLM(error=RuntimeError("down"))
+    router = LLMRouter([_backend("primary", primary), _backend("mock", MockLLM(), last_resort=True)])
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: router)
+    title, body = "Search results are stale", "Search results on the docs site show pages deleted last week in staging."
+
+    asyncio.run(triage_issue_async(title, body, None, None))
+    primary.error = None
+    result = asyncio.run(triage_issue_async(title, body, None, None))
+
+    assert primary.calls == 2
+    assert result.reasoning == "Answered by a real backend."
@@ -0,0 +1,112 @@
+import json
+
+from app.agent import LOCAL_CLASSIFIER_RULE, triage_issue
+from app.backlog import main as backlog_main
+from app.classifier import LocalClassifier, get_local_classifier, issue_text, train
+from app.config import get_settings
+from app.metrics import LLM_CALLS_AVOIDED, LOCAL_CLASSIFIER_DECISIONS
+from app.triage_criteria import current_criteria
+
+EXAMPLES = [
+    ("docs-1", "Typo in the README install section", "The README says pip instal instead of pip install.", "LOW"),
+    ("docs-2", "Typo in the contributing guide", "The guide says pull reqest instead of pull request.", "LOW"),
+    ("docs-3", "Broken link in the README", "The README link to the architecture docs returns a 404.", "LOW"),
+    ("ci-1", "Staging deploy pipeline failing", "The staging deploy fails on the terraform plan step.", "MEDIUM"),
+    ("ci-2", "Flaky integration tests block staging", "Staging deploys are blocked by flaky tests.", "MEDIUM"),
+    ("ci-3", "Staging cluster rollout stuck", "The staging rollout is stuck waiting for pods to start.", "MEDIUM"),
+]
+TYPO_TITLE = "Typo in the README quickstart section"
+TYPO_BODY = "The README quickstart says pip instal instead of pip install."
+
+
+def _train(tmp_path, criteria_version=None):
+    model_dir = tmp_path / "model"
+    rows = [(key, issue_text(title, body), priority) for key, title, body, priority in EXAMPLES]
+    train(rows, model_dir, criteria_version=criteria_version or current_criteria().version)
+    return model_dir
+
+
+def _enable(monkeypatch, model_dir, threshold):
+    monkeypatch.setenv("LOCAL_CLASSIFIER_MODEL_DIR", str(model_dir))
+    monkeypatch.setenv("LOCAL_CLASSIFIER_THRESHOLD", str(threshold))
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+
+def test_memory_mapped_model_scores_batches_like_single_issues(tmp_path):
+    classifier = LocalClassifier.load(_train(tmp_path))
+    texts = [issue_text(TYPO_TITLE, TYPO_BODY), issue_text("Staging deploy pipeline stuck", "Terraform plan fails.")]
+
+    batch = classifier.predict(texts)
+
+    assert [prediction.priority for prediction in batch] == ["LOW", "MEDIUM"]
+    assert batch[0].neighbour == "docs-1" and batch[0].confidence > 0.5
+    assert batch == [classifier.predict([text])[0] for text in texts]
+    assert classifier.example_terms.filename is not None  # np.memmap, not a copy
+
+
+def test_confident_prediction_answers_without_llm(tmp_path, counting_llm, monkeypatch):
+    _enable(monkeypatch, _train(tmp_path), threshold=0.5)
+    answered = LOCAL_CLASSIFIER_DECISIONS.value(outcome="answered")
+    avoided = LLM_CALLS_AVOIDED.value(reason="local_classifier")
+
+    result = triage_issue(TYPO_TITLE, TYPO_BODY, "demo/example", None)
+
+    assert counting_llm.calls == 0
+    assert result.priority == "LOW" and not result.notify_on_call
+    assert result.matched_rules == [f"{LOCAL_CLASSIFIER_RULE} nearest labelled issue docs-1"]
+    assert LOCAL_CLASSIFIER_DECISIONS.value(outcome="answered") == answered + 1
+    assert LLM_CALLS_AVOIDED.value(reason="local_classifier") == avoided + 1
+
+
+def test_low_confidence_defers_to_llm(tmp_path, counting_llm, monkeypatch):
+    _enable(monkeypatch, _train(tmp_path), threshold=0.99)
+    deferred = LOCAL_CLASSIFIER_DECISIONS.value(outcome="deferred")
+
+    result = triage_issue(TYPO_TITLE, TYPO_BODY, "demo/example", None)
+
+    assert counting_llm.calls == 1
+    assert not any(rule.startswith(LOCAL_CLASSIFIER_RULE) for rule in result.matched_rules)
+    assert LOCAL_CLASSIFIER_DECISIONS.value(outcome="deferred") == deferred + 1
+
+
+def test_model_trained_for_other_criteria_defers_to_llm(tmp_path, counting_llm, monkeypatch):
+    _enable(monkeypatch, _train(tmp_path, criteria_version="0" * 12), threshold=0.5)
+    stale = LOCAL_CLASSIFIER_DECISIONS.value(outcome="stale")
+
+    result = triage_issue(TYPO_TITLE, TYPO_BODY, "demo/example", None)
+
+    assert counting_llm.calls == 1
+    assert not any(rule.startswith(LOCAL_CLASSIFIER_RULE) for rule in result.matched_rules)
+    assert LOCAL_CLASSIFIER_DECISIONS.value(outcome="stale") == stale + 1
+
+
+def test_tier_is_off_without_model_and_survives_a_bad_one(tmp_path, monkeypatch):
+    assert get_local_classifier() is None
+
+    monkeypatch.setenv("LOCAL_CLASSIFIER_MODEL_DIR", str(tmp_path / "missing"))
+    get_settings.cache_clear()
+    assert get_local_classifier() is None
+
+
+def test_backlog_scores_issues_in_one_batch(tmp_path, monkeypatch, capsys):
+    _enable(monkeypatch, _train(tmp_path), threshold=0.5)
+    classifier = get_local_classifier()
+    batches = []
+    predict = classifier.predict
+    monkeypatch.setattr(classifier, "predict", lambda texts: batches.append(len(texts)) or predict(texts))
+    issues, output = tmp_path / "issues.jsonl", tmp_path / "results.jsonl"
+    issues.write_text(
+        "".join(
+            json.dumps({"repo": "org/repo", "number": n, "title": TYPO_TITLE, "body": TYPO_BODY}) + "\n"
+            for n in range(1, 6)
+        ),
+        encoding="utf-8",
+    )
+
+    assert backlog_main(["--input", str(issues), "--output", str(output)]) == 0
+    assert json.loads(capsys.readouterr().out)["triaged"] == 5
+
+    assert batches == [5]
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert all(record["triage"]["matched_rules"][0].startswith(LOCAL_CLASSIFIER_RULE) for record in records)
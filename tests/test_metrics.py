@@ -0,0 +1,90 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from app import agent
+from app.agent import triage_issue
+from app.config import get_settings
+from app.demo_payloads import sample_issue_payload
+from app.llm.mock import MockLLM
+from app.main import app
+from app.metrics import (
+    LLM_CALL_SECONDS,
+    LLM_FALLBACKS,
+    WEBHOOK_REQUESTS,
+    MetricsRegistry,
+    MultiprocessMetrics,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="llm")
+
+    text = registry.render()
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 3' in text
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 4' in text
+    assert 'stage_seconds_sum{stage="llm"} 4.05' in text
+    assert 'stage_seconds_count{stage="llm"} 4' in text
+
+
+def test_multiprocess_render_merges_workers(tmp_path):
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total", "Hits.", ("route",))
+    gauge = registry.gauge("depth", "Depth.")
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(1.0,))
+    counter.inc(2, route="a")
+    gauge.set(3)
+    histogram.observe(0.5)
+
+    # Another worker's snapshot (a live pid) and one from a worker that has exited.
+    other = {"hits_total": [[["a"], 5.0]], "depth": [[[], 4.0]], "latency_seconds": [[[], [0.0, 1.0, 7.0]]]}
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(other), encoding="utf-8")
+    (tmp_path / "999999999.json").write_text(json.dumps({"depth": [[[], 100.0]]}), encoding="utf-8")
+
+    text = MultiprocessMetrics(str(tmp_path), registry, flush_interval_seconds=60).render()
+    assert 'hits_total{route="a"} 7' in text
+    assert "depth 7" in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert "latency_seconds_count 2" in text
+    assert "latency_seconds_sum 7.5" in text
+
+
+def test_webhook_and_llm_metrics_are_recorded(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "true")
+    get_settings.cache_clear()
+    before_triaged = WEBHOOK_REQUESTS.value(action="opened", outcome="triaged")
+    before_ignored = WEBHOOK_REQUESTS.value(action="closed", outcome="ignored")
+    before_calls = LLM_CALL_SECONDS.count(backend="MockLLM", model="none")
+    client = TestClient(app)
+
+    payload = sample_issue_payload(
+        title="Checkout API 504s in production",
+        body="Customers cannot complete checkout since this morning, the production gateway returns 504s.",
+    )
+    assert client.post("/webhook/github", json=payload, headers={"X-GitHub-Event": "issues"}).status_code == 200
+    closed = {**payload, "action": "closed"}
+    client.post("/webhook/github", json=closed, headers={"X-GitHub-Event": "issues"})
+
+    assert WEBHOOK_REQUESTS.value(action="opened", outcome="triaged") == before_triaged + 1
+    assert WEBHOOK_REQUESTS.value(action="closed", outcome="ignored") == before_ignored + 1
+    assert LLM_CALL_SECONDS.count(backend="MockLLM", model="none") == before_calls + 1
+    text = client.get("/metrics").text
+    assert "triage_webhook_request_seconds_bucket" in text
+    assert 'triage_results_total{priority="HIGH"}' in text
+
+
+class _BrokenLLM(MockLLM):
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        return "not json"
+
+
+def test_fallback_is_counted(monkeypatch):
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: _BrokenLLM())
+    before = LLM_FALLBACKS.value(reason="invalid_json")
+    triage_issue("Pipeline flaky", "The nightly pipeline in staging fails intermittently on the deploy step.", None, None)
+    assert LLM_FALLBACKS.value(reason="invalid_json") == before + 1
@@ -0,0 +1,119 @@
+from app.agent import triage_issue
+from app.config import get_settings
+from app.metrics import LLM_CALLS_AVOIDED
+from app.schemas import TriageResult
+from app.similarity import NearDuplicateIndex, get_near_duplicate_index, minhash_signature, signature_similarity
+from app.triage_criteria import RULE_D, current_criteria
+
+OUTAGE_TITLE = "Checkout API returning 504 in production"
+OUTAGE_BODY = (
+    "Since 10:02 UTC the checkout API returns 504 Gateway Timeout for most requests in prod. "
+    "Customers cannot complete payment and support is getting tickets. Started right after deploy 4711."
+)
+REPHRASED_BODY = (
+    "Since 10:07 UTC the checkout API returns 504 Gateway Timeout for most requests in prod. "
+    "Customers cannot complete payment and support keeps getting tickets! Started right after deploy 4712."
+)
+
+
+def _result(priority: str = "HIGH") -> TriageResult:
+    return TriageResult(
+        priority=priority,
+        notify_on_call=priority == "HIGH",
+        labels=[f"priority:{priority.lower()}"],
+        reasoning="outage",
+        confidence=0.9,
+    )
+
+
+def _enable(monkeypatch):
+    monkeypatch.setenv("NEAR_DUPLICATE_ENABLED", "true")
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+
+def test_signature_similarity_tracks_text_overlap():
+    original = minhash_signature(f"{OUTAGE_TITLE}\n{OUTAGE_BODY}")
+    rephrased = minhash_signature(f"{OUTAGE_TITLE}\n{REPHRASED_BODY}")
+    unrelated = minhash_signature("Docs typo in README\nThe install section says pip instal instead of pip install.")
+
+    assert signature_similarity(original, minhash_signature(f"{OUTAGE_TITLE}\n{OUTAGE_BODY}")) == 1.0
+    assert signature_similarity(original, rephrased) >= 0.7
+    assert signature_similarity(original, unrelated) < 0.2
+    assert minhash_signature(" ... !!! ") is None
+
+
+def test_index_is_scoped_and_bounded():
+    now = [0.0]
+    index = NearDuplicateIndex(threshold=0.7, max_entries=2, window_seconds=60, clock=lambda: now[0])
+    signature = minhash_signature(f"{OUTAGE_TITLE}\n{OUTAGE_BODY}")
+    index.add(signature, ("demo/example", "v1"), _result(), "https://github.com/demo/example/issues/1")
+
+    match = index.lookup(signature, ("demo/example", "v1"))
+    assert match is not None and match.origin.endswith("/issues/1") and match.similarity == 1.0
+    assert index.lookup(signature, ("demo/other", "v1")) is None
+    assert index.lookup(signature, ("demo/example", "v2")) is None
+
+    for number in (2, 3):
+        index.add(minhash_signature(f"unrelated issue number {number} " * number), ("demo/example", "v1"), _result(), "x")
+    assert len(index) == 2
+    assert index.lookup(signature, ("demo/example", "v1")) is None  # evicted by size
+
+    index.add(signature, ("demo/example", "v1"), _result(), "y")
+    now[0] = 61.0
+    assert index.lookup(signature, ("demo/example", "v1")) is None  # expired
+    assert len(index) == 0
+
+
+def test_near_duplicate_issue_reuses_prior_result(counting_llm, monkeypatch):
+    _enable(monkeypatch)
+    before = LLM_CALLS_AVOIDED.value(reason="near_duplicate")
+    first_url = "https://github.com/demo/example/issues/1"
+
+    first = triage_issue(OUTAGE_TITLE, OUTAGE_BODY, "demo/example", first_url)
+    second = triage_issue(OUTAGE_TITLE, REPHRASED_BODY, "demo/example", "https://github.com/demo/example/issues/2")
+
+    assert counting_llm.calls == 1
+    assert LLM_CALLS_AVOIDED.value(reason="near_duplicate") == before + 1
+    assert second.priority == first.priority and second.labels == first.labels
+    assert second.matched_rules[:-1] == first.matched_rules
+    assert second.matched_rules[-1].startswith(f"Near-duplicate of {first_url} (similarity ")
+
+
+def test_vague_near_duplicate_still_gets_rule_d(counting_llm, monkeypatch):
+    monkeypatch.setenv("RULES_FIRST_ENABLED", "false")
+    _enable(monkeypatch)
+    title, body = "Checkout down", "504 in prod"
+    signature = minhash_signature(f"{title}\n{body}")
+    get_near_duplicate_index().add(signature, ("demo/example", current_criteria().version), _result(), "earlier")
+
+    result = triage_issue(title, body, "demo/example", None)
+
+    assert counting_llm.calls == 0
+    assert result.priority == "LOW" and not result.notify_on_call
+    assert result.matched_rules[0].startswith("Near-duplicate of earlier") and result.matched_rules[-1] == RULE_D
+
+
+def test_distinct_issues_and_other_repos_still_call_the_llm(counting_llm, monkeypatch):
+    _enable(monkeypatch)
+
+    triage_issue(OUTAGE_TITLE, OUTAGE_BODY, "demo/example", "https://github.com/demo/example/issues/1")
+    triage_issue(OUTAGE_TITLE, OUTAGE_BODY, "demo/other", "https://github.com/demo/other/issues/1")
+    triage_issue(
+        "Dashboard chart colors are hard to read",
+        "The staging dashboard uses low contrast colors for the latency panel, which is hard to read on projectors.",
+        "demo/example",
+        "https://github.com/demo/example/issues/3",
+    )
+
+    assert counting_llm.calls == 3
+
+
+def test_near_duplicate_index_is_off_by_default(counting_llm, monkeypatch):
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+    triage_issue(OUTAGE_TITLE, OUTAGE_BODY, "demo/example", None)
+    triage_issue(OUTAGE_TITLE, REPHRASED_BODY, "demo/example", None)
+
+    assert counting_llm.calls == 2
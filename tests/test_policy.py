@@ -0,0 +1,95 @@
+import os
+
+from app.agent import triage_issue
+from app.config import get_settings
+from app.policy import parse_policy
+from app.triage_criteria import CriteriaProvider, get_repo_root
+
+POLICY = """# Test Policy
+
+## Mission
+Keep things running.
+
+## 1. Priority Definitions
+
+| Priority | Criteria | Target Action |
+| :-- | :-- | :-- |
+| **HIGH** | Outages. | Page. |
+| **LOW** | Everything else. | Backlog. |
+
+## 2. Technical Scope & Labels
+- **HIGH:** Affects `Production` or `Core-Mesh`.
+- **LOW:** Affects `Sandbox` environments.
+
+## 3. Mandatory Rules
+
+### Rule C: Critical Infrastructure Protection
+Any issue mentioning the following components must be marked **HIGH** automatically:
+- `edge-router-7`
+
+### Rule D: Insufficient Information
+If an issue contains fewer than 4 words, mark as **LOW**.
+
+## Appendix
+Free-form notes for maintainers.
+"""
+
+
+def test_parse_repo_criteria():
+    policy = parse_policy((get_repo_root() / "TRIAGE_CRITERIA.md").read_text(encoding="utf-8"))
+
+    assert policy.critical_components == ("shared-vpc-01", "root-dns-zone", "global-iam-policy")
+    assert policy.min_words == 10
+    assert "Transit-Gateway" in policy.scope_keywords("HIGH")
+    assert [r.rule_id for r in policy.rules] == ["A", "B", "C", "D"]
+
+
+def test_snapshot_version_ignores_cosmetic_edits(tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    path.write_text(POLICY, encoding="utf-8")
+    first = CriteriaProvider(path, check_interval_seconds=0).current()
+
+    path.write_text(POLICY.replace("| :-- | :-- | :-- |", "|:------|:------|:-----|") + "\n\n", encoding="utf-8")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    second = CriteriaProvider(path, check_interval_seconds=0).current()
+
+    assert second.version == first.version
+    assert second.matchers.min_words == 4
+
+
+def test_edits_outside_parsed_structure_reach_prompt_and_version(tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    path.write_text(POLICY, encoding="utf-8")
+    first = CriteriaProvider(path, check_interval_seconds=0).current()
+    table_end = "| **LOW** | Everything else. | Backlog. |\n"
+    scope_end = "- **LOW:** Affects `Sandbox` environments.\n"
+    edits = {
+        "priority prose": (table_end, table_end + "\nBilling is never LOW.\n"),
+        "scope prose": (scope_end, scope_end + "Staging counts as Sandbox.\n"),
+        "non-rule block": ("## Appendix", "### Escalation notes\nPage twice at night.\n\n## Appendix"),
+    }
+
+    for name, (old, new) in edits.items():
+        assert old in POLICY, name
+        added = new.replace(old, "").strip().splitlines()[-1]
+        path.write_text(POLICY.replace(old, new), encoding="utf-8")
+        os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+        edited = CriteriaProvider(path, check_interval_seconds=0).current()
+
+        assert edited.version != first.version, name
+        assert added in edited.system_prompt, name
+
+
+def test_rules_first_follows_policy_file(monkeypatch, tmp_path):
+    path = tmp_path / "TRIAGE_CRITERIA.md"
+    path.write_text(POLICY, encoding="utf-8")
+    monkeypatch.setenv("CRITERIA_PATH", str(path))
+    get_settings.cache_clear()
+
+    result = triage_issue("edge-router-7 flapping", "Packets dropped on the west link.", "org/repo", None)
+    assert result.priority == "HIGH"
+    assert result.matched_rules == ["Rule C: Critical Infrastructure Protection"]
+
+    # Five words clears this policy's Rule D threshold of four.
+    result = triage_issue("Sandbox quota request", "please raise it", "org/repo", None)
+    assert "Rule D: Insufficient Information" not in result.matched_rules
@@ -0,0 +1,85 @@
+from app import agent
+from app.agent import triage_issue
+from app.config import get_settings
+from app.llm.chatgpt import ChatGPTLLM
+from app.llm.mock import MockLLM
+from app.llm.usage import LLMUsage, record_tokens
+from app.metrics import LLM_CACHED_PROMPT_RATIO, LLM_COST_USD, LLM_PREFIX_CACHE_SAVINGS_USD
+from app.prompt_builder import build_prompts, build_system_prompt, prompt_prefix_key
+from app.triage_criteria import current_criteria
+
+
+class _CachingLLM(MockLLM):
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        self.prompts.append((system_prompt, user_prompt))
+        record_tokens(prompt_tokens=2000, completion_tokens=100, cached_tokens=1500)
+        return super().generate(system_prompt, user_prompt)
+
+
+def test_system_prompt_is_a_byte_stable_prefix_without_issue_content():
+    criteria = current_criteria().text
+    first_system, first_user = build_prompts(criteria, "Checkout down", "500s in prod", "demo/example", None)
+    second_system, second_user = build_prompts(criteria, "Typo in docs", "README typo", "demo/other", None)
+
+    assert first_system == second_system
+    assert first_system.encode() == build_system_prompt(criteria + "\n").encode()
+    assert prompt_prefix_key(first_system) == prompt_prefix_key(second_system)
+    for issue_text in ("Checkout down", "500s in prod", "demo/example"):
+        assert issue_text not in first_system
+        assert issue_text in first_user
+    assert not any(line != line.rstrip() for line in first_system.splitlines())
+
+
+def test_prefix_key_follows_the_criteria_version():
+    criteria = current_criteria().text
+    assert prompt_prefix_key(build_system_prompt(criteria)) != prompt_prefix_key(
+        build_system_prompt(criteria + "\n- LOW: cosmetic issues")
+    )
+
+
+def test_chatgpt_request_carries_prompt_cache_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    get_settings.cache_clear()
+    llm = ChatGPTLLM()
+    system_prompt = build_system_prompt(current_criteria().text)
+
+    kwargs = llm._request_kwargs(system_prompt, "Issue Title: x")
+
+    assert kwargs["messages"][0] == {"role": "system", "content": system_prompt}
+    assert kwargs["extra_body"] == {"prompt_cache_key": f"triage-{prompt_prefix_key(system_prompt)}"}
+
+    monkeypatch.setenv("LLM_PROMPT_CACHE_KEY_ENABLED", "false")
+    get_settings.cache_clear()
+    assert "extra_body" not in ChatGPTLLM()._request_kwargs(system_prompt, "Issue Title: x")
+
+
+def test_cached_input_tokens_are_priced_separately():
+    usage = LLMUsage(prompt_tokens=2_000_000, completion_tokens=1_000_000, cached_tokens=1_000_000)
+
+    assert usage.cached_ratio == 0.5
+    assert usage.cost(1.0, 4.0) == 6.0
+    assert usage.cost(1.0, 4.0, 0.25) == 5.25
+
+
+def test_prefix_cache_utilization_and_cost_are_exported(monkeypatch):
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    monkeypatch.setenv("LLM_PRICE_INPUT_PER_MTOK", "1.0")
+    monkeypatch.setenv("LLM_PRICE_OUTPUT_PER_MTOK", "4.0")
+    monkeypatch.setenv("LLM_PRICE_CACHED_INPUT_PER_MTOK", "0.5")
+    get_settings.cache_clear()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: _CachingLLM())
+    labels = {"backend": "_CachingLLM", "model": "none"}
+    before_ratio = LLM_CACHED_PROMPT_RATIO.count(**labels), LLM_CACHED_PROMPT_RATIO.sum(**labels)
+    before_cost = LLM_COST_USD.value(**labels)
+    before_savings = LLM_PREFIX_CACHE_SAVINGS_USD.value(**labels)
+
+    triage_issue("Pipeline flaky", "The nightly pipeline in staging fails intermittently on the deploy step.", None, None)
+
+    assert LLM_CACHED_PROMPT_RATIO.count(**labels) == before_ratio[0] + 1
+    assert abs(LLM_CACHED_PROMPT_RATIO.sum(**labels) - before_ratio[1] - 0.75) < 1e-9
+    # 500 uncached + 1500 cached prompt tokens and 100 completion tokens.
+    assert abs(LLM_COST_USD.value(**labels) - before_cost - 0.00165) < 1e-12
+    assert abs(LLM_PREFIX_CACHE_SAVINGS_USD.value(**labels) - before_savings - 0.00075) < 1e-12
@@ -0,0 +1,46 @@
+import pytest
+
+from app.llm.mock import MOCK_RULES
+from app.rules import KeywordRule, RuleEngine
+
+RULES = (
+    KeywordRule("prod", ("prod ", "production")),
+    KeywordRule("non_prod", ("non-prod",)),
+    KeywordRule("docs", ("doc", "documentation")),
+    KeywordRule("critical", ("shared-vpc-01", "root-dns-zone")),
+)
+
+
+@pytest.mark.parametrize("strategy", ["scan", "regex"])
+def test_overlapping_and_prefix_keywords_all_match(strategy):
+    engine = RuleEngine(RULES, strategy=strategy)
+    # "prod " starts inside "non-prod", and "doc" is a prefix of "documentation".
+    assert engine.match("Non-prod env is broken; see Documentation") == {"prod", "non_prod", "docs"}
+    assert engine.match("nothing relevant here") == frozenset()
+
+
+@pytest.mark.parametrize("strategy", ["scan", "regex"])
+def test_strategies_agree_with_substring_semantics(strategy):
+    engine = RuleEngine(MOCK_RULES, strategy=strategy)
+    text = "Checkout timeout in PRODUCTION; not blocking production for staging. Terraform docs on shared-vpc-01."
+    expected = {rule.name for rule in MOCK_RULES if any(keyword in text.lower() for keyword in rule.keywords)}
+    assert engine.match(text) == expected
+
+    lazy = engine.lazy_match(text)
+    assert {rule.name for rule in MOCK_RULES if rule.name in lazy} == expected
+
+
+def test_auto_strategy_switches_to_regex_for_large_rule_sets():
+    assert RuleEngine(MOCK_RULES).strategy == "scan"
+    many = [KeywordRule(f"r{index}", (f"keyword-{index:03d}",)) for index in range(200)]
+    engine = RuleEngine(many)
+    assert engine.strategy == "regex"
+    assert engine.match("saw keyword-007 and keyword-123") == {"r7", "r123"}
+
+
+def test_matched_keywords_reports_components():
+    engine = RuleEngine(RULES)
+    assert engine.matched_keywords("Root-DNS-Zone and shared-vpc-01 down", "critical") == [
+        "shared-vpc-01",
+        "root-dns-zone",
+    ]
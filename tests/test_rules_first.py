@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+
+from app.agent import triage_issue
+from app.config import get_settings
+from app.main import app
+from app.metrics import LLM_CALLS_AVOIDED
+
+
+def test_rule_c_component_is_high_without_llm(counting_llm):
+    before = LLM_CALLS_AVOIDED.value(reason="rule_c")
+
+    result = triage_issue(
+        "Route table question",
+        "Could someone double check the route tables attached to Shared-VPC-01 before our change window?",
+        None,
+        None,
+    )
+
+    assert counting_llm.calls == 0
+    assert result.priority == "HIGH"
+    assert result.notify_on_call is True
+    assert result.matched_rules == ["Rule C: Critical Infrastructure Protection"]
+    assert "shared-vpc-01" in result.reasoning
+    assert LLM_CALLS_AVOIDED.value(reason="rule_c") == before + 1
+
+
+def test_rule_d_beats_rule_c_for_vague_issues(counting_llm):
+    result = triage_issue("root-dns-zone broken", "help", None, None)
+
+    assert counting_llm.calls == 0
+    assert result.priority == "LOW"
+    assert result.matched_rules == ["Rule D: Insufficient Information"]
+
+
+def test_ambiguous_issue_still_calls_llm(counting_llm):
+    triage_issue("Staging pipeline", "Terraform apply is failing in the staging pipeline since this morning.", None, None)
+    assert counting_llm.calls == 1
+
+
+def test_rules_first_can_be_disabled(counting_llm, monkeypatch):
+    monkeypatch.setenv("RULES_FIRST_ENABLED", "false")
+    get_settings.cache_clear()
+
+    result = triage_issue("Help", "Broken", None, None)
+    assert counting_llm.calls == 1
+    assert result.priority == "LOW"
+
+
+def test_metrics_endpoint_reports_avoided_calls():
+    triage_issue("Help", "Broken", None, None)
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert 'triage_llm_calls_avoided_total{reason="rule_d"}' in response.text
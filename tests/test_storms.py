@@ -0,0 +1,191 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agent import execute_actions
+from app.clients import ClientRegistry
+from app.config import get_settings
+from app.github_client import GitHubAPIError, GitHubClient
+from app.main import app
+from app.metrics import STORM_EVENTS
+from app.schemas import TriageResult
+from app.storms import StormAggregator
+from app.triage_criteria import RULE_C
+
+
+def _high(rules=(RULE_C,)):
+    return TriageResult(
+        priority="HIGH",
+        notify_on_call=True,
+        labels=["priority:high"],
+        reasoning="Critical infrastructure.",
+        confidence=0.95,
+        matched_rules=list(rules),
+    )
+
+
+def _payload(number: int, body: str) -> dict:
+    return {
+        "action": "opened",
+        "repository": {"full_name": "demo/example"},
+        "issue": {
+            "number": number,
+            "title": f"Outage report {number}",
+            "body": body,
+            "html_url": f"https://github.com/demo/example/issues/{number}",
+        },
+    }
+
+
+def test_storm_pages_once_and_aggregates_within_window():
+    now = [0.0]
+    storms = StormAggregator(window_seconds=60, max_active=8, max_issues=2, clock=lambda: now[0])
+
+    first = storms.record(RULE_C, "shared-vpc-01", "issue-1")
+    now[0] = 50.0
+    second = storms.record(RULE_C, "shared-vpc-01", "issue-2")
+    now[0] = 100.0  # 50s after the last issue: still the same storm
+    third = storms.record(RULE_C, "shared-vpc-01", "issue-3")
+    other = storms.record(RULE_C, "root-dns-zone", "issue-4")
+
+    assert first.notify and not second.notify and not third.notify and other.notify
+    assert first.storm_id == second.storm_id == third.storm_id != other.storm_id
+    assert third.count == 3
+    active = {storm["component"]: storm for storm in storms.snapshot()["active"]}
+    assert active["shared-vpc-01"]["issues"] == ["issue-2", "issue-3"]
+    assert active["shared-vpc-01"]["issues_truncated"] is True
+
+    now[0] = 161.0
+    snapshot = storms.snapshot()
+    assert snapshot["active"] == []
+    assert [storm["count"] for storm in snapshot["recent"]] == [1, 3]
+    assert storms.record(RULE_C, "shared-vpc-01", "issue-5").notify  # a new storm pages again
+
+
+def test_repeated_issue_does_not_grow_storm():
+    storms = StormAggregator(window_seconds=60, max_active=8, max_issues=10, clock=lambda: 0.0)
+
+    opener = storms.record(RULE_C, "shared-vpc-01", "issue-1")
+    joined = storms.record(RULE_C, "shared-vpc-01", "issue-2")
+    opener_again = storms.record(RULE_C, "shared-vpc-01", "issue-1")
+    joined_again = storms.record(RULE_C, "shared-vpc-01", "issue-2")
+
+    assert opener.notify and opener_again.notify and opener_again.repeat
+    assert not joined.notify and not joined_again.notify and joined_again.repeat
+    assert opener_again.count == joined_again.count == 2
+    assert storms.snapshot()["active"][0]["issues"] == ["issue-1", "issue-2"]
+
+
+def test_long_storm_keeps_bounded_issue_memory():
+    storms = StormAggregator(window_seconds=60, max_active=8, max_issues=3, clock=lambda: 0.0)
+
+    for number in range(1000):
+        update = storms.record(RULE_C, "shared-vpc-01", f"issue-{number}")
+
+    storm = storms._active[(RULE_C, "shared-vpc-01")]
+    assert update.count == 1000
+    assert len(storm.issues) == len(storm.members) == 3
+    assert storm.members == {"issue-997", "issue-998", "issue-999"}
+    assert storms.record(RULE_C, "shared-vpc-01", "issue-999").repeat
+
+
+def test_failed_github_writes_leave_storm_untouched(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "false")
+    monkeypatch.setenv("GITHUB_TOKEN", "tkn")
+    get_settings.cache_clear()
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json=[])
+        attempts.append(request.url.path)
+        if len(attempts) <= 2:
+            return httpx.Response(502, json={"message": "Bad Gateway"})
+        if request.url.path.endswith("/comments"):
+            return httpx.Response(201, json={"id": 7, "html_url": "https://github.test/c/7"})
+        return httpx.Response(200, json=[{"name": "priority:high"}])
+
+    client = GitHubClient("https://api.github.test", "tkn", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(ClientRegistry, "github", lambda self, base_url, token: client)
+    url = "https://github.test/demo/example/issues/1"
+
+    with pytest.raises(GitHubAPIError):
+        asyncio.run(execute_actions(_high(), "demo/example", 1, url, components=["shared-vpc-01"]))
+    retried = asyncio.run(execute_actions(_high(), "demo/example", 1, url, components=["shared-vpc-01"]))
+
+    assert retried["notification"] == "sent"
+    assert retried["storm"]["count"] == 1
+
+
+def test_active_storms_are_bounded():
+    storms = StormAggregator(window_seconds=60, max_active=2, max_issues=10, clock=lambda: 0.0)
+    for component in ("a", "b", "c"):
+        storms.record(RULE_C, component, f"issue-{component}")
+
+    snapshot = storms.snapshot()
+    assert [storm["component"] for storm in snapshot["active"]] == ["c", "b"]
+    assert [storm["component"] for storm in snapshot["recent"]] == ["a"]
+
+
+def test_execute_actions_aggregates_notifications_per_component():
+    before = STORM_EVENTS.value(outcome="aggregated")
+
+    async def run():
+        issues = ((1, ["shared-vpc-01"]), (2, ["shared-vpc-01"]), (3, ["root-dns-zone"]))
+        return [
+            await execute_actions(_high(), "demo/example", number, f"issue-{number}", components=components)
+            for number, components in issues
+        ]
+
+    first, second, third = asyncio.run(run())
+
+    assert first["notification"] == "on" and first["storm"]["count"] == 1
+    assert second["notification"] == "aggregated"
+    assert second["storm"] == {"id": first["storm"]["id"], "count": 2}
+    assert third["notification"] == "on" and third["storm"]["id"] != first["storm"]["id"]
+    assert STORM_EVENTS.value(outcome="aggregated") == before + 1
+
+
+def test_issues_without_component_always_page():
+    async def run():
+        rules = ["HIGH: Production impact"]
+        return [await execute_actions(_high(rules), "demo/example", number, f"issue-{number}") for number in (1, 2)]
+
+    results = asyncio.run(run())
+
+    assert [result["notification"] for result in results] == ["on", "on"]
+    assert all("storm" not in result for result in results)
+
+
+def test_storms_endpoint_reports_running_storm(monkeypatch):
+    monkeypatch.setenv("DRY_RUN", "true")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    monkeypatch.setenv("ALLOWED_ACTIONS", "opened")
+    get_settings.cache_clear()
+    client = TestClient(app)
+    body = "The shared-vpc-01 network is dropping packets for every service in the production cluster right now."
+
+    responses = [client.post("/webhook/github", json=_payload(number, body)).json() for number in (1, 2, 3)]
+
+    assert [response["actions"]["notification"] for response in responses] == ["on", "aggregated", "aggregated"]
+    storms = client.get("/storms").json()
+    assert len(storms["active"]) == 1
+    storm = storms["active"][0]
+    assert (storm["rule"], storm["component"], storm["count"]) == (RULE_C, "shared-vpc-01", 3)
+    assert storm["issues"][-1] == "https://github.com/demo/example/issues/3"
+
+
+def test_storm_aggregation_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("STORM_AGGREGATION_ENABLED", "false")
+    get_settings.cache_clear()
+
+    async def run():
+        return [
+            await execute_actions(_high(), "demo/example", number, "", components=["shared-vpc-01"])
+            for number in (1, 2)
+        ]
+
+    assert [actions["notification"] for actions in asyncio.run(run())] == ["on", "on"]
+    assert TestClient(app).get("/storms").status_code == 404
@@ -0,0 +1,125 @@
+import asyncio
+
+from app import agent
+from app.agent import triage_issue, triage_issue_async
+from app.config import get_settings
+from app.llm.mock import MockLLM
+from app.llm.usage import record_tokens, track_usage
+from app.metrics import LLM_TOKENS, PROMPT_COMPACTIONS, PROMPT_INPUT_TOKENS
+from app.token_budget import compact_text, count_tokens
+from app.triage_criteria import current_criteria
+
+
+def _word(n: int) -> str:
+    letters = "ghijklmnopqrstuvwxyz"  # no hex digits, so lines stay distinct after masking
+    return "".join(letters[(n // 20**k) % 20] for k in range(4))
+
+
+def _noisy_log(lines: int) -> str:
+    noise = [f"2024-05-0{i % 9 + 1}T10:{i % 60:02d}:00Z worker-{i} heartbeat ok seq={i * 7919}" for i in range(lines)]
+    unique = [f"step {_word(i)}: compiled module {_word(i * 7)} with warnings in {_word(i * 13)}" for i in range(lines)]
+    return "\n".join(line for pair in zip(noise, unique) for line in pair)
+
+
+def test_text_within_budget_is_unchanged():
+    result = compact_text("short body", budget_tokens=100)
+    assert result.text == "short body"
+    assert not result.compacted
+
+
+def test_repeated_log_lines_are_collapsed():
+    body = "\n".join(f"2024-05-01T10:00:{i:02d}Z ERROR connection reset by peer id=0x{i:04x}" for i in range(50))
+    result = compact_text(body, budget_tokens=100)
+    assert result.text.count("connection reset by peer") == 1
+    assert "[repeated 49 more times]" in result.text
+    assert result.tokens <= 100
+
+
+def test_compaction_keeps_head_tail_and_keyword_lines():
+    lines = _noisy_log(2000).splitlines()
+    lines.insert(1800, "Customers in production see the checkout page hang")
+    lines[0], lines[-1] = "FIRST LINE of the report", "LAST LINE of the report"
+    body = "\n".join(lines)
+
+    result = compact_text(body, budget_tokens=800, keywords=current_criteria().matchers.relevant)
+    assert result.compacted and result.tokens <= 800 < result.original_tokens
+    assert result.text.startswith("FIRST LINE")
+    assert result.text.endswith("LAST LINE of the report")
+    assert "Customers in production see the checkout page hang" in result.text
+    assert "lines omitted ...]" in result.text
+
+
+def test_single_oversized_line_is_truncated():
+    result = compact_text("x" * 100_000, budget_tokens=500)
+    assert result.tokens <= 500
+    assert result.text.endswith("[truncated]")
+
+
+class _RecordingLLM(MockLLM):
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, system_prompt: str, user_prompt: str) -> str:
+        self.prompts.append((system_prompt, user_prompt))
+        record_tokens(prompt_tokens=1200, completion_tokens=60, cached_tokens=1024)
+        return super().generate(system_prompt, user_prompt)
+
+
+def test_oversized_body_is_compacted_before_the_llm_call(monkeypatch):
+    monkeypatch.setenv("LLM_INPUT_TOKEN_BUDGET", "3000")
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    llm = _RecordingLLM()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: llm)
+    before = PROMPT_COMPACTIONS.value()
+
+    body = "Builds are failing after the upgrade, log below.\n" + _noisy_log(5000)
+    triage_issue("Nightly build broken", body, "demo/repo", None)
+
+    system_prompt, user_prompt = llm.prompts[0]
+    assert PROMPT_COMPACTIONS.value() == before + 1
+    assert count_tokens(system_prompt) + count_tokens(user_prompt) <= 3000
+    assert "Builds are failing after the upgrade" in user_prompt
+
+
+def test_prompt_is_only_budgeted_for_llm_calls(monkeypatch):
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    llm = _RecordingLLM()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: llm)
+    counted = []
+    monkeypatch.setattr(agent, "count_tokens", lambda text, model=None: counted.append(text) or len(text) // 4)
+    agent._system_prompt_tokens.cache_clear()
+    before = PROMPT_INPUT_TOKENS.count()
+
+    title, body = "Pipeline flaky", "The nightly pipeline in staging fails intermittently on the deploy step."
+    triage_issue(title, body, None, None)
+    triage_issue(title, body, None, None)  # cache hit
+    triage_issue("Broken", "It fails.", None, None)  # Rule D
+    triage_issue("Docs typo", "The installation guide misspells the name of the configuration file twice.", None, None)
+
+    assert len(llm.prompts) == 2
+    assert PROMPT_INPUT_TOKENS.count() == before + 2
+    assert counted.count(current_criteria().system_prompt) == 1
+
+
+def test_response_usage_is_recorded_per_request(monkeypatch):
+    monkeypatch.setenv("TRIAGE_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    monkeypatch.setattr(agent, "_select_llm_client", lambda: _RecordingLLM())
+    labels = {"backend": "_RecordingLLM", "model": "none"}
+    before_prompt = LLM_TOKENS.value(kind="prompt", **labels)
+    before_cached = LLM_TOKENS.value(kind="cached", **labels)
+
+    async def run():
+        with track_usage() as usage:
+            await triage_issue_async(
+                "Pipeline flaky", "The nightly pipeline in staging fails intermittently on the deploy step.", None, None
+            )
+        return usage
+
+    usage = asyncio.run(run())
+
+    assert usage.prompt_tokens == 1200 and usage.completion_tokens == 60
+    assert LLM_TOKENS.value(kind="prompt", **labels) == before_prompt + 1200
+    assert LLM_TOKENS.value(kind="cached", **labels) == before_cached + 1024
@@ -0,0 +1,110 @@
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.demo_payloads import sample_issue_payload
+from app.main import app
+from app.tracing import parse_traceparent, reset_tracer, span
+
+INCOMING_TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def _enable_file_tracing(monkeypatch, tmp_path, ratio="1.0"):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACING_EXPORTER", "file")
+    monkeypatch.setenv("TRACING_FILE_PATH", str(path))
+    monkeypatch.setenv("TRACING_SAMPLE_RATIO", ratio)
+    monkeypatch.setenv("DRY_RUN", "true")
+    get_settings.cache_clear()
+    return path
+
+
+def _spans(path):
+    reset_tracer()  # closes the file
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _payload():
+    return sample_issue_payload(
+        title="Checkout API 504s in production",
+        body="Customers cannot complete checkout since this morning, the production gateway returns 504s.",
+        issue_number=42,
+    )
+
+
+def test_webhook_stages_share_one_trace(monkeypatch, tmp_path):
+    path = _enable_file_tracing(monkeypatch, tmp_path)
+    client = TestClient(app)
+    headers = {"X-GitHub-Event": "issues", "X-GitHub-Delivery": "delivery-trace-1"}
+    assert client.post("/webhook/github", json=_payload(), headers=headers).status_code == 200
+
+    spans = {record["name"]: record for record in _spans(path)}
+    assert {"webhook", "parse_json", "triage_job", "triage", "build_prompts", "llm", "parse_llm_output"} <= set(spans)
+    assert len({record["trace_id"] for record in spans.values()}) == 1
+
+    root = spans["webhook"]
+    assert root["parent_id"] is None
+    assert root["attributes"]["delivery_id"] == "delivery-trace-1"
+    assert root["attributes"]["repo"] == "demo/example"
+    assert root["attributes"]["issue_number"] == 42
+    assert root["attributes"]["outcome"] == "triaged"
+    assert spans["triage_job"]["parent_id"] == root["span_id"]
+    assert spans["llm"]["parent_id"] == spans["triage"]["span_id"]
+    assert spans["llm"]["attributes"]["backend"] == "MockLLM"
+
+
+def test_incoming_traceparent_is_continued(monkeypatch, tmp_path):
+    path = _enable_file_tracing(monkeypatch, tmp_path)
+    client = TestClient(app)
+    headers = {"X-GitHub-Event": "issues", "traceparent": INCOMING_TRACEPARENT}
+    client.post("/webhook/github", json=_payload(), headers=headers)
+
+    root = next(record for record in _spans(path) if record["name"] == "webhook")
+    assert root["trace_id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert root["parent_id"] == "00f067aa0ba902b7"
+
+
+def test_sampling_ratio_drops_whole_traces(monkeypatch, tmp_path):
+    path = _enable_file_tracing(monkeypatch, tmp_path, ratio="0")
+    with span("root") as root:
+        with span("child"):
+            pass
+    assert root.sampled is False
+    assert _spans(path) == []
+
+    # An unsampled parent keeps its children unsampled even with a full ratio.
+    path = _enable_file_tracing(monkeypatch, tmp_path, ratio="1.0")
+    with span("resumed", traceparent=INCOMING_TRACEPARENT[:-2] + "00"):
+        pass
+    assert _spans(path) == []
+
+
+def test_parse_traceparent_rejects_malformed_headers():
+    assert parse_traceparent(INCOMING_TRACEPARENT).sampled is True
+    assert parse_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("") is None
+
+
+def test_async_job_continues_webhook_trace(monkeypatch, tmp_path):
+    path = _enable_file_tracing(monkeypatch, tmp_path)
+    monkeypatch.setenv("WEBHOOK_ASYNC_MODE", "true")
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("JOB_POLL_INTERVAL_SECONDS", "0.05")
+    get_settings.cache_clear()
+
+    with TestClient(app) as client:
+        headers = {"X-GitHub-Event": "issues", "X-GitHub-Delivery": "delivery-trace-2"}
+        assert client.post("/webhook/github", json=_payload(), headers=headers).status_code == 202
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and client.get("/jobs/delivery-trace-2").json()["status"] != "done":
+            time.sleep(0.05)
+
+    spans = {record["name"]: record for record in _spans(path)}
+    job = spans["triage_job"]
+    assert job["trace_id"] == spans["webhook"]["trace_id"]
+    assert job["parent_id"] == spans["webhook"]["span_id"]
+    assert job["attributes"]["delivery_id"] == "delivery-trace-2"
@@ -0,0 +1,44 @@
+import time
+
+from app.agent import triage_issue
+from app.cache import TriageCache, get_triage_cache, triage_cache_key
+
+
+BODY = "Terraform apply is failing in the staging pipeline since this morning."
+
+
+def test_repeated_issue_is_served_from_cache(counting_llm):
+    first = triage_issue("Staging pipeline broken", BODY, None, None)
+    second = triage_issue("Staging  pipeline broken ", f"  {BODY}\n", None, None)
+
+    assert counting_llm.calls == 1
+    assert second == first
+    assert get_triage_cache().stats()["hits"] == 1
+
+
+def test_model_change_invalidates_cache(counting_llm):
+    counting_llm.model = "gpt-4o-mini"
+    triage_issue("Staging pipeline broken", BODY, None, None)
+
+    counting_llm.model = "gpt-4o"
+    triage_issue("Staging pipeline broken", BODY, None, None)
+    assert counting_llm.calls == 2
+
+
+def test_sqlite_tier_survives_restart_and_honours_ttl(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    key = triage_cache_key("title", "body", "criteria", "model", "template")
+
+    cache = TriageCache(max_entries=4, ttl_seconds=60, db_path=db_path)
+    cache.set(key, '{"priority": "LOW"}')
+    cache.close()
+
+    reopened = TriageCache(max_entries=4, ttl_seconds=60, db_path=db_path)
+    assert reopened.get(key) == '{"priority": "LOW"}'
+    reopened.close()
+
+    short_lived = TriageCache(max_entries=4, ttl_seconds=0.01)
+    short_lived.set(key, "value")
+    time.sleep(0.02)
+    assert short_lived.get(key) is None
+    assert short_lived.stats()["misses"] == 1
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.demo_payloads import sample_issue_payload
+from app.main import app
+from app.webhook_ingest import InvalidPayload, PayloadTooLarge, extract_issue_payload, read_body
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def _read(data: bytes, max_bytes: int, secret=None, content_length=None):
+    return asyncio.run(read_body(_chunks(data, 7), max_bytes, secret, content_length))
+
+
+def test_incremental_hmac_matches_one_shot_digest():
+    body = json.dumps(sample_issue_payload()).encode()
+    received = _read(body, 1 << 20, secret="s3cret")
+    assert received.raw == body
+    assert received.digest == hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert _read(body, 1 << 20).digest is None
+
+
+def test_oversized_bodies_are_rejected_early():
+    with pytest.raises(PayloadTooLarge):
+        _read(b"x" * 100, 50)
+    # A declared Content-Length over the limit fails before the stream is touched.
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_body(None, 50, content_length="100"))
+
+
+def test_extract_keeps_only_needed_fields():
+    data = {
+        **sample_issue_payload(issue_number=5),
+        "installation": {"id": 99, "account": {"login": "demo"}},
+        "sender": {"login": "octocat"},
+    }
+    payload = extract_issue_payload(data)
+    assert payload.issue.number == 5
+    assert payload.installation.id == 99
+    with pytest.raises(InvalidPayload):
+        extract_issue_payload({**data, "issue": {**data["issue"], "title": ""}})
+
+
+def _client(monkeypatch, **env):
+    monkeypatch.setenv("DRY_RUN", "true")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    get_settings.cache_clear()
+    return TestClient(app)
+
+
+def test_webhook_returns_413_for_oversized_body(monkeypatch):
+    client = _client(monkeypatch, WEBHOOK_MAX_BODY_BYTES="1024")
+    payload = sample_issue_payload(body="x" * 4096)
+
+    response = client.post("/webhook/github", json=payload)
+    assert response.status_code == 413
+
+    # Chunked upload without Content-Length is cut off while streaming.
+    body = json.dumps(payload).encode()
+    response = client.post("/webhook/github", content=(body[i : i + 256] for i in range(0, len(body), 256)))
+    assert response.status_code == 413
+
+
+def test_webhook_keeps_400_behaviour(monkeypatch):
+    client = _client(monkeypatch)
+    assert client.post("/webhook/github", content=b"{not json").status_code == 400
+    assert client.post("/webhook/github", content=b"[1, 2]").json()["detail"] == "Missing action"
+
+    missing_title = sample_issue_payload()
+    missing_title["issue"].pop("title")
+    response = client.post("/webhook/github", json=missing_title)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing required issue fields"
+
+    # Ignored actions are acknowledged before the issue fields are validated.
+    response = client.post("/webhook/github", json={"action": "closed"})
+    assert response.status_code == 200 and response.json()["ignored"] is True
+
+
+def test_signed_chunked_webhook_is_accepted(monkeypatch):
+    client = _client(monkeypatch, WEBHOOK_SECRET="s3cret")
+    body = json.dumps(sample_issue_payload(body="Checkout is failing for customers in the production region.")).encode()
+    headers = {"X-Hub-Signature-256": "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()}
+    chunks = (body[i : i + 64] for i in range(0, len(body), 64))
+    response = client.post("/webhook/github", content=chunks, headers=headers)
+    assert response.status_code == 200, response.text